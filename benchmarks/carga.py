@@ -0,0 +1,273 @@
+# Teste de carga: N usuários simulados na Calculadora de ROI, contra o servidor LLM
+# falso local
+#
+# Uso:
+#   python -m benchmarks.carga --usuarios 20 --iteracoes 3 --latencia 0.5
+#   python -m benchmarks.carga --usuarios 50 --taxa-429 0.1 --taxa-erro 0.02
+#
+# Todas as sessões rodam neste processo, como em um único contêiner do Streamlit:
+# compartilham os recursos de `st.cache_resource` (LLM, agentes e cache), mas cada
+# uma tem o seu próprio estado. O cache de análises é ignorado em todos os cliques e
+# cada clique usa um orçamento próprio (por usuário e iteração): como as análises
+# são trabalhos deduplicados pelas entradas, cliques iguais e simultâneos se
+# anexariam a um único trabalho. Assim, cada clique chama o LLM (duas análises e
+# uma comparação); os contadores de trabalhos do relatório mostram os anexados.
+#
+# Cada sessão é um `AppTest`. Como o `AppTest` cria e descarta o `Runtime` global do
+# Streamlit a cada execução, a carga fixa um único `Runtime` simulado enquanto as
+# sessões rodam em paralelo.
+import argparse
+import io
+import os
+import resource
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import (
+    MemoryCacheStorageManager,
+)
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.util import patch_config_options
+
+import src.cache
+from benchmarks.servidor_llm import ConfiguracaoServidor, ServidorLLM
+from src.metrics import REGISTRO
+
+RAIZ_PROJETO = Path(__file__).resolve().parents[1]
+
+# Resultados do contador `roi_vision_trabalhos_total`
+RESULTADOS_TRABALHOS = ("novo", "anexado", "reaproveitado")
+
+
+def memoria_residente() -> int:
+    """Retorna a memória residente (RSS) atual do processo, em bytes.
+
+    Fora do Linux, usa o pico de RSS informado por `resource`.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def runtime_compartilhado() -> Runtime:
+    """Cria o `Runtime` simulado usado por todas as sessões da carga."""
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    return runtime
+
+
+def usuario_simulado(
+    usuario: int,
+    iteracoes: int,
+    inicio_conjunto: threading.Barrier,
+    sessao_pronta: threading.Barrier,
+    latencias: list[float],
+    erros: list[str],
+    timeout: float,
+) -> None:
+    """Abre uma sessão, vai à Calculadora de ROI e clica em "Analisar Projetos".
+
+    Antes de cada clique, o orçamento do Projeto A muda para um valor único do
+    usuário e da iteração, para que nenhum clique se anexe ao trabalho de outro.
+
+    Args:
+        usuario (int): O número do usuário, de zero em diante.
+        iteracoes (int): Quantas vezes o usuário clica no botão.
+        inicio_conjunto (threading.Barrier): Sincroniza o primeiro clique de todos.
+        sessao_pronta (threading.Barrier): Sinaliza que a sessão foi aberta (para a
+            medição de memória).
+        latencias (list[float]): Recebe o tempo de cada clique bem-sucedido.
+        erros (list[str]): Recebe a mensagem de cada clique com erro.
+        timeout (float): O tempo máximo de cada execução da página.
+    """
+    try:
+        app = AppTest.from_file(
+            str(RAIZ_PROJETO / "src" / "app.py"), default_timeout=timeout
+        )
+        app.run()
+        app.sidebar.radio[0].set_value("Calculadora de ROI").run()
+        app.checkbox[0].check().run()
+    except Exception as erro:
+        erros.append(f"Falha ao abrir a sessão: {erro}")
+        app = None
+    # Mesmo com falha, a sessão participa das barreiras para não travar as demais
+    sessao_pronta.wait()
+    inicio_conjunto.wait()
+    if app is None:
+        return
+    for iteracao in range(iteracoes):
+        try:
+            app.number_input(key="orcamento_a").set_value(
+                100_000.0 + 1_000 * (usuario * iteracoes + iteracao)
+            ).run()
+        except RuntimeError as erro:  # tempo esgotado
+            erros.append(str(erro))
+            continue
+        inicio = time.perf_counter()
+        try:
+            app.button[0].click().run()
+        except RuntimeError as erro:  # tempo esgotado
+            erros.append(str(erro))
+            continue
+        if app.exception:
+            erros.append(app.exception[0].message)
+        else:
+            latencias.append(time.perf_counter() - inicio)
+
+
+def executar_carga(
+    usuarios: int, iteracoes: int, configuracao: ConfiguracaoServidor, timeout: float
+) -> dict:
+    """Executa o teste de carga e retorna as medidas.
+
+    Args:
+        usuarios (int): O número de sessões simultâneas.
+        iteracoes (int): Os cliques em "Analisar Projetos" por sessão.
+        configuracao (ConfiguracaoServidor): O comportamento do servidor LLM falso.
+        timeout (float): O tempo máximo de cada execução da página.
+
+    Returns:
+        dict: Vazão, percentis de latência, erros, memória por sessão, as
+            respostas do servidor por status e os trabalhos por resultado.
+    """
+    latencias: list[float] = []
+    erros: list[str] = []
+    sessao_pronta = threading.Barrier(usuarios + 1)
+    inicio_conjunto = threading.Barrier(usuarios + 1)
+
+    with (
+        ServidorLLM(configuracao) as servidor,
+        tempfile.TemporaryDirectory() as diretorio,
+        mock.patch.dict(
+            os.environ,
+            {"AZURE_OPENAI_ENDPOINT": servidor.url, "AZURE_OPENAI_KEY": "carga"},
+        ),
+        mock.patch.object(src.cache, "DIRETORIO_CACHE", diretorio),
+        mock.patch.object(
+            Runtime, "instance", classmethod(lambda cls, r=runtime_compartilhado(): r)
+        ),
+        mock.patch.object(Runtime, "exists", classmethod(lambda cls: True)),
+        patch_config_options({"global.appTest": True}),
+        redirect_stdout(io.StringIO()),
+    ):
+        memoria_inicial = memoria_residente()
+        trabalhos_iniciais = {
+            resultado: REGISTRO.valor("roi_vision_trabalhos_total", resultado=resultado)
+            for resultado in RESULTADOS_TRABALHOS
+        }
+        threads = [
+            threading.Thread(
+                target=usuario_simulado,
+                args=(
+                    usuario,
+                    iteracoes,
+                    inicio_conjunto,
+                    sessao_pronta,
+                    latencias,
+                    erros,
+                    timeout,
+                ),
+                daemon=True,
+            )
+            for usuario in range(usuarios)
+        ]
+        for thread in threads:
+            thread.start()
+        sessao_pronta.wait()
+        memoria_sessoes = memoria_residente() - memoria_inicial
+        inicio = time.perf_counter()
+        inicio_conjunto.wait()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+        respostas = dict(servidor.contadores)
+        trabalhos = {
+            resultado: int(
+                REGISTRO.valor("roi_vision_trabalhos_total", resultado=resultado)
+                - inicial
+            )
+            for resultado, inicial in trabalhos_iniciais.items()
+        }
+
+    p50, p95, p99 = (
+        np.percentile(latencias, [50, 95, 99]) if latencias else (np.nan,) * 3
+    )
+    return {
+        "usuarios": usuarios,
+        "cliques": len(latencias) + len(erros),
+        "erros": len(erros),
+        "duracao_s": duracao,
+        "vazao_cliques_por_s": len(latencias) / duracao,
+        "latencia_p50_s": p50,
+        "latencia_p95_s": p95,
+        "latencia_p99_s": p99,
+        "memoria_por_sessao_mb": memoria_sessoes / usuarios / 2**20,
+        "respostas_servidor": respostas,
+        "trabalhos": trabalhos,
+        "exemplos_erro": sorted(set(erros))[:3],
+    }
+
+
+def main(argumentos: list[str] | None = None) -> None:
+    """Lê os parâmetros, executa a carga e imprime o relatório."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.carga",
+        description="Simula usuários simultâneos na Calculadora de ROI.",
+    )
+    parser.add_argument("--usuarios", type=int, default=10)
+    parser.add_argument("--iteracoes", type=int, default=3)
+    parser.add_argument(
+        "--latencia",
+        type=float,
+        default=0.5,
+        help="Espera do servidor falso até o primeiro token, em segundos.",
+    )
+    parser.add_argument("--intervalo-tokens", type=float, default=0.01)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=300,
+        help="Tempo máximo de cada execução da página, em segundos.",
+    )
+    args = parser.parse_args(argumentos)
+
+    relatorio = executar_carga(
+        args.usuarios,
+        args.iteracoes,
+        ConfiguracaoServidor(
+            latencia=args.latencia,
+            intervalo_tokens=args.intervalo_tokens,
+            taxa_erro=args.taxa_erro,
+            taxa_429=args.taxa_429,
+        ),
+        args.timeout,
+    )
+    print(
+        f"{relatorio['usuarios']} usuários, {relatorio['cliques']} cliques "
+        f"({relatorio['erros']} com erro) em {relatorio['duracao_s']:.1f} s\n"
+        f"Vazão: {relatorio['vazao_cliques_por_s']:.2f} cliques/s\n"
+        f"Latência p50/p95/p99: {relatorio['latencia_p50_s']:.2f} / "
+        f"{relatorio['latencia_p95_s']:.2f} / {relatorio['latencia_p99_s']:.2f} s\n"
+        f"Memória por sessão: {relatorio['memoria_por_sessao_mb']:.1f} MB\n"
+        f"Respostas do servidor LLM: {relatorio['respostas_servidor']}\n"
+        f"Trabalhos: {relatorio['trabalhos']}"
+    )
+    for mensagem in relatorio["exemplos_erro"]:
+        print(f"Erro: {mensagem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Perfil de inicialização: o tempo de abrir cada página em um processo novo e o
+# tempo de importação de cada pacote (`python -X importtime`)
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+RAIZ_PROJETO = Path(__file__).resolve().parents[1]
+
+PAGINAS = [
+    "Página Inicial",
+    "Calculadora de ROI",
+    "Ranking de Projetos",
+    "Histórico",
+    "Sobre",
+]
+
+# Executado em um processo novo: abre o app e vai até a página pedida
+SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+pagina = sys.argv[1]
+app = AppTest.from_file("src/app.py", default_timeout=300)
+inicio = time.perf_counter()
+app.run()
+primeira_execucao = time.perf_counter() - inicio
+inicio = time.perf_counter()
+if pagina != "Página Inicial":
+    app.sidebar.radio[0].set_value(pagina).run()
+troca_pagina = time.perf_counter() - inicio
+assert not app.exception, [erro.value for erro in app.exception]
+print(json.dumps({
+    "primeira_execucao": primeira_execucao,
+    "troca_pagina": troca_pagina,
+    "modulos": sorted(sys.modules),
+}))
+"""
+
+# Pacotes pesados cuja presença em cada página é informada
+PACOTES_PESADOS = ("crewai", "litellm", "pandas", "matplotlib", "dotenv")
+
+
+def ler_importtime(saida_erro: str) -> dict[str, float]:
+    """Soma o tempo próprio de importação (em segundos) de cada pacote de topo.
+
+    Args:
+        saida_erro (str): A saída de erro de `python -X importtime`.
+
+    Returns:
+        dict[str, float]: O tempo de cada pacote (o primeiro nome do módulo), do
+            maior para o menor.
+    """
+    tempos: dict[str, float] = defaultdict(float)
+    for linha in saida_erro.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, _, modulo = linha.removeprefix("import time:").split("|")
+        tempos[modulo.strip().split(".")[0]] += int(proprio) / 1e6
+    return dict(sorted(tempos.items(), key=lambda item: item[1], reverse=True))
+
+
+def perfilar_pagina(pagina: str) -> dict:
+    """Abre o app em um processo novo, vai até a página e mede a inicialização.
+
+    Args:
+        pagina (str): O nome da página no menu lateral.
+
+    Returns:
+        dict: Os tempos da "primeira_execucao" do script (Página Inicial) e da
+            "troca_pagina", o tempo de importação de cada pacote ("importacoes") e
+            os "pacotes_pesados" carregados.
+    """
+    with tempfile.TemporaryDirectory() as diretorio_cache:
+        processo = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SCRIPT, pagina],
+            cwd=RAIZ_PROJETO,
+            env={
+                **os.environ,
+                "PYTHONPATH": str(RAIZ_PROJETO),
+                "ROI_CACHE_DIR": diretorio_cache,
+            },
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+    modulos = set(resultado.pop("modulos"))
+    return {
+        **resultado,
+        "importacoes": ler_importtime(processo.stderr),
+        "pacotes_pesados": [pacote for pacote in PACOTES_PESADOS if pacote in modulos],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.inicializacao",
+        description="Mede a abertura de cada página em um processo novo.",
+    )
+    parser.add_argument(
+        "--paginas", nargs="+", default=PAGINAS, help="As páginas medidas."
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Quantos pacotes listar por página."
+    )
+    parser.add_argument("--saida", type=Path, help="Salva o perfil em JSON.")
+    args = parser.parse_args()
+
+    perfil = {}
+    for pagina in args.paginas:
+        perfil[pagina] = medida = perfilar_pagina(pagina)
+        print(
+            f"{pagina:<22} primeira execução {medida['primeira_execucao']:6.2f} s"
+            f"  troca de página {medida['troca_pagina']:6.2f} s"
+            f"  importações {sum(medida['importacoes'].values()):6.2f} s"
+        )
+        print(f"  pesados carregados: {', '.join(medida['pacotes_pesados']) or '-'}")
+        for pacote, tempo in list(medida["importacoes"].items())[: args.top]:
+            print(f"  {pacote:<30} {tempo:6.3f} s")
+
+    if args.saida:
+        args.saida.parent.mkdir(parents=True, exist_ok=True)
+        args.saida.write_text(json.dumps(perfil, indent=2, ensure_ascii=False))
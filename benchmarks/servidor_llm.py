@@ -0,0 +1,276 @@
+# Servidor local compatível com a API de chat da OpenAI (e da OpenAI Azure), para
+# testes de carga sem consumir a cota real
+#
+# Uso:
+#   python -m benchmarks.servidor_llm --porta 8765 --latencia 0.5 --taxa-429 0.1
+#
+# Aponte a aplicação para ele com AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8765 (a
+# chave pode ser qualquer valor). Qualquer caminho terminado em /chat/completions é
+# atendido, com ou sem streaming.
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPOSTA_PADRAO = (
+    "Thought: Tenho os dados necessários para responder.\n"
+    "Final Answer: O projeto apresenta retorno consistente e VPL positivo. "
+    "O principal risco é a adesão dos funcionários à mudança. "
+    "Recomenda-se um piloto antes da implantação completa. "
+    "Esta análise foi feita por uma IA e deve ser revisada por uma equipe humana."
+)
+
+
+@dataclass
+class ConfiguracaoServidor:
+    """O comportamento simulado do servidor.
+
+    Attributes:
+        latencia (float): Espera até o primeiro token (ou a resposta completa).
+        intervalo_tokens (float): Espera entre os trechos transmitidos.
+        taxa_erro (float): Fração das chamadas respondidas com erro 500.
+        taxa_429 (float): Fração das chamadas respondidas com 429 (cota excedida).
+        retry_after (float): O valor do cabeçalho Retry-After das respostas 429.
+        resposta (str): O texto devolvido pelo "modelo".
+    """
+
+    latencia: float = 0.5
+    intervalo_tokens: float = 0.01
+    taxa_erro: float = 0.0
+    taxa_429: float = 0.0
+    retry_after: float = 1.0
+    resposta: str = RESPOSTA_PADRAO
+
+
+def _trechos(texto: str) -> list[str]:
+    """Divide o texto em trechos do tamanho aproximado de um token."""
+    return [texto[i : i + 4] for i in range(0, len(texto), 4)]
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    """Atende as chamadas de chat no formato da OpenAI."""
+
+    protocol_version = "HTTP/1.1"
+    configuracao: ConfiguracaoServidor
+    contadores: dict
+    trava: threading.Lock
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _contar(self, resultado: str) -> None:
+        with self.trava:
+            self.contadores[resultado] = self.contadores.get(resultado, 0) + 1
+
+    def _responder_json(
+        self, status: int, corpo: dict, cabecalhos: dict | None = None
+    ) -> None:
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+        if not self.path.split("?")[0].endswith("/chat/completions"):
+            self._contar("404")
+            self._responder_json(404, {"error": {"message": "Caminho não suportado."}})
+            return
+
+        configuracao = self.configuracao
+        sorteio = random.random()
+        if sorteio < configuracao.taxa_429:
+            self._contar("429")
+            self._responder_json(
+                429,
+                {
+                    "error": {
+                        "code": "429",
+                        "message": "Requests to the ChatCompletions Operation have "
+                        "exceeded the token rate limit.",
+                    }
+                },
+                {"Retry-After": f"{configuracao.retry_after:g}"},
+            )
+            return
+        if sorteio < configuracao.taxa_429 + configuracao.taxa_erro:
+            self._contar("500")
+            self._responder_json(
+                500, {"error": {"code": "500", "message": "Erro interno simulado."}}
+            )
+            return
+
+        time.sleep(configuracao.latencia)
+        identificador = f"chatcmpl-{uuid.uuid4().hex}"
+        modelo = pedido.get("model", "gpt-4o-mini")
+        tokens_prompt = sum(
+            len(str(mensagem.get("content", ""))) // 4
+            for mensagem in pedido.get("messages", [])
+        )
+        trechos = _trechos(configuracao.resposta)
+        uso = {
+            "prompt_tokens": tokens_prompt,
+            "completion_tokens": len(trechos),
+            "total_tokens": tokens_prompt + len(trechos),
+        }
+        base = {"id": identificador, "created": int(time.time()), "model": modelo}
+
+        if not pedido.get("stream"):
+            self._contar("200")
+            self._responder_json(
+                200,
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": configuracao.resposta,
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": uso,
+                },
+            )
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        eventos = [
+            {
+                "index": 0,
+                "delta": {"role": "assistant", "content": trecho},
+                "finish_reason": None,
+            }
+            for trecho in trechos
+        ]
+        eventos.append({"index": 0, "delta": {}, "finish_reason": "stop"})
+        try:
+            for i, escolha in enumerate(eventos):
+                if i:
+                    time.sleep(configuracao.intervalo_tokens)
+                evento = {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [escolha],
+                }
+                if escolha["finish_reason"] is not None:
+                    evento["usage"] = uso
+                self.wfile.write(f"data: {json.dumps(evento)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self._contar("200")
+        except (BrokenPipeError, ConnectionResetError):
+            self._contar("interrompida")
+
+
+class ServidorLLM:
+    """Um servidor de chat falso, executado em segundo plano.
+
+    Exemplo:
+        with ServidorLLM(ConfiguracaoServidor(latencia=0.2)) as servidor:
+            os.environ["AZURE_OPENAI_ENDPOINT"] = servidor.url
+    """
+
+    def __init__(
+        self,
+        configuracao: ConfiguracaoServidor | None = None,
+        host: str = "127.0.0.1",
+        porta: int = 0,
+    ):
+        """Inicializa o ServidorLLM.
+
+        Args:
+            configuracao (ConfiguracaoServidor | None): O comportamento simulado.
+            host (str): O endereço de escuta.
+            porta (int): A porta de escuta; 0 escolhe uma porta livre.
+        """
+        self.configuracao = configuracao or ConfiguracaoServidor()
+        self.contadores: dict[str, int] = {}
+        manipulador = type(
+            "Manipulador",
+            (_Manipulador,),
+            {
+                "configuracao": self.configuracao,
+                "contadores": self.contadores,
+                "trava": threading.Lock(),
+            },
+        )
+        self._servidor = ThreadingHTTPServer((host, porta), manipulador)
+        self._servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """O endereço base do servidor (para AZURE_OPENAI_ENDPOINT)."""
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def iniciar(self) -> "ServidorLLM":
+        """Começa a atender em uma thread em segundo plano."""
+        self._thread = threading.Thread(
+            target=self._servidor.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        """Para de atender e libera a porta."""
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self) -> "ServidorLLM":
+        return self.iniciar()
+
+    def __exit__(self, *excecao) -> None:
+        self.parar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.servidor_llm",
+        description="Servidor local compatível com a API de chat da OpenAI.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.5)
+    parser.add_argument("--intervalo-tokens", type=float, default=0.01)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    servidor = ServidorLLM(
+        ConfiguracaoServidor(
+            latencia=args.latencia,
+            intervalo_tokens=args.intervalo_tokens,
+            taxa_erro=args.taxa_erro,
+            taxa_429=args.taxa_429,
+            retry_after=args.retry_after,
+        ),
+        args.host,
+        args.porta,
+    )
+    print(f"Servidor LLM falso em {servidor.url} (Ctrl+C para encerrar).")
+    with servidor:
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,59 @@
+# Mede a sobrecarga de inicialização dos agentes a cada execução do script
+import statistics
+import time
+
+from src.agents import (
+    KPICalculatorAgent,
+    ProjectComparatorAgent,
+    ResultAnalyzerAgent,
+    configuracao_llm,
+    criar_llm,
+)
+from src.app import obter_agentes, obter_cache_analises
+from src.cache import DIRETORIO_CACHE
+
+
+def medir(funcao, repeticoes: int) -> list[float]:
+    """Executa a função várias vezes e retorna o tempo de cada execução em ms."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def inicializacao_por_execucao():
+    """Reproduz o comportamento anterior: LLM e agentes recriados a cada clique."""
+    configuracao = configuracao_llm()
+    llm = criar_llm(configuracao)
+    cache = obter_cache_analises(DIRETORIO_CACHE)
+    KPICalculatorAgent(llm)
+    ResultAnalyzerAgent(llm, cache)
+    ResultAnalyzerAgent(llm, cache)
+    ProjectComparatorAgent(llm, cache)
+
+
+def inicializacao_compartilhada():
+    """Obtém os recursos compartilhados e empresta os agentes de uma análise."""
+    agentes = obter_agentes(configuracao_llm(), DIRETORIO_CACHE)
+    with (
+        agentes["analise"].emprestar(),
+        agentes["analise"].emprestar(),
+        agentes["comparacao"].emprestar(),
+    ):
+        pass
+
+
+if __name__ == "__main__":
+    repeticoes = 20
+    inicializacao_compartilhada()  # aquece o cache de recursos
+    for nome, funcao in [
+        ("antes (recriando a cada execução)", inicializacao_por_execucao),
+        ("depois (recursos compartilhados)", inicializacao_compartilhada),
+    ]:
+        tempos = medir(funcao, repeticoes)
+        print(
+            f"{nome:<36} mediana {statistics.median(tempos):8.2f} ms"
+            f"  máximo {max(tempos):8.2f} ms"
+        )
@@ -0,0 +1,303 @@
+# Suíte de benchmarks: funções de KPI, fluxo completo da página e memória das tabelas
+#
+# Uso:
+#   python -m benchmarks.suite --salvar-referencia   # grava a referência desta máquina
+#   python -m benchmarks.suite                       # compara com a referência
+#   python -m benchmarks.suite --latencia-llm 0.5 --limite 0.3
+#
+# O fluxo da página usa um LLM falso local (nenhuma chamada à Azure) e um cache
+# temporário. A execução termina com código 1 se alguma medida piorar mais que o
+# limite em relação à referência.
+import argparse
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from crewai import LLM, Agent
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+from streamlit.testing.v1 import AppTest
+
+import src.cache
+from src.agents import KPICalculatorAgent
+from src.kpis import calcular_kpis_lote, calcular_roi, calcular_vpl, ranquear_projetos
+from src.portfolio import otimizar_carteira
+from src.sensitivity import grade_relativa, tornado, varrer
+
+RAIZ_PROJETO = Path(__file__).resolve().parents[1]
+ARQUIVO_REFERENCIA = Path(__file__).with_name("referencia.json")
+
+HORIZONTES = (12, 60, 120, 360, 600)
+TAMANHOS_LOTE = (1_000, 10_000, 100_000)
+TAMANHOS_MEMORIA = (10_000, 100_000)
+TAMANHO_CARTEIRA = 5_000
+
+# Resposta do LLM falso: o formato do CrewAI, com termos usados na compactação
+RESPOSTA_FALSA = (
+    "Thought: Tenho os dados necessários.\n"
+    "Final Answer: O projeto apresenta retorno consistente. "
+    "O principal risco é a adesão dos funcionários à mudança. "
+    "Recomenda-se um piloto antes da implantação completa. "
+    "Esta análise foi feita por uma IA e deve ser revisada por uma equipe humana."
+)
+
+
+# --- Medição ---
+def cronometrar(funcao: Callable[[], object], repeticoes: int = 5) -> float:
+    """Retorna o menor tempo médio por chamada, em segundos.
+
+    O número de chamadas por repetição é ajustado pelo `timeit` para que cada
+    repetição dure ao menos 0,2 s; o mínimo entre as repetições descarta o ruído de
+    outros processos.
+    """
+    temporizador = timeit.Timer(funcao)
+    numero, _ = temporizador.autorange()
+    return min(temporizador.repeat(repeticoes, numero)) / numero
+
+
+def pico_memoria(funcao: Callable[[], object]) -> int:
+    """Retorna o pico de memória alocada (bytes) durante a chamada da função."""
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico
+
+
+def gerar_carteira(n: int, duracao: int = 36, semente: int = 0) -> pd.DataFrame:
+    """Gera uma carteira sintética de projetos com os campos dos KPIs."""
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame(
+        {
+            "orcamento": rng.uniform(10_000, 1_000_000, n),
+            "duracao": np.full(n, duracao),
+            "custo_treinamento": rng.uniform(0, 50_000, n),
+            "custo_implementacao": rng.uniform(0, 100_000, n),
+            "economia_custos": rng.uniform(0, 40_000, n),
+            "aumento_receita": rng.uniform(0, 60_000, n),
+            "taxa_desconto": rng.uniform(0, 20, n),
+        }
+    )
+
+
+# --- LLM falso ---
+@contextmanager
+def llm_falso(latencia: float, trechos: int = 40) -> Iterator[None]:
+    """Substitui a execução das tarefas do CrewAI por uma resposta local.
+
+    A resposta é transmitida em `trechos` pedaços pelo barramento de eventos, como
+    o streaming real, ao longo de `latencia` segundos.
+
+    Args:
+        latencia (float): O tempo total de cada resposta, em segundos.
+        trechos (int): Em quantos pedaços a resposta é transmitida.
+    """
+    tamanho = -(-len(RESPOSTA_FALSA) // trechos)
+
+    def executar(agente, task, context=None, tools=None):
+        for inicio in range(0, len(RESPOSTA_FALSA), tamanho):
+            time.sleep(latencia / trechos)
+            crewai_event_bus.emit(
+                agente,
+                LLMStreamChunkEvent(chunk=RESPOSTA_FALSA[inicio : inicio + tamanho]),
+            )
+        return RESPOSTA_FALSA
+
+    with mock.patch.object(Agent, "execute_task", executar):
+        yield
+
+
+# --- Benchmarks ---
+def medir_kpis() -> dict[str, float]:
+    """Mede as funções escalares por horizonte, o cálculo vetorizado por lote, as
+    varreduras da análise de sensibilidade e a otimização da carteira."""
+    agente = KPICalculatorAgent(LLM(model="azure/gpt-4o-mini", temperature=0.1))
+    medidas = {}
+    for duracao in HORIZONTES:
+        dados = gerar_carteira(1, duracao).iloc[0].to_dict()
+        dados["duracao"] = duracao
+        fluxos = [-100_000.0] + [23_000.0] * duracao
+        medidas[f"kpis/calcular_roi/{duracao}m"] = cronometrar(
+            lambda: calcular_roi(115_000.0, 23_000.0 * duracao)
+        )
+        medidas[f"kpis/calcular_vpl/{duracao}m"] = cronometrar(
+            lambda: calcular_vpl(10.0, fluxos)
+        )
+        medidas[f"kpis/calculate_kpis/{duracao}m"] = cronometrar(
+            lambda: agente.calculate_kpis(dados)
+        )
+    for n in TAMANHOS_LOTE:
+        carteira = gerar_carteira(n)
+        medidas[f"kpis/calcular_kpis_lote/{n}"] = cronometrar(
+            lambda: calcular_kpis_lote(carteira)
+        )
+
+    projeto = gerar_carteira(1).iloc[0].to_dict()
+    grades = {
+        "economia_custos": grade_relativa(projeto, "economia_custos", 0.5, 100),
+        "taxa_desconto": grade_relativa(projeto, "taxa_desconto", 0.5, 100),
+    }
+    medidas["sensibilidade/varrer/100x100"] = cronometrar(
+        lambda: varrer(projeto, grades)
+    )
+    medidas["sensibilidade/tornado"] = cronometrar(lambda: tornado(projeto))
+
+    candidatos = gerar_carteira(TAMANHO_CARTEIRA)
+    candidatos["funcionarios"] = np.random.default_rng(0).integers(
+        10, 500, TAMANHO_CARTEIRA
+    )
+    orcamento = candidatos["orcamento"].sum() / 4
+    medidas[f"carteira/otimizar/{TAMANHO_CARTEIRA}"] = cronometrar(
+        lambda: otimizar_carteira(candidatos, orcamento)
+    )
+    medidas[f"carteira/otimizar_funcionarios/{TAMANHO_CARTEIRA}"] = cronometrar(
+        lambda: otimizar_carteira(
+            candidatos, orcamento, candidatos["funcionarios"].sum() / 8
+        )
+    )
+    return medidas
+
+
+def medir_pagina(latencia: float, execucoes: int = 3) -> dict[str, float]:
+    """Mede o clique em "Analisar Projetos" da Calculadora de ROI, de ponta a ponta.
+
+    Inclui KPIs, simulações de risco, tabelas, as duas análises em paralelo e a
+    comparação, com o LLM falso e o cache ignorado (sempre gera novas respostas).
+    O eco dos tokens que o CrewAI escreve no terminal é descartado.
+    """
+    tempos = []
+    with (
+        tempfile.TemporaryDirectory() as diretorio,
+        mock.patch.object(src.cache, "DIRETORIO_CACHE", diretorio),
+        llm_falso(latencia),
+        redirect_stdout(io.StringIO()),
+    ):
+        app = AppTest.from_file(
+            str(RAIZ_PROJETO / "src" / "app.py"), default_timeout=60 + 10 * latencia
+        )
+        app.run()
+        app.sidebar.radio[0].set_value("Calculadora de ROI").run()
+        app.checkbox[0].check().run()
+        for _ in range(execucoes):
+            inicio = time.perf_counter()
+            app.button[0].click().run()
+            tempos.append(time.perf_counter() - inicio)
+            if app.exception:
+                raise RuntimeError(app.exception[0].message)
+    return {f"pagina/analisar_projetos/llm_{latencia:g}s": statistics.median(tempos)}
+
+
+def medir_memoria() -> dict[str, float]:
+    """Mede o pico de memória da montagem das tabelas de resultados."""
+    medidas = {}
+    for n in TAMANHOS_MEMORIA:
+        carteira = gerar_carteira(n)
+        medidas[f"memoria/tabela_resultados/{n}"] = pico_memoria(
+            lambda: pd.concat([carteira, calcular_kpis_lote(carteira)], axis=1)
+        )
+        medidas[f"memoria/ranking/{n}"] = pico_memoria(
+            lambda: ranquear_projetos(carteira)
+        )
+    return medidas
+
+
+# --- Referência ---
+def comparar(
+    referencia: dict[str, float], atual: dict[str, float], limite: float
+) -> list[str]:
+    """Lista as medidas que pioraram mais que `limite` em relação à referência.
+
+    Args:
+        referencia (dict[str, float]): As medidas da referência (tempo ou bytes).
+        atual (dict[str, float]): As medidas desta execução.
+        limite (float): A piora relativa tolerada (ex.: 0.25 para 25%).
+
+    Returns:
+        list[str]: Uma descrição de cada regressão; vazia se não houver nenhuma.
+    """
+    regressoes = []
+    for nome, valor in atual.items():
+        base = referencia.get(nome)
+        if base and valor > base * (1 + limite):
+            regressoes.append(
+                f"{nome}: {base:.6g} -> {valor:.6g} (+{valor / base - 1:.0%})"
+            )
+    return regressoes
+
+
+def main(argumentos: list[str] | None = None) -> int:
+    """Executa a suíte, grava ou compara a referência e retorna o código de saída."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite",
+        description="Mede os KPIs, o fluxo da página e a memória das tabelas.",
+    )
+    parser.add_argument(
+        "--referencia",
+        type=Path,
+        default=ARQUIVO_REFERENCIA,
+        help="Arquivo JSON com as medidas de referência.",
+    )
+    parser.add_argument(
+        "--salvar-referencia",
+        action="store_true",
+        help="Grava as medidas desta execução como a nova referência.",
+    )
+    parser.add_argument(
+        "--limite",
+        type=float,
+        default=0.25,
+        help="Piora relativa tolerada antes de falhar (0.25 = 25%%).",
+    )
+    parser.add_argument(
+        "--latencia-llm",
+        type=float,
+        default=0.2,
+        help="Latência de cada resposta do LLM falso, em segundos.",
+    )
+    args = parser.parse_args(argumentos)
+
+    medidas = {}
+    for etapa, funcao in [
+        ("KPIs", medir_kpis),
+        ("página", lambda: medir_pagina(args.latencia_llm)),
+        ("memória", medir_memoria),
+    ]:
+        print(f"Medindo {etapa}...", flush=True)
+        medidas.update(funcao())
+    for nome, valor in medidas.items():
+        unidade = "bytes" if nome.startswith("memoria/") else "s"
+        print(f"{nome:<45} {valor:14.6g} {unidade}")
+
+    if args.salvar_referencia:
+        args.referencia.write_text(
+            json.dumps(medidas, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+        )
+        print(f"Referência gravada em {args.referencia}.")
+        return 0
+    if not args.referencia.exists():
+        print("Sem referência para comparar; use --salvar-referencia.")
+        return 0
+
+    referencia = json.loads(args.referencia.read_text(encoding="utf-8"))
+    regressoes = comparar(referencia, medidas, args.limite)
+    for regressao in regressoes:
+        print(f"REGRESSÃO {regressao}")
+    if not regressoes:
+        print(f"Nenhuma medida piorou mais que {args.limite:.0%}.")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,887 @@
+# Agentes de IA (CrewAI) usados nas análises, sem dependência do Streamlit
+import hashlib
+import os
+import queue
+import re
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+import pandas as pd
+from crewai import LLM, Agent, Task
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+from dotenv import load_dotenv
+
+from src.cache import CacheAnalises
+from src.kpis import calcular_kpis, calcular_kpis_lote
+from src.metrics import instrumentar, registrar_medicao
+from src.prompts import (
+    ORCAMENTO_TOKENS_COMPARACAO,
+    contar_tokens,
+    montar_bloco_comparacao,
+)
+from src.scheduler import LLMAgendado
+
+# Carrega as variáveis do arquivo .env uma única vez, sem sobrescrever as já
+# definidas no ambiente (como as configurações do App Service)
+load_dotenv()
+
+
+# --- Configuração do LLM ---
+def configuracao_llm() -> tuple:
+    """Lê a configuração da OpenAI Azure a partir do ambiente.
+
+    A configuração é a chave dos recursos compartilhados (LLM e agentes): mudar as
+    variáveis do ambiente os recria na próxima interação.
+
+    Returns:
+        tuple: O modelo, o endpoint, a chave e a temperatura do LLM.
+    """
+    return (
+        "azure/gpt-4o-mini",
+        os.getenv("AZURE_OPENAI_ENDPOINT"),
+        os.getenv("AZURE_OPENAI_KEY"),
+        0.1,
+    )
+
+
+def criar_llm(configuracao: tuple) -> LLM:
+    """Cria o LLM da OpenAI Azure.
+
+    As chamadas passam pelo agendador do processo (`src.scheduler`), que respeita
+    a cota da implantação e recua após respostas 429.
+
+    Args:
+        configuracao (tuple): A configuração retornada por `configuracao_llm`.
+
+    Returns:
+        LLM: O modelo de linguagem, com streaming de tokens habilitado.
+    """
+    modelo, endpoint, chave, temperatura = configuracao
+    return LLMAgendado(
+        model=modelo,
+        api_base=endpoint,
+        api_key=chave,
+        temperature=temperatura,
+        stream=True,
+    )
+
+
+# --- Execução das tarefas com streaming ---
+# O `LLMStreamChunkEvent` é emitido na mesma thread que executa a tarefa, então
+# cada thread cadastra aqui a função que recebe os seus tokens. O repasse é
+# registrado uma única vez, na importação do módulo.
+_destinos_stream: dict[int, Callable[[str], None]] = {}
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _repassar_token(source, event: LLMStreamChunkEvent):
+    destino = _destinos_stream.get(threading.get_ident())
+    if destino is not None:
+        destino(event.chunk)
+
+
+def prompt_tarefa(agent: Agent, task: Task) -> str:
+    """Monta o prompt completo de uma tarefa: o papel, o objetivo e a história do
+    agente mais a descrição e o resultado esperado da tarefa."""
+    return "\n".join(
+        [
+            agent.role,
+            agent.goal,
+            agent.backstory,
+            task.description,
+            task.expected_output,
+        ]
+    )
+
+
+def assinatura_tarefas(tarefas: list[tuple[Agent, Task]]) -> str:
+    """Calcula a assinatura de um conjunto de tarefas, para o histórico.
+
+    A assinatura combina as chaves de cache de cada tarefa (o prompt normalizado,
+    o modelo e a temperatura): muda com os modelos de prompt, os dados enviados
+    (inclusive a posição no ramo de atuação) e a configuração do modelo.
+
+    Args:
+        tarefas (list[tuple[Agent, Task]]): Cada tarefa com o agente que a executa.
+
+    Returns:
+        str: O hash SHA-256 (hexadecimal) das tarefas.
+    """
+    chaves = [
+        CacheAnalises.chave(
+            prompt_tarefa(agent, task), agent.llm.model, agent.llm.temperature
+        )
+        for agent, task in tarefas
+    ]
+    return hashlib.sha256("\n".join(chaves).encode("utf-8")).hexdigest()
+
+
+def executar_tarefa(
+    agent: Agent,
+    task: Task,
+    ao_receber_token: Callable[[str], None] | None = None,
+    cache: CacheAnalises | None = None,
+    usar_cache: bool = True,
+) -> str:
+    """Executa uma tarefa, repassando os tokens recebidos conforme chegam.
+
+    Quando há cache, a resposta é buscada pelo hash do prompt completo (papel,
+    objetivo e história do agente mais a descrição da tarefa), do modelo e da
+    temperatura; respostas novas são sempre gravadas. Uma resposta do cache é
+    repassada de uma vez, no formato da transmissão ("Final Answer: ..."). O
+    resultado do cache e os tokens do prompt e da resposta são registrados na
+    etapa medida em andamento.
+
+    Args:
+        agent (Agent): O agente que executa a tarefa.
+        task (Task): A tarefa a executar.
+        ao_receber_token (Callable[[str], None] | None): Função chamada com cada
+            trecho de texto transmitido pelo LLM.
+        cache (CacheAnalises | None): O cache de respostas, se houver.
+        usar_cache (bool): Se False, ignora a resposta em cache e chama o LLM.
+
+    Returns:
+        str: A resposta final do agente.
+    """
+    prompt = prompt_tarefa(agent, task)
+    chave = None
+    if cache is not None:
+        chave = cache.chave(prompt, agent.llm.model, agent.llm.temperature)
+        if usar_cache:
+            resposta = cache.obter(chave)
+            if resposta is not None:
+                registrar_medicao(cache="acerto")
+                if ao_receber_token is not None:
+                    ao_receber_token(f"Final Answer: {resposta}")
+                return resposta
+            registrar_medicao(cache="falta")
+
+    if ao_receber_token is None:
+        resposta = agent.execute_task(task)
+    else:
+        _destinos_stream[threading.get_ident()] = ao_receber_token
+        try:
+            resposta = agent.execute_task(task)
+        finally:
+            _destinos_stream.pop(threading.get_ident(), None)
+    registrar_medicao(
+        tokens_prompt=contar_tokens(prompt, agent.llm.model),
+        tokens_resposta=contar_tokens(resposta, agent.llm.model),
+    )
+
+    if chave is not None:
+        cache.salvar(chave, resposta)
+    return resposta
+
+
+def resposta_parcial(texto: str) -> str:
+    """Extrai a parte exibível de uma resposta ainda em transmissão.
+
+    Args:
+        texto (str): O texto recebido até o momento, no formato do CrewAI
+            ("Thought: ... Final Answer: ...").
+
+    Returns:
+        str: O trecho após "Final Answer:", ou vazio enquanto ele não chega.
+    """
+    _, marcador, resposta = texto.partition("Final Answer:")
+    return resposta.strip() if marcador else ""
+
+
+# --- Agente de Cálculo de KPIs ---
+class KPICalculatorAgent:
+    """Um agente para calcular KPIs financeiros de projetos."""
+
+    def __init__(self, llm: LLM):
+        """Inicializa o KPICalculatorAgent.
+        Args:
+            llm (LLM): O modelo de linguagem grande a ser usado pelo agente.
+        """
+        self.agent = Agent(
+            role="Especialista em Análise Financeira",
+            goal="Calcular KPIs financeiros precisos para avaliar projetos.",
+            verbose=True,
+            llm=llm,
+            backstory="Você é um analista financeiro experiente com um histórico comprovado de avaliação de projetos e identificação de oportunidades de investimento.",
+        )
+
+    @instrumentar("calculate_kpis")
+    def calculate_kpis(self, data: dict) -> dict:
+        """Calcula os KPIs financeiros com base nos dados do projeto (ver
+        `calcular_kpis`).
+
+        Args:
+            data (dict): Um dicionário contendo os dados do projeto.
+
+        Returns:
+            dict: Os KPIs calculados, como float (a formatação fica para quem os
+                exibe): "ROI" e "TIR" em %, "Payback" em meses (NaN se não houver)
+                e os demais em R$.
+        """
+        return calcular_kpis(data)
+
+    def calculate_kpis_batch(self, data) -> pd.DataFrame:
+        """Calcula os KPIs financeiros de uma carteira de projetos.
+
+        Args:
+            data (pd.DataFrame | dict): Uma tabela colunar com os dados dos projetos.
+
+        Returns:
+            pd.DataFrame: Os KPIs numéricos de cada projeto (ver `calcular_kpis_lote`).
+        """
+        return calcular_kpis_lote(data)
+
+
+# --- Agente de Análise de Resultados ---
+# A análise é dividida em seções, e cada seção declara as entradas de que depende
+# ("kpis", "simulacao", "setor" e os campos do projeto). As seções que faltam são
+# pedidas em uma única chamada, cada uma sob o seu título, e a resposta é dividida
+# pelos títulos. O cache guarda cada seção pelo prompt que a pediria sozinha:
+# alterar um campo só regenera as seções que o usam (mudar `gestao_mudanca` refaz a
+# gestão de mudança e as recomendações, em uma chamada só com elas).
+SECOES_ANALISE = {
+    "pontos_fortes": {
+        "titulo": "Pontos Fortes",
+        "entradas": (
+            "kpis",
+            "orcamento",
+            "funcionarios",
+            "duracao",
+            "custo_treinamento",
+            "custo_implementacao",
+            "economia_custos",
+            "aumento_receita",
+            "taxa_desconto",
+            "setor",
+        ),
+        "instrucao": "Destaque os pontos fortes do projeto, com base nos KPIs e nos dados financeiros.",
+    },
+    "pontos_fracos": {
+        "titulo": "Pontos Fracos",
+        "entradas": (
+            "kpis",
+            "orcamento",
+            "funcionarios",
+            "duracao",
+            "custo_treinamento",
+            "custo_implementacao",
+            "economia_custos",
+            "aumento_receita",
+            "taxa_desconto",
+            "setor",
+        ),
+        "instrucao": "Aponte os pontos fracos e os problemas potenciais do projeto, com base nos KPIs e nos dados financeiros, e sugira melhorias.",
+    },
+    "riscos": {
+        "titulo": "Riscos",
+        "entradas": ("kpis", "simulacao", "duracao", "risco_falha", "ramo_atuacao"),
+        "instrucao": "Avalie os riscos do projeto, considerando o risco de falha, a simulação de Monte Carlo (quando houver) e os riscos próprios do ramo de atuação.",
+    },
+    "gestao_mudanca": {
+        "titulo": "Gestão de Mudança",
+        "entradas": (
+            "funcionarios",
+            "duracao",
+            "custo_treinamento",
+            "gestao_mudanca",
+            "ramo_atuacao",
+        ),
+        "instrucao": "Avalie a gestão de mudança do projeto: o impacto sobre os funcionários, a dificuldade informada, o treinamento e o prazo, considerando o ramo de atuação.",
+    },
+    "recomendacoes": {
+        "titulo": "Recomendações",
+        "entradas": (
+            "kpis",
+            "simulacao",
+            "setor",
+            "risco_falha",
+            "gestao_mudanca",
+            "ramo_atuacao",
+        ),
+        "instrucao": "Forneça recomendações acionáveis para a decisão sobre o projeto, considerando a saúde financeira, os riscos e a gestão de mudança.",
+    },
+}
+
+# Linha de cada campo do projeto nos prompts das seções
+LINHAS_DADOS = {
+    "orcamento": "Orçamento: {:.2f}",
+    "funcionarios": "Número de Funcionários Impactados: {}",
+    "duracao": "Duração do Projeto: {} meses",
+    "custo_treinamento": "Custo de Treinamento: {:.2f}",
+    "custo_implementacao": "Custo de Implementação: {:.2f}",
+    "economia_custos": "Economia de Custos: {:.2f}",
+    "aumento_receita": "Aumento de Receita: {:.2f}",
+    "taxa_desconto": "Taxa de Desconto: {:.4f}% ao mês",
+    "risco_falha": "Risco de Falha: {}",
+    "gestao_mudanca": "Gestão de Mudanças: dificuldade {}",
+    "ramo_atuacao": "Ramo de Atuação: {}",
+}
+
+# Linha de título de seção na resposta do LLM (ex.: "### **Riscos:**")
+_TITULO_SECAO = re.compile(
+    r"^[ \t]*#{1,6}[ \t]*\**[ \t]*(.+?)[ \t]*:?[ \t]*\**[ \t]*:?[ \t]*$", re.M
+)
+
+# Acrescentado ao final de toda análise, em vez de pedido ao LLM em cada seção
+AVISO_ANALISE_IA = (
+    "_Esta análise foi feita por uma IA; recomenda-se que uma equipe humana a "
+    "revise._"
+)
+
+
+def montar_analise(secoes: dict[str, str]) -> str:
+    """Junta as seções da análise em um único texto Markdown.
+
+    As seções aparecem na ordem de `SECOES_ANALISE`, cada uma com o seu título;
+    as ausentes ou vazias (ainda em geração, por exemplo) são omitidas.
+
+    Args:
+        secoes (dict[str, str]): O texto de cada seção, pelo nome.
+
+    Returns:
+        str: A análise com os títulos e o aviso de IA ao final, ou vazio se
+            nenhuma seção tiver texto.
+    """
+    partes = [
+        f"### {secao['titulo']}\n\n{secoes[nome].strip()}"
+        for nome, secao in SECOES_ANALISE.items()
+        if secoes.get(nome, "").strip()
+    ]
+    return "\n\n".join(partes + [AVISO_ANALISE_IA]) if partes else ""
+
+
+def dividir_analise(texto: str, secoes: list[str]) -> dict[str, str]:
+    """Divide a resposta do LLM nas seções pedidas, pelos títulos em Markdown.
+
+    Um título é uma linha com "#" seguido do título de uma das seções (com ou sem
+    negrito e dois-pontos); os demais títulos ficam no texto da seção. O texto antes
+    do primeiro título é descartado.
+
+    Args:
+        texto (str): A resposta do LLM.
+        secoes (list[str]): Os nomes das seções pedidas (chaves de
+            `SECOES_ANALISE`).
+
+    Returns:
+        dict[str, str]: O texto de cada seção encontrada, sem o título.
+    """
+    nomes = {SECOES_ANALISE[nome]["titulo"].casefold(): nome for nome in secoes}
+    titulos = [
+        (titulo, nomes[titulo.group(1).casefold()])
+        for titulo in _TITULO_SECAO.finditer(texto)
+        if titulo.group(1).casefold() in nomes
+    ]
+    return {
+        nome: texto[titulo.end() : seguinte.start() if seguinte else None].strip()
+        for (titulo, nome), (seguinte, _) in zip(titulos, titulos[1:] + [(None, None)])
+    }
+
+
+class ResultAnalyzerAgent:
+    """Um agente para analisar os resultados dos KPIs e fornecer insights."""
+
+    def __init__(self, llm: LLM, cache: CacheAnalises | None = None):
+        """Inicializa o ResultAnalyzerAgent.
+
+        Args:
+            llm (LLM): O modelo de linguagem grande a ser usado pelo agente.
+            cache (CacheAnalises | None): O cache das seções geradas, se houver.
+        """
+        self.cache = cache
+        self.agent = Agent(
+            role="Analista de Projetos Sênior",
+            goal="Analisar os KPIs e dados de projetos para fornecer insights valiosos e recomendações acionáveis. Forneça análises concisas e bem formatadas, evitando quebras de linha desnecessárias.",
+            verbose=True,
+            llm=llm,
+            backstory="Você é um analista de projetos experiente, com um olhar crítico para detalhes e uma capacidade de transformar dados em estratégias eficazes. Cada tarefa pede seções da análise: escreva cada uma sob o seu título, exatamente como pedido, sem repetir os temas das demais.",
+        )
+
+    def create_analysis_task(
+        self,
+        secoes: list[str],
+        kpis: dict,
+        data: dict,
+        simulacao: dict | None = None,
+        setor: dict | None = None,
+    ) -> Task:
+        """Cria a tarefa que pede as seções, só com as entradas que elas usam.
+
+        Args:
+            secoes (list[str]): Os nomes das seções (chaves de `SECOES_ANALISE`), na
+                ordem em que devem ser escritas.
+            kpis (dict): Um dicionário contendo os KPIs calculados.
+            data (dict): Um dicionário contendo os dados do projeto.
+            simulacao (dict | None): O resultado de `simular_risco`, se disponível.
+            setor (dict | None): A posição do projeto no seu ramo de atuação (ver
+                `IndiceSetorial.posicionar`), se disponível.
+
+        Returns:
+            Task: A tarefa das seções.
+        """
+        definicoes = [SECOES_ANALISE[secao] for secao in secoes]
+        entradas_usadas = {
+            entrada for definicao in definicoes for entrada in definicao["entradas"]
+        }
+        blocos = []
+        if "kpis" in entradas_usadas:
+            blocos.append(
+                f"""KPIs do projeto:
+                ROI: {kpis['ROI']:.2f}
+                VPL: {kpis['VPL']:.2f}
+                Investimento Total: {kpis['Investimento Total']:.2f}
+                Retorno Total: {kpis['Retorno Total']:.2f}
+                Payback: {kpis['Payback']:.2f} meses
+                TIR: {kpis['TIR']:.2f}% ao mês"""
+            )
+        campos = [campo for campo in LINHAS_DADOS if campo in entradas_usadas]
+        if campos:
+            blocos.append(
+                "\n".join(
+                    ["Dados do projeto:"]
+                    + [LINHAS_DADOS[campo].format(data[campo]) for campo in campos]
+                )
+            )
+        if "simulacao" in entradas_usadas and simulacao is not None:
+            blocos.append(
+                f"""Simulação de Monte Carlo considerando o risco de falha:
+                VPL P5 / P50 / P95: {simulacao['VPL P5']:.2f} / {simulacao['VPL P50']:.2f} / {simulacao['VPL P95']:.2f}
+                ROI P5 / P50 / P95: {simulacao['ROI P5']:.2f} / {simulacao['ROI P50']:.2f} / {simulacao['ROI P95']:.2f}
+                Probabilidade de VPL Negativo: {simulacao['Prob. VPL Negativo (%)']:.2f}%"""
+            )
+        if "setor" in entradas_usadas and setor is not None:
+            blocos.append(
+                "\n".join(
+                    [
+                        f"Posição entre os projetos do ramo {setor['ramo']} "
+                        "(percentil = % dos projetos com valor menor):"
+                    ]
+                    + [
+                        f"{kpi}{' (menor é melhor)' if kpi == 'Payback' else ''}: "
+                        f"percentil {posicao['percentil']:.0f} entre "
+                        f"{posicao['projetos']} projetos; "
+                        f"P25 / P50 / P75 do ramo: {posicao['P25']:.2f} / "
+                        f"{posicao['P50']:.2f} / {posicao['P75']:.2f}"
+                        for kpi, posicao in setor.items()
+                        if isinstance(posicao, dict)
+                    ]
+                )
+            )
+        entradas = "\n\n".join(blocos)
+        pedidos = "\n".join(
+            f"### {definicao['titulo']}\n{definicao['instrucao']}"
+            for definicao in definicoes
+        )
+
+        return Task(
+            description=f"""Escreva as seções abaixo da análise do projeto, nesta ordem, cada uma começando pelo seu título em uma linha própria ("### Título").
+
+            {entradas}
+
+            Onde houver o símbolo de R$ substitua por R\\$ para formatação correta.
+            {pedidos}
+            Mantenha a formatação concisa e evite quebras de linha desnecessárias.
+            """,
+            expected_output='As seções pedidas, cada uma sob o seu título ("### Título"), claras e concisas.',
+            agent=self.agent,
+        )
+
+    def create_section_task(
+        self,
+        secao: str,
+        kpis: dict,
+        data: dict,
+        simulacao: dict | None = None,
+        setor: dict | None = None,
+    ) -> Task:
+        """Cria a tarefa de uma única seção; o seu prompt é a chave da seção no cache.
+
+        Args:
+            secao (str): O nome da seção (uma chave de `SECOES_ANALISE`).
+            kpis (dict): Um dicionário contendo os KPIs calculados.
+            data (dict): Um dicionário contendo os dados do projeto.
+            simulacao (dict | None): O resultado de `simular_risco`, se disponível.
+            setor (dict | None): A posição do projeto no seu ramo de atuação, se
+                disponível.
+
+        Returns:
+            Task: A tarefa da seção.
+        """
+        return self.create_analysis_task([secao], kpis, data, simulacao, setor)
+
+    def assinatura(
+        self,
+        kpis: dict,
+        data: dict,
+        simulacao: dict | None = None,
+        setor: dict | None = None,
+    ) -> str:
+        """Calcula a assinatura dos prompts da análise (ver `assinatura_tarefas`).
+
+        Args:
+            kpis (dict): Um dicionário contendo os KPIs calculados.
+            data (dict): Um dicionário contendo os dados do projeto.
+            simulacao (dict | None): O resultado de `simular_risco`, se disponível.
+            setor (dict | None): A posição do projeto no seu ramo de atuação, se
+                disponível.
+
+        Returns:
+            str: A assinatura das tarefas de todas as seções.
+        """
+        return assinatura_tarefas(
+            [
+                (
+                    self.agent,
+                    self.create_section_task(nome, kpis, data, simulacao, setor),
+                )
+                for nome in SECOES_ANALISE
+            ]
+        )
+
+    def analyze_sections(
+        self,
+        kpis: dict,
+        data: dict,
+        simulacao: dict | None = None,
+        setor: dict | None = None,
+        receptor_secao: Callable[[str], Callable[[str], None]] | None = None,
+        usar_cache: bool = True,
+    ) -> dict[str, str]:
+        """Gera as seções da análise, com uma única chamada ao LLM para as que
+        faltam no cache.
+
+        As seções em cache são repassadas de uma vez; as demais são transmitidas
+        conforme chegam, divididas pelos títulos linha a linha. Uma resposta sem
+        nenhum título reconhecido fica inteira na primeira seção pedida.
+
+        Args:
+            kpis (dict): Um dicionário contendo os KPIs calculados.
+            data (dict): Um dicionário contendo os dados do projeto.
+            simulacao (dict | None): O resultado de `simular_risco`, se disponível.
+            setor (dict | None): A posição do projeto no seu ramo de atuação (ver
+                `IndiceSetorial.posicionar`), se disponível.
+            receptor_secao (Callable[[str], Callable[[str], None]] | None): Função
+                que recebe o nome de uma seção e retorna a função chamada com cada
+                trecho dela transmitido pelo LLM.
+            usar_cache (bool): Se False, ignora as seções em cache e chama o LLM.
+
+        Returns:
+            dict[str, str]: O texto de cada seção, na ordem de `SECOES_ANALISE`.
+        """
+        chaves = {}
+        secoes = {}
+        if self.cache is not None:
+            for nome in SECOES_ANALISE:
+                tarefa = self.create_section_task(nome, kpis, data, simulacao, setor)
+                chaves[nome] = self.cache.chave(
+                    prompt_tarefa(self.agent, tarefa),
+                    self.agent.llm.model,
+                    self.agent.llm.temperature,
+                )
+                resposta = self.cache.obter(chaves[nome]) if usar_cache else None
+                if resposta is not None:
+                    secoes[nome] = resposta
+                    if receptor_secao is not None:
+                        receptor_secao(nome)(f"Final Answer: {resposta}")
+        faltantes = [nome for nome in SECOES_ANALISE if nome not in secoes]
+        if self.cache is not None and usar_cache:
+            registrar_medicao(cache="falta" if faltantes else "acerto")
+        if not faltantes:
+            return secoes
+
+        recebido = ""
+        enviados: dict[str, str] = {}
+
+        def dividir_transmissao(trecho: str) -> None:
+            # Repassa a cada seção o que chegou dela, só com as linhas completas
+            nonlocal recebido
+            recebido += trecho
+            if "\n" not in trecho:
+                return
+            completas = resposta_parcial(recebido[: recebido.rfind("\n")])
+            for nome, texto in dividir_analise(completas, faltantes).items():
+                enviado = enviados.get(nome, "")
+                if len(texto) > len(enviado) and texto.startswith(enviado):
+                    prefixo = "" if enviado else "Final Answer: "
+                    receptor_secao(nome)(prefixo + texto[len(enviado) :])
+                    enviados[nome] = texto
+
+        resposta = executar_tarefa(
+            self.agent,
+            self.create_analysis_task(faltantes, kpis, data, simulacao, setor),
+            dividir_transmissao if receptor_secao is not None else None,
+        )
+        geradas = dividir_analise(resposta, faltantes) or {
+            faltantes[0]: resposta.strip()
+        }
+        for nome, texto in geradas.items():
+            if nome in chaves and texto:
+                self.cache.salvar(chaves[nome], texto)
+        secoes.update(geradas)
+        return {nome: secoes.get(nome, "") for nome in SECOES_ANALISE}
+
+    @instrumentar("analyze_project")
+    def analyze_project(
+        self,
+        kpis: dict,
+        data: dict,
+        simulacao: dict | None = None,
+        setor: dict | None = None,
+        receptor_secao: Callable[[str], Callable[[str], None]] | None = None,
+        usar_cache: bool = True,
+    ) -> str:
+        """Executa a análise do projeto, seção por seção (ver `analyze_sections`).
+
+        Args:
+            kpis (dict): Um dicionário contendo os KPIs calculados.
+            data (dict): Um dicionário contendo os dados do projeto.
+            simulacao (dict | None): O resultado de `simular_risco`, se disponível.
+            setor (dict | None): A posição do projeto no seu ramo de atuação (ver
+                `IndiceSetorial.posicionar`), se disponível.
+            receptor_secao (Callable[[str], Callable[[str], None]] | None): Função
+                que recebe o nome de uma seção e retorna a função chamada com cada
+                trecho dela transmitido pelo LLM.
+            usar_cache (bool): Se False, ignora as seções em cache e chama o LLM.
+
+        Returns:
+            str: A análise do projeto, montada por `montar_analise`.
+        """
+        return montar_analise(
+            self.analyze_sections(
+                kpis, data, simulacao, setor, receptor_secao, usar_cache
+            )
+        )
+
+
+# --- Agente de Comparação de Projetos ---
+class ProjectComparatorAgent:
+    """Um agente para comparar projetos com base em KPIs e análises."""
+
+    def __init__(self, llm: LLM, cache: CacheAnalises | None = None):
+        """Inicializa o ProjectComparatorAgent.
+
+        Args:
+            llm (LLM): O modelo de linguagem grande a ser usado pelo agente.
+            cache (CacheAnalises | None): O cache das comparações geradas, se houver.
+        """
+        self.cache = cache
+        self.relatorio_tokens = None
+        self.agent = Agent(
+            role="Especialista em Tomada de Decisões Estratégicas",
+            goal="Comparar projetos com base em KPIs e análises para recomendar a melhor opção.",
+            verbose=True,
+            llm=llm,
+            backstory="Você é um líder estratégico com uma habilidade excepcional para avaliar opções, pesar prós e contras, e tomar decisões informadas que impulsionam o sucesso.",
+        )
+
+    def create_comparison_task(
+        self,
+        projeto_a_analise: str,
+        projeto_b_analise: str,
+        projeto_a_kpis: dict,
+        projeto_b_kpis: dict,
+        orcamento_tokens: int | None = ORCAMENTO_TOKENS_COMPARACAO,
+    ) -> tuple[Task, dict | None]:
+        """Cria a tarefa de comparação dos projetos.
+
+        Args:
+            projeto_a_analise (str): A análise do Projeto A.
+            projeto_b_analise (str): A análise do Projeto B.
+            projeto_a_kpis (dict): Os KPIs do Projeto A.
+            projeto_b_kpis (dict): Os KPIs do Projeto B.
+            orcamento_tokens (int | None): O limite de tokens do bloco de projetos
+                no prompt; None envia as análises completas.
+
+        Returns:
+            tuple[Task, dict | None]: A tarefa e o relatório de tokens economizados
+                (None com as análises completas).
+        """
+        if orcamento_tokens is None:
+            projetos = f"""**Projeto A:**
+            Análise: {projeto_a_analise}
+            ROI: {projeto_a_kpis['ROI']:.2f}
+            VPL: {projeto_a_kpis['VPL']:.2f}
+
+            **Projeto B:**
+            Análise: {projeto_b_analise}
+            ROI: {projeto_b_kpis['ROI']:.2f}
+            VPL: {projeto_b_kpis['VPL']:.2f}"""
+            relatorio_tokens = None
+        else:
+            projetos, relatorio_tokens = montar_bloco_comparacao(
+                {
+                    "Projeto A": (projeto_a_analise, projeto_a_kpis),
+                    "Projeto B": (projeto_b_analise, projeto_b_kpis),
+                },
+                orcamento_tokens,
+                self.agent.llm.model,
+            )
+
+        task = Task(
+            description=f"""Compare os seguintes projetos com base em suas análises e KPIs:
+
+            {projetos}
+
+            Onde houver o símbolo de R$ substitua por R\\$ para formatação correta.
+            Destaque as vantagens e desvantagens de cada projeto, considerando os KPIs e os fatores qualitativos.
+            Recomende o melhor projeto com base na análise comparativa e justifique sua recomendação.
+            """,
+            expected_output="Uma comparação detalhada dos projetos, destacando vantagens e desvantagens, e uma recomendação clara com justificativa.",
+            agent=self.agent,
+        )
+        return task, relatorio_tokens
+
+    def assinatura(
+        self,
+        projeto_a_analise: str,
+        projeto_b_analise: str,
+        projeto_a_kpis: dict,
+        projeto_b_kpis: dict,
+    ) -> str:
+        """Calcula a assinatura do prompt da comparação (ver `assinatura_tarefas`).
+
+        Args:
+            projeto_a_analise (str): A análise do Projeto A.
+            projeto_b_analise (str): A análise do Projeto B.
+            projeto_a_kpis (dict): Os KPIs do Projeto A.
+            projeto_b_kpis (dict): Os KPIs do Projeto B.
+
+        Returns:
+            str: A assinatura da tarefa de comparação.
+        """
+        task, _ = self.create_comparison_task(
+            projeto_a_analise, projeto_b_analise, projeto_a_kpis, projeto_b_kpis
+        )
+        return assinatura_tarefas([(self.agent, task)])
+
+    @instrumentar("compare_projects")
+    def compare_projects(
+        self,
+        projeto_a_analise: str,
+        projeto_b_analise: str,
+        projeto_a_kpis: dict,
+        projeto_b_kpis: dict,
+        ao_receber_token: Callable[[str], None] | None = None,
+        usar_cache: bool = True,
+        orcamento_tokens: int | None = ORCAMENTO_TOKENS_COMPARACAO,
+    ) -> str:
+        """Compara os projetos com base nas análises e KPIs.
+
+        Por padrão, as análises entram no prompt como resumos dentro de
+        `orcamento_tokens`, junto dos KPIs estruturados; o relatório de tokens
+        economizados fica em `self.relatorio_tokens`.
+
+        Args:
+            projeto_a_analise (str): A análise do Projeto A.
+            projeto_b_analise (str): A análise do Projeto B.
+            projeto_a_kpis (dict): Os KPIs do Projeto A.
+            projeto_b_kpis (dict): Os KPIs do Projeto B.
+            ao_receber_token (Callable[[str], None] | None): Função chamada com cada
+                trecho da resposta transmitido pelo LLM.
+            usar_cache (bool): Se False, ignora a comparação em cache e chama o LLM.
+            orcamento_tokens (int | None): O limite de tokens do bloco de projetos
+                no prompt; None envia as análises completas.
+
+        Returns:
+            str: A comparação dos projetos e a recomendação.
+        """
+        task, self.relatorio_tokens = self.create_comparison_task(
+            projeto_a_analise,
+            projeto_b_analise,
+            projeto_a_kpis,
+            projeto_b_kpis,
+            orcamento_tokens,
+        )
+        return executar_tarefa(
+            self.agent, task, ao_receber_token, self.cache, usar_cache
+        )
+
+    @instrumentar("rank_projects")
+    def rank_projects(
+        self,
+        ranking: pd.DataFrame,
+        top_k: int = 5,
+        ao_receber_token: Callable[[str], None] | None = None,
+        usar_cache: bool = True,
+    ) -> str:
+        """Analisa, em uma única chamada, os melhores colocados de um ranking.
+
+        Apenas os `top_k` primeiros projetos são enviados, em formato compacto (uma
+        linha por projeto), então o custo da chamada não depende do total de
+        projetos ranqueados.
+
+        Args:
+            ranking (pd.DataFrame): O resultado de `ranquear_projetos`.
+            top_k (int): Quantos projetos do topo do ranking enviar ao LLM.
+            ao_receber_token (Callable[[str], None] | None): Função chamada com cada
+                trecho da resposta transmitido pelo LLM.
+            usar_cache (bool): Se False, ignora a análise em cache e chama o LLM.
+
+        Returns:
+            str: A análise comparativa dos melhores projetos e a recomendação.
+        """
+        linhas = []
+        for projeto in ranking.head(top_k).to_dict("records"):
+            detalhes = [
+                f"{projeto['Posição']}. {projeto.get('projeto', 'Projeto')}",
+                f"ROI {projeto['ROI']:.2f}%",
+                f"VPL {projeto['VPL']:.2f}",
+                f"Investimento {projeto['Investimento Total']:.2f}",
+                f"Duração {projeto['duracao']} meses",
+            ]
+            for campo, rotulo in [
+                ("risco_falha", "Risco de Falha"),
+                ("gestao_mudanca", "Gestão de Mudança"),
+                ("ramo_atuacao", "Ramo"),
+            ]:
+                if campo in projeto:
+                    detalhes.append(f"{rotulo} {projeto[campo]}")
+            linhas.append(" | ".join(detalhes))
+        tabela = "\n".join(linhas)
+
+        task = Task(
+            description=f"""Foram ranqueados {len(ranking)} projetos por VPL e ROI. Estes são os {min(top_k, len(ranking))} melhores colocados:
+
+            {tabela}
+
+            Onde houver o símbolo de R$ substitua por R\\$ para formatação correta.
+            Compare esses projetos, destacando vantagens e desvantagens de cada um, considerando os KPIs e os fatores qualitativos.
+            Recomende a ordem de prioridade para investimento e justifique sua recomendação.
+            """,
+            expected_output="Uma comparação concisa dos melhores projetos do ranking e uma recomendação clara de prioridade com justificativa.",
+            agent=self.agent,
+        )
+        return executar_tarefa(
+            self.agent, task, ao_receber_token, self.cache, usar_cache
+        )
+
+
+# --- Pool de agentes reaproveitáveis ---
+class PoolAgentes:
+    """Um conjunto de agentes reaproveitáveis, emprestados para uma tarefa por vez.
+
+    O CrewAI guarda o estado da execução no próprio `Agent`, então um agente não
+    pode atender duas tarefas ao mesmo tempo; novos agentes só são criados quando
+    todos os existentes estão ocupados.
+    """
+
+    def __init__(self, fabrica: Callable[[], object]):
+        """Inicializa o PoolAgentes.
+
+        Args:
+            fabrica (Callable[[], object]): Função que cria um novo agente.
+        """
+        self.fabrica = fabrica
+        self._livres = queue.LifoQueue()
+
+    @contextmanager
+    def emprestar(self) -> Iterator:
+        """Empresta um agente livre (ou um novo), devolvendo-o ao final do bloco."""
+        try:
+            agente = self._livres.get_nowait()
+        except queue.Empty:
+            agente = self.fabrica()
+        try:
+            yield agente
+        finally:
+            self._livres.put(agente)
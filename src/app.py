@@ -1,246 +1,541 @@
 # importa as libs
-import os
-import numpy as np
-import pandas as pd
-import streamlit as st
-from crewai import LLM, Agent, Task
-from dotenv import load_dotenv
-
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv()
-
-# Configurações da OpenAI Azure
-llm = LLM(
-    model="azure/gpt-4o-mini",
-    api_base=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_KEY"),
-    temperature=0.1,
-)
+from __future__ import annotations
+
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
 
+import streamlit as st
 
-# --- Funções para cálculos de KPIs ---
-def calcular_roi(investimento: float, retorno: float) -> float:
-    """Calcula o Retorno sobre o Investimento (ROI).
+# Permite importar o pacote `src` ao executar `streamlit run src/app.py`
+RAIZ_PROJETO = str(Path(__file__).resolve().parents[1])
+if RAIZ_PROJETO not in sys.path:
+    sys.path.append(RAIZ_PROJETO)
+
+# Só os módulos leves são importados no início. O pandas, o CrewAI (e o LLM), o
+# Matplotlib e os módulos que dependem deles são importados nas páginas e funções
+# que os usam: a Página Inicial e o Sobre abrem sem carregá-los.
+from src.cache import DIRETORIO_CACHE, CacheAnalises  # noqa: E402
+from src.jobs import CONCLUIDO, ERRO, GerenciadorTrabalhos, Trabalho  # noqa: E402
+from src.metrics import medir  # noqa: E402
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from crewai import LLM
+
+    from src.history import HistoricoAnalises
+    from src.setores import IndiceSetorial
+
+# Projetos de exemplo da página de ranking (os mesmos valores iniciais de A e B,
+# com as taxas de desconto ao ano)
+PROJETOS_EXEMPLO = [
+    {
+        "projeto": "Projeto A",
+        "orcamento": 100000.0,
+        "funcionarios": 100,
+        "duracao": 12,
+        "custo_treinamento": 5000.0,
+        "custo_implementacao": 10000.0,
+        "economia_custos": 8000.0,
+        "aumento_receita": 15000.0,
+        "taxa_desconto": 12.0,
+        "risco_falha": 5.0,
+        "gestao_mudanca": "Fácil",
+        "ramo_atuacao": "TI - IA",
+    },
+    {
+        "projeto": "Projeto B",
+        "orcamento": 150000.0,
+        "funcionarios": 150,
+        "duracao": 18,
+        "custo_treinamento": 7000.0,
+        "custo_implementacao": 12000.0,
+        "economia_custos": 10000.0,
+        "aumento_receita": 20000.0,
+        "taxa_desconto": 15.0,
+        "risco_falha": 8.0,
+        "gestao_mudanca": "Médio",
+        "ramo_atuacao": "Indústria - Automotiva",
+    },
+]
+
+
+# Rótulos e formatos das colunas, aplicados só na exibição: as tabelas guardam
+# números, que podem ser ordenados, somados e exportados sem conversão
+COLUNAS = {
+    "projeto": st.column_config.TextColumn("Projeto"),
+    "orcamento": st.column_config.NumberColumn("Orçamento R$", format="%.2f"),
+    "funcionarios": st.column_config.NumberColumn(
+        "Funcionários Impactados", format="%d"
+    ),
+    "duracao": st.column_config.NumberColumn("Duração (meses)", format="%d"),
+    "custo_treinamento": st.column_config.NumberColumn(
+        "Custo de Treinamento R$", format="%.2f"
+    ),
+    "custo_implementacao": st.column_config.NumberColumn(
+        "Custo de Implementação R$", format="%.2f"
+    ),
+    "economia_custos": st.column_config.NumberColumn(
+        "Economia de Custos R$", format="%.2f"
+    ),
+    "aumento_receita": st.column_config.NumberColumn(
+        "Aumento de Receita R$", format="%.2f"
+    ),
+    "taxa_desconto": st.column_config.NumberColumn(
+        "Taxa de Desconto (%)", format="%.2f%%"
+    ),
+    "risco_falha": st.column_config.NumberColumn("Risco de Falha (%)", format="%.2f%%"),
+    "gestao_mudanca": st.column_config.TextColumn("Gestão de Mudança"),
+    "ramo_atuacao": st.column_config.TextColumn("Ramo"),
+    "ROI": st.column_config.NumberColumn("ROI (%)", format="%.2f"),
+    "VPL": st.column_config.NumberColumn("VPL R$", format="%.2f"),
+    "Investimento Total": st.column_config.NumberColumn(
+        "Investimento Total R$", format="%.2f"
+    ),
+    "Retorno Total": st.column_config.NumberColumn("Retorno Total R$", format="%.2f"),
+    "Payback": st.column_config.NumberColumn("Payback (meses)", format="%.2f"),
+    "TIR": st.column_config.NumberColumn("TIR (% ao mês)", format="%.2f"),
+    "Valor": st.column_config.NumberColumn("Valor R$", format="%.2f"),
+}
+
+# Linhas por página das tabelas grandes: só a página exibida é enviada ao navegador
+TAMANHO_PAGINA = 500
+# Acima deste número de projetos, a tabela carregada é exibida sem edição
+LIMITE_EDICAO = 1_000
+
+
+# --- Análises em segundo plano ---
+# Intervalo mínimo entre as atualizações da página durante o streaming
+INTERVALO_ATUALIZACAO = 0.05
+
+
+def analisar_e_comparar(
+    trabalho: Trabalho,
+    agentes: dict,
+    dados: tuple[dict, dict],
+    kpis: tuple[dict, dict],
+    simulacoes: tuple[dict, dict],
+    setores: tuple[dict | None, dict | None],
+    usar_cache: bool,
+    historico: HistoricoAnalises,
+    indice: IndiceSetorial,
+    modelo: str,
+) -> dict:
+    """Analisa os projetos A e B em paralelo e, em seguida, os compara.
+
+    Com o cache habilitado, as análises e a comparação já feitas para as mesmas
+    entradas, com a mesma versão dos prompts e dentro do TTL do histórico, são lidas
+    dele sem chamar o LLM; as novas são guardadas nele e acrescentadas ao índice por
+    ramo de atuação.
 
     Args:
-        investimento (float): O valor do investimento.
-        retorno (float): O valor do retorno.
+        trabalho (Trabalho): O trabalho que recebe os textos transmitidos.
+        agentes (dict): Os agentes retornados por `obter_agentes`.
+        dados (tuple[dict, dict]): Os dados dos projetos A e B.
+        kpis (tuple[dict, dict]): Os KPIs dos projetos A e B.
+        simulacoes (tuple[dict, dict]): As simulações de risco dos projetos A e B.
+        setores (tuple[dict | None, dict | None]): A posição dos projetos A e B no
+            seu ramo de atuação (`IndiceSetorial.posicionar`).
+        usar_cache (bool): Se False, ignora as respostas em cache e o histórico.
+        historico (HistoricoAnalises): O histórico das análises.
+        indice (IndiceSetorial): O índice dos KPIs por ramo de atuação.
+        modelo (str): O modelo de linguagem (parte da chave do histórico).
 
     Returns:
-        float: O valor do ROI em porcentagem.
+        dict: As análises ("A", "B"), a "comparacao" e o "relatorio_tokens" (None
+            se a comparação veio do histórico).
     """
-    if investimento == 0:
-        return np.inf
-    return ((retorno - investimento) / investimento) * 100
+
+    def analisar(nome, dados_projeto, kpis_projeto, simulacao, setor) -> str:
+        with agentes["analise"].emprestar() as result_analyzer:
+            # A versão dos prompts (com a posição no ramo) faz parte da chave
+            versao = result_analyzer.assinatura(
+                kpis_projeto, dados_projeto, simulacao, setor
+            )
+            anterior = usar_cache and historico.buscar_analise(
+                dados_projeto, modelo, versao
+            )
+            if anterior:
+                trabalho.receptor(nome)(f"Final Answer: {anterior}")
+                return anterior
+            inicio = time.perf_counter()
+            analise = result_analyzer.analyze_project(
+                kpis_projeto,
+                dados_projeto,
+                simulacao,
+                setor,
+                # Cada seção é transmitida em uma parte própria (ex.: "A:riscos")
+                receptor_secao=lambda secao: trabalho.receptor(f"{nome}:{secao}"),
+                usar_cache=usar_cache,
+            )
+        historico.registrar_analise(
+            {"projeto": f"Projeto {nome}", **dados_projeto},
+            kpis_projeto,
+            analise,
+            modelo,
+            simulacao,
+            time.perf_counter() - inicio,
+            versao,
+        )
+        indice.adicionar(
+            dados_projeto["ramo_atuacao"],
+            kpis_projeto,
+            historico.chave_entrada(dados_projeto),
+        )
+        return analise
+
+    # Um agente por projeto: as duas análises rodam em paralelo e o CrewAI
+    # guarda o estado da execução no próprio agente.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futuros = {
+            nome: executor.submit(analisar, nome, *entradas)
+            for nome, *entradas in zip("AB", dados, kpis, simulacoes, setores)
+        }
+        analises = {nome: futuro.result() for nome, futuro in futuros.items()}
+
+    with agentes["comparacao"].emprestar() as project_comparator:
+        versao = project_comparator.assinatura(analises["A"], analises["B"], *kpis)
+        comparacao = usar_cache and historico.buscar_comparacao(*dados, modelo, versao)
+        if comparacao:
+            trabalho.receptor("comparacao")(f"Final Answer: {comparacao}")
+            return {**analises, "comparacao": comparacao, "relatorio_tokens": None}
+        inicio = time.perf_counter()
+        comparacao = project_comparator.compare_projects(
+            analises["A"],
+            analises["B"],
+            *kpis,
+            ao_receber_token=trabalho.receptor("comparacao"),
+            usar_cache=usar_cache,
+        )
+        relatorio_tokens = project_comparator.relatorio_tokens
+    historico.registrar_comparacao(
+        *dados, comparacao, modelo, time.perf_counter() - inicio, versao
+    )
+    return {
+        **analises,
+        "comparacao": comparacao,
+        "relatorio_tokens": relatorio_tokens,
+    }
 
 
-def calcular_vpl(taxa_desconto: float, fluxos_caixa: list) -> float:
-    """Calcula o Valor Presente Líquido (VPL).
+def analisar_ranking(
+    trabalho: Trabalho,
+    agentes: dict,
+    ranking: pd.DataFrame,
+    top_k: int,
+    usar_cache: bool,
+) -> dict:
+    """Analisa os melhores colocados do ranking em uma única chamada.
 
     Args:
-        taxa_desconto (float): A taxa de desconto anual em porcentagem.
-        fluxos_caixa (list): Uma lista dos fluxos de caixa do projeto.
+        trabalho (Trabalho): O trabalho que recebe o texto transmitido.
+        agentes (dict): Os agentes retornados por `obter_agentes`.
+        ranking (pd.DataFrame): O resultado de `ranquear_projetos`.
+        top_k (int): Quantos projetos do topo enviar ao LLM.
+        usar_cache (bool): Se False, ignora a resposta em cache.
 
     Returns:
-        float: O valor do VPL.
+        dict: A análise do ranking, em "ranking".
     """
-    vpl = 0
-    for i, fluxo in enumerate(fluxos_caixa):
-        vpl += fluxo / (1 + taxa_desconto / 100) ** i
-    return vpl
+    with agentes["comparacao"].emprestar() as project_comparator:
+        return {
+            "ranking": project_comparator.rank_projects(
+                ranking, top_k, trabalho.receptor("ranking"), usar_cache
+            )
+        }
 
 
-# --- Agente de Cálculo de KPIs ---
-class KPICalculatorAgent:
-    """Um agente para calcular KPIs financeiros de projetos."""
+def acompanhar_trabalho(trabalho: Trabalho, espacos: dict) -> dict | None:
+    """Transmite o andamento de um trabalho para os seus espaços na tela, até o fim.
 
-    def __init__(self, llm: LLM):
-        """Inicializa o KPICalculatorAgent.
-        Args:
-            llm (LLM): O modelo de linguagem grande a ser usado pelo agente.
-        """
-        self.agent = Agent(
-            role="Especialista em Análise Financeira",
-            goal="Calcular KPIs financeiros precisos para avaliar projetos.",
-            verbose=True,
-            llm=llm,
-            backstory="Você é um analista financeiro experiente com um histórico comprovado de avaliação de projetos e identificação de oportunidades de investimento.",
+    Se a página for reexecutada no meio (por exemplo, ao alterar um campo), apenas o
+    acompanhamento é interrompido: o trabalho continua em segundo plano e é retomado
+    na execução seguinte.
+
+    Args:
+        trabalho (Trabalho): O trabalho submetido ao `GerenciadorTrabalhos`.
+        espacos (dict): Os `st.empty()` de cada parte do trabalho, pelo nome.
+
+    Returns:
+        dict | None: O resultado do trabalho, ou None se ele falhou (o erro é
+            exibido na página).
+    """
+    from src.agents import montar_analise, resposta_parcial
+
+    for espaco in espacos.values():
+        espaco.markdown("_Analisando..._")
+    exibidos: dict[str, str] = {}
+    versao = -1
+    while True:
+        estado = trabalho.aguardar(versao, timeout=1.0)
+        versao = estado["versao"]
+        # As análises chegam por seção ("A:riscos") e são exibidas com as seções
+        # já recebidas; as demais partes chegam inteiras
+        partes: dict[str, dict[str, str]] = {}
+        for parte, texto in estado["textos"].items():
+            nome, _, secao = parte.partition(":")
+            partes.setdefault(nome, {})[secao] = resposta_parcial(texto)
+        for nome, secoes in partes.items():
+            parcial = secoes[""] if "" in secoes else montar_analise(secoes)
+            if parcial and parcial != exibidos.get(nome):
+                espacos[nome].markdown(parcial)
+                exibidos[nome] = parcial
+        if estado["estado"] in (CONCLUIDO, ERRO):
+            break
+        time.sleep(INTERVALO_ATUALIZACAO)
+
+    if estado["estado"] == ERRO:
+        st.error(f"Não foi possível concluir a análise: {estado['erro']}")
+        return None
+    for nome, espaco in espacos.items():
+        espaco.markdown(estado["resultado"][nome])
+    return estado["resultado"]
+
+
+# --- Tabelas ---
+def exibir_tabela(tabela: pd.DataFrame, chave: str) -> None:
+    """Exibe uma tabela com os formatos de `COLUNAS`, paginada se for grande.
+
+    Args:
+        tabela (pd.DataFrame): A tabela, com as colunas numéricas.
+        chave (str): O prefixo das chaves dos widgets da tabela.
+    """
+    total = len(tabela)
+    paginas = max(-(-total // TAMANHO_PAGINA), 1)
+    if paginas > 1:
+        pagina = st.number_input(
+            "Página", min_value=1, max_value=paginas, value=1, key=f"{chave}_pagina"
         )
+        inicio = (pagina - 1) * TAMANHO_PAGINA
+        tabela = tabela.iloc[inicio : inicio + TAMANHO_PAGINA]
+        st.caption(f"Linhas {inicio + 1} a {inicio + len(tabela)} de {total}.")
+    st.dataframe(
+        tabela, column_config=COLUNAS, hide_index=True, use_container_width=True
+    )
 
-    def calculate_kpis(self, data: dict) -> dict:
-        """Calcula os KPIs financeiros com base nos dados do projeto.
 
-        Args:
-            data (dict): Um dicionário contendo os dados do projeto.
+def botoes_exportacao(tabela: pd.DataFrame, nome_arquivo: str, chave: str) -> None:
+    """Exibe os botões para baixar a tabela em Parquet e em Arrow (Feather).
 
-        Returns:
-            dict: Um dicionário contendo os KPIs calculados.
-        """
-        orcamento = data["orcamento"]
-        duracao = data["duracao"]
-        custo_treinamento = data["custo_treinamento"]
-        custo_implementacao = data["custo_implementacao"]
-        economia_custos = data["economia_custos"]
-        aumento_receita = data["aumento_receita"]
-        taxa_desconto = data["taxa_desconto"]
+    Args:
+        tabela (pd.DataFrame): A tabela a exportar, com os valores numéricos.
+        nome_arquivo (str): O nome dos arquivos, sem a extensão.
+        chave (str): O prefixo das chaves dos botões.
+    """
+    col_parquet, col_arrow, _ = st.columns([1, 1, 3])
+    col_parquet.download_button(
+        "Parquet 📥",
+        exportar_tabela(tabela, "parquet"),
+        file_name=f"{nome_arquivo}.parquet",
+        mime="application/vnd.apache.parquet",
+        key=f"{chave}_parquet",
+    )
+    col_arrow.download_button(
+        "Arrow 📥",
+        exportar_tabela(tabela, "arrow"),
+        file_name=f"{nome_arquivo}.arrow",
+        mime="application/vnd.apache.arrow.file",
+        key=f"{chave}_arrow",
+    )
 
-        investimento_total = orcamento + custo_treinamento + custo_implementacao
-        retorno_total = (economia_custos * duracao) + (aumento_receita * duracao)
 
-        roi = calcular_roi(investimento_total, retorno_total)
-        vpl = calcular_vpl(
-            taxa_desconto,
-            [-investimento_total] + [(economia_custos + aumento_receita)] * duracao,
-        )
+# --- Recursos compartilhados entre execuções e sessões ---
+@st.cache_resource(max_entries=1, show_spinner=False)
+def obter_llm(configuracao: tuple) -> LLM:
+    """Retorna o LLM compartilhado por todas as sessões para a configuração atual.
 
-        return {
-            "ROI": f"{roi:.2f}",
-            "VPL": f"{vpl:.2f}",
-            "Investimento Total": f"{investimento_total:.2f}",
-            "Retorno Total": f"{retorno_total:.2f}",
-        }
+    Args:
+        configuracao (tuple): A configuração retornada por `configuracao_llm`.
 
+    Returns:
+        LLM: O modelo de linguagem compartilhado.
+    """
+    from src.agents import criar_llm
 
-# --- Agente de Análise de Resultados ---
-class ResultAnalyzerAgent:
-    """Um agente para analisar os resultados dos KPIs e fornecer insights."""
+    return criar_llm(configuracao)
 
-    def __init__(self, llm: LLM):
-        """Inicializa o ResultAnalyzerAgent.
 
-        Args:
-            llm (LLM): O modelo de linguagem grande a ser usado pelo agente.
-        """
-        self.agent = Agent(
-            role="Analista de Projetos Sênior",
-            goal="Analisar os KPIs e dados de projetos para fornecer insights valiosos e recomendações acionáveis. Forneça análises concisas e bem formatadas, evitando quebras de linha desnecessárias.",
-            verbose=True,
-            llm=llm,
-            backstory="Você é um analista de projetos experiente, com um olhar crítico para detalhes e uma capacidade de transformar dados em estratégias eficazes. Ao final, deve dar ênfase à Gestão de Mudança e apontar riscos devivo ao ramo de atuação escolhido. É uma premissa sempre informar que a análise foi feita através de uma IA e que recomendado que uma equipe humana faça revisão.",
-        )
+@st.cache_resource(max_entries=1, show_spinner=False)
+def obter_cache_analises(diretorio: str) -> CacheAnalises:
+    """Retorna o cache de análises compartilhado por todas as sessões.
+
+    Args:
+        diretorio (str): O diretório do cache em disco.
 
-    def create_analysis_task(self, kpis: dict, data: dict) -> Task:
-        """Cria uma tarefa para analisar os KPIs e dados do projeto.
+    Returns:
+        CacheAnalises: O cache das respostas do LLM.
+    """
+    return CacheAnalises(diretorio)
 
-        Args:
-            kpis (dict): Um dicionário contendo os KPIs calculados.
-            data (dict): Um dicionário contendo os dados do projeto.
 
-        Returns:
-            Task: A tarefa de análise criada.
-        """
-        orcamento = data["orcamento"]
-        funcionarios = data["funcionarios"]
-        duracao = data["duracao"]
-        custo_treinamento = data["custo_treinamento"]
-        custo_implementacao = data["custo_implementacao"]
-        economia_custos = data["economia_custos"]
-        aumento_receita = data["aumento_receita"]
-        taxa_desconto = data["taxa_desconto"]
-        risco_falha = data["risco_falha"]
-        gestao_mudanca = data["gestao_mudanca"]
-        ramo_atuacao = data["ramo_atuacao"]
-
-        return Task(
-            description=f"""Analise os seguintes KPIs do projeto:
-            ROI: {kpis['ROI']}
-            VPL: {kpis['VPL']}
-            Investimento Total: {kpis['Investimento Total']}
-            Retorno Total: {kpis['Retorno Total']}
-
-            Considere também os seguintes dados do projeto:
-            Orçamento: {orcamento:.2f}
-            Número de Funcionários Impactados: {funcionarios}
-            Duração do Projeto: {duracao} meses
-            Custo de Treinamento: {custo_treinamento:.2f}
-            Custo de Implementação: {custo_implementacao:.2f}
-            Economia de Custos: {economia_custos:.2f}
-            Aumento de Receita: {aumento_receita:.2f}
-            Taxa de Desconto: {taxa_desconto}
-            Risco de Falha: {risco_falha}
-            Gestão de Mudanças: dificuldade {gestao_mudanca}
-            Ramo de Atuação: {ramo_atuacao}
-
-            Onde houver o símbolo de R$ substitua por R\$ para formatação correta.
-            Forneça insights sobre a saúde financeira do projeto, identifique problemas potenciais, sugira melhorias e forneça recomendações acionáveis.
-            Destaque os pontos fortes e fracos do projeto com base nos dados fornecidos.
-            Mantenha a formatação concisa e evite quebras de linha desnecessárias.
-            """,
-            expected_output="Uma análise detalhada do projeto, com insights, problemas potenciais, sugestões de melhoria e recomendações, formatada de forma clara e concisa.",
-            agent=self.agent,
-        )
-
-    def analyze_project(self, kpis: dict, data: dict) -> str:
-        """Executa a tarefa de análise do projeto.
-
-        Args:
-            kpis (dict): Um dicionário contendo os KPIs calculados.
-            data (dict): Um dicionário contendo os dados do projeto.
-
-        Returns:
-            str: A análise do projeto.
-        """
-        task = self.create_analysis_task(kpis, data)
-        return self.agent.execute_task(task)
+@st.cache_resource(max_entries=1, show_spinner=False)
+def obter_historico(diretorio: str) -> HistoricoAnalises:
+    """Retorna o histórico de análises compartilhado por todas as sessões.
+
+    Args:
+        diretorio (str): O diretório do histórico em disco.
 
+    Returns:
+        HistoricoAnalises: O histórico das análises e comparações.
+    """
+    from src.history import HistoricoAnalises
 
-# --- Agente de Comparação de Projetos ---
-class ProjectComparatorAgent:
-    """Um agente para comparar projetos com base em KPIs e análises."""
+    return HistoricoAnalises(diretorio)
 
-    def __init__(self, llm: LLM):
-        """Inicializa o ProjectComparatorAgent.
 
-        Args:
-            llm (LLM): O modelo de linguagem grande a ser usado pelo agente.
-        """
-        self.agent = Agent(
-            role="Especialista em Tomada de Decisões Estratégicas",
-            goal="Comparar projetos com base em KPIs e análises para recomendar a melhor opção.",
-            verbose=True,
-            llm=llm,
-            backstory="Você é um líder estratégico com uma habilidade excepcional para avaliar opções, pesar prós e contras, e tomar decisões informadas que impulsionam o sucesso.",
-        )
-
-    def compare_projects(
-        self,
-        projeto_a_analise: str,
-        projeto_b_analise: str,
-        projeto_a_kpis: dict,
-        projeto_b_kpis: dict,
-    ) -> str:
-        """Compara os projetos com base nas análises e KPIs.
-
-        Args:
-            projeto_a_analise (str): A análise do Projeto A.
-            projeto_b_analise (str): A análise do Projeto B.
-            projeto_a_kpis (dict): Os KPIs do Projeto A.
-            projeto_b_kpis (dict): Os KPIs do Projeto B.
-
-        Returns:
-            str: A comparação dos projetos e a recomendação.
-        """
-        task = Task(
-            description=f"""Compare os seguintes projetos com base em suas análises e KPIs:
+@st.cache_resource(max_entries=1, show_spinner=False)
+def obter_indice_setorial(diretorio: str) -> IndiceSetorial:
+    """Retorna o índice dos KPIs por ramo de atuação, compartilhado por todas as
+    sessões.
 
-            **Projeto A:**
-            Análise: {projeto_a_analise}
-            ROI: {projeto_a_kpis['ROI']}
-            VPL: {projeto_a_kpis['VPL']}
+    O índice é montado uma vez a partir do histórico e, depois, atualizado a cada
+    análise nova (ver `analisar_e_comparar`).
 
-            **Projeto B:**
-            Análise: {projeto_b_analise}
-            ROI: {projeto_b_kpis['ROI']}
-            VPL: {projeto_b_kpis['VPL']}
+    Args:
+        diretorio (str): O diretório do histórico em disco.
+
+    Returns:
+        IndiceSetorial: O índice dos projetos analisados.
+    """
+    from src.setores import IndiceSetorial
+
+    return IndiceSetorial.do_historico(obter_historico(diretorio))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def obter_agentes(configuracao: tuple, diretorio_cache: str) -> dict:
+    """Retorna os agentes compartilhados por todas as sessões.
+
+    Mudar a configuração do LLM ou o diretório do cache descarta os agentes
+    anteriores (`max_entries=1`) e cria novos na próxima chamada.
+
+    Args:
+        configuracao (tuple): A configuração retornada por `configuracao_llm`.
+        diretorio_cache (str): O diretório do cache de análises.
+
+    Returns:
+        dict: Os pools de `ResultAnalyzerAgent` ("analise") e de
+            `ProjectComparatorAgent` ("comparacao").
+    """
+    from src.agents import PoolAgentes, ProjectComparatorAgent, ResultAnalyzerAgent
+
+    llm = obter_llm(configuracao)
+    cache = obter_cache_analises(diretorio_cache)
+    return {
+        "analise": PoolAgentes(lambda: ResultAnalyzerAgent(llm, cache)),
+        "comparacao": PoolAgentes(lambda: ProjectComparatorAgent(llm, cache)),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def simular_risco_projeto(*entradas: float) -> dict:
+    """Simula o risco de falha de um projeto, com memorização compartilhada.
+
+    A página recalcula os resultados a cada alteração de campo; a simulação só é
+    refeita quando muda um dos campos que a influenciam.
+
+    Args:
+        *entradas (float): Os valores dos campos de `CAMPOS_RISCO`, nessa ordem.
+
+    Returns:
+        dict: O resultado de `simular_risco` (semente fixa, reprodutível).
+    """
+    from src.kpis import CAMPOS_RISCO, simular_risco
+
+    return simular_risco(dict(zip(CAMPOS_RISCO, entradas)), semente=42)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def imagem_tornado(tabela: pd.DataFrame, base: float, kpi: str) -> bytes:
+    """Retorna o gráfico de tornado em PNG, memorizado pela tabela e pelo KPI."""
+    from src.sensitivity import figura_png, grafico_tornado
+
+    return figura_png(grafico_tornado(tabela, base, kpi))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def imagem_mapa_calor(
+    entradas: tuple, variacao: float, campo_x: str, campo_y: str, kpi: str
+) -> bytes:
+    """Varre dois campos do projeto (grade 100×100) e retorna o mapa de calor em PNG.
+
+    Args:
+        entradas (tuple): Os valores dos campos de `CAMPOS_KPI`, nessa ordem.
+        variacao (float): A variação relativa de cada campo (0.2 para ±20%).
+        campo_x (str): O campo do eixo horizontal.
+        campo_y (str): O campo do eixo vertical.
+        kpi (str): O KPI exibido nas cores.
+
+    Returns:
+        bytes: A imagem PNG do mapa de calor.
+    """
+    from src.kpis import CAMPOS_KPI
+    from src.sensitivity import figura_png, grade_relativa, grafico_mapa_calor, varrer
+
+    dados = dict(zip(CAMPOS_KPI, entradas))
+    varredura = varrer(
+        dados,
+        {
+            campo_x: grade_relativa(dados, campo_x, variacao, pontos=100),
+            campo_y: grade_relativa(dados, campo_y, variacao, pontos=100),
+        },
+    )
+    return figura_png(grafico_mapa_calor(varredura, campo_x, campo_y, kpi))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def exportar_tabela(tabela: pd.DataFrame, formato: str) -> bytes:
+    """Serializa a tabela em Parquet ou Arrow, memorizada pelo conteúdo.
+
+    As colunas numéricas vão direto para o Arrow, sem conversão para texto.
+
+    Args:
+        tabela (pd.DataFrame): A tabela a exportar.
+        formato (str): "parquet" ou "arrow" (o formato de arquivo IPC, ou Feather).
+
+    Returns:
+        bytes: O conteúdo do arquivo.
+    """
+    buffer = io.BytesIO()
+    if formato == "parquet":
+        tabela.to_parquet(buffer, index=False)
+    else:
+        tabela.reset_index(drop=True).to_feather(buffer)
+    return buffer.getvalue()
 
-            Onde houver o símbolo de R$ substitua por R\$ para formatação correta.
-            Destaque as vantagens e desvantagens de cada projeto, considerando os KPIs e os fatores qualitativos.
-            Recomende o melhor projeto com base na análise comparativa e justifique sua recomendação.
-            """,
-            expected_output="Uma comparação detalhada dos projetos, destacando vantagens e desvantagens, e uma recomendação clara com justificativa.",
-            agent=self.agent,
-        )
-        return self.agent.execute_task(task)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def ler_arquivo_projetos(conteudo: bytes, nome: str) -> pd.DataFrame:
+    """Lê os projetos de um arquivo CSV ou Parquet carregado, uma vez por conteúdo.
+
+    Args:
+        conteudo (bytes): O conteúdo do arquivo.
+        nome (str): O nome do arquivo (a extensão define o formato).
+
+    Returns:
+        pd.DataFrame: Um projeto por linha.
+    """
+    import pandas as pd
+
+    if nome.endswith(".parquet"):
+        return pd.read_parquet(io.BytesIO(conteudo))
+    return pd.read_csv(io.BytesIO(conteudo))
+
+
+@st.cache_resource(show_spinner=False)
+def obter_gerenciador_trabalhos() -> GerenciadorTrabalhos:
+    """Retorna o gerenciador dos trabalhos em segundo plano, compartilhado por
+    todas as sessões (pedidos idênticos simultâneos viram um único trabalho).
+
+    Returns:
+        GerenciadorTrabalhos: O gerenciador de trabalhos.
+    """
+    return GerenciadorTrabalhos()
 
 
 # --- Frontend Streamlit ---
@@ -248,7 +543,16 @@ st.set_page_config(layout="wide")
 
 # Menu lateral
 st.sidebar.title("ROI Vision: Análise Inteligente de Projetos")
-menu = st.sidebar.radio("Navegação", ["Página Inicial", "Calculadora de ROI", "Sobre"])
+menu = st.sidebar.radio(
+    "Navegação",
+    [
+        "Página Inicial",
+        "Calculadora de ROI",
+        "Ranking de Projetos",
+        "Histórico",
+        "Sobre",
+    ],
+)
 
 if menu == "Página Inicial":
     st.title("Bem-vindo ao ROI Vision! 🚀")
@@ -263,6 +567,11 @@ if menu == "Página Inicial":
     )
 
 elif menu == "Calculadora de ROI":
+    import pandas as pd  # noqa: F811 (o de TYPE_CHECKING é só para as anotações)
+
+    from src.kpis import CAMPOS_KPI, CAMPOS_RISCO, calcular_kpis, taxa_mensal
+    from src.setores import MINIMO_PROJETOS
+
     st.title("Calculadora de ROI Comparativa com IA 📊")
 
     # Criando as colunas para os dados dos projetos
@@ -285,6 +594,7 @@ elif menu == "Calculadora de ROI":
         )
         duracao_a = st.number_input(
             "Duração (meses) ⏳",
+            min_value=1,
             value=12,
             key="duracao_a",
             help="Duração estimada do projeto em meses.",
@@ -313,12 +623,22 @@ elif menu == "Calculadora de ROI":
             key="aumento_receita_a",
             help="Aumento de receita mensal esperado após a implementação do projeto.",
         )
+        unidade_taxa_a = st.radio(
+            "Unidade da taxa de desconto",
+            ["ao ano", "ao mês"],
+            horizontal=True,
+            key="unidade_taxa_a",
+            help="Os fluxos são mensais: uma taxa ao ano é convertida na taxa mensal equivalente.",
+        )
         taxa_desconto_a = st.number_input(
             "Taxa de Desconto (%) ✂️",
-            value=10.0,
+            value=12.0,
             key="taxa_desconto_a",
-            help="Taxa de desconto anual a ser utilizada no cálculo do VPL.",
+            help="Taxa de desconto utilizada no cálculo do VPL, na unidade escolhida acima.",
         )
+        if unidade_taxa_a == "ao ano":
+            taxa_desconto_a = float(taxa_mensal(taxa_desconto_a))
+            st.caption(f"Equivale a {taxa_desconto_a:.4f}% ao mês.")
         risco_falha_a = st.number_input(
             "Risco de Falha (%) ⚠️",
             value=5.0,
@@ -353,6 +673,7 @@ elif menu == "Calculadora de ROI":
         )
         duracao_b = st.number_input(
             "Duração (meses) ⏳",
+            min_value=1,
             value=18,
             key="duracao_b",
             help="Duração estimada do projeto em meses.",
@@ -381,12 +702,22 @@ elif menu == "Calculadora de ROI":
             key="aumento_receita_b",
             help="Aumento de receita mensal esperado após a implementação do projeto.",
         )
+        unidade_taxa_b = st.radio(
+            "Unidade da taxa de desconto",
+            ["ao ano", "ao mês"],
+            horizontal=True,
+            key="unidade_taxa_b",
+            help="Os fluxos são mensais: uma taxa ao ano é convertida na taxa mensal equivalente.",
+        )
         taxa_desconto_b = st.number_input(
             "Taxa de Desconto (%) ✂️",
-            value=12.0,
+            value=15.0,
             key="taxa_desconto_b",
-            help="Taxa de desconto anual a ser utilizada no cálculo do VPL.",
+            help="Taxa de desconto utilizada no cálculo do VPL, na unidade escolhida acima.",
         )
+        if unidade_taxa_b == "ao ano":
+            taxa_desconto_b = float(taxa_mensal(taxa_desconto_b))
+            st.caption(f"Equivale a {taxa_desconto_b:.4f}% ao mês.")
         risco_falha_b = st.number_input(
             "Risco de Falha (%) ⚠️",
             value=8.0,
@@ -432,137 +763,527 @@ elif menu == "Calculadora de ROI":
         "ramo_atuacao": ramo_atuacao_b,
     }
 
+    ignorar_cache = st.checkbox(
+        "Gerar novas análises (ignorar cache) 🔄",
+        help="Por padrão, análises idênticas já geradas são reaproveitadas do cache.",
+    )
+
+    # Os KPIs e a simulação de risco acompanham os campos a cada alteração (com
+    # memorização, sem carregar o CrewAI); só as análises do LLM dependem do botão
+    with medir("calculate_kpis"):
+        kpis_projeto_a = calcular_kpis(dados_projeto_a)
+    with medir("calculate_kpis"):
+        kpis_projeto_b = calcular_kpis(dados_projeto_b)
+
+    # Simular o risco de falha (semente fixa para resultados reprodutíveis)
+    with medir("simular_risco"):
+        simulacao_projeto_a = simular_risco_projeto(
+            *(dados_projeto_a[campo] for campo in CAMPOS_RISCO)
+        )
+        simulacao_projeto_b = simular_risco_projeto(
+            *(dados_projeto_b[campo] for campo in CAMPOS_RISCO)
+        )
+
+    dados = (dados_projeto_a, dados_projeto_b)
+    kpis = (kpis_projeto_a, kpis_projeto_b)
+    simulacoes = (simulacao_projeto_a, simulacao_projeto_b)
+
+    # A posição de cada projeto entre os já analisados do mesmo ramo (busca binária
+    # no índice, sem o LLM)
+    indice_setorial = obter_indice_setorial(DIRETORIO_CACHE)
+    setores = tuple(
+        indice_setorial.posicionar(dados_projeto["ramo_atuacao"], kpis_projeto)
+        for dados_projeto, kpis_projeto in zip(dados, kpis)
+    )
+
     if st.button("Analisar Projetos ✅"):
-        kpi_calculator = KPICalculatorAgent(llm)
-        result_analyzer = ResultAnalyzerAgent(llm)
-        project_comparator = ProjectComparatorAgent(llm)
-
-        # Calcular KPIs
-        kpis_projeto_a = kpi_calculator.calculate_kpis(dados_projeto_a)
-        kpis_projeto_b = kpi_calculator.calculate_kpis(dados_projeto_b)
-
-        # Analisar projetos
-        analise_resultado_a = result_analyzer.analyze_project(
-            kpis_projeto_a, dados_projeto_a
-        )
-        analise_resultado_b = result_analyzer.analyze_project(
-            kpis_projeto_b, dados_projeto_b
-        )
-
-        # Comparar projetos
-        comparacao_projetos = project_comparator.compare_projects(
-            analise_resultado_a, analise_resultado_b, kpis_projeto_a, kpis_projeto_b
-        )
-
-        # Salvar dados em DataFrame
-        data = {
-            "Projeto": ["A", "B"],
-            "Orçamento R$": [
-                f"{dados_projeto_a['orcamento']:.2f}",
-                f"{dados_projeto_b['orcamento']:.2f}",
-            ],
-            "Funcionários Impactados": [
-                dados_projeto_a["funcionarios"],
-                dados_projeto_b["funcionarios"],
-            ],
-            "Duração (meses)": [dados_projeto_a["duracao"], dados_projeto_b["duracao"]],
-            "Custo de Treinamento R$": [
-                f"{dados_projeto_a['custo_treinamento']:.2f}",
-                f"{dados_projeto_b['custo_treinamento']:.2f}",
-            ],
-            "Custo de Implementação R$": [
-                f"{dados_projeto_a['custo_implementacao']:.2f}",
-                f"{dados_projeto_b['custo_implementacao']:.2f}",
-            ],
-            "Economia de Custos R$": [
-                f"{dados_projeto_a['economia_custos']:.2f}",
-                f"{dados_projeto_b['economia_custos']:.2f}",
-            ],
-            "Aumento de Receita R$": [
-                f"{dados_projeto_a['aumento_receita']:.2f}",
-                f"{dados_projeto_b['aumento_receita']:.2f}",
-            ],
-            "Taxa de Desconto (%)": [
-                f"{dados_projeto_a['taxa_desconto']:.2f}%",
-                f"{dados_projeto_b['taxa_desconto']:.2f}%",
-            ],
-            "Risco de Falha (%)": [
-                f"{dados_projeto_a['risco_falha']:.2f}%",
-                f"{dados_projeto_b['risco_falha']:.2f}%",
-            ],
-            "Gestão de Mudança": [
-                dados_projeto_a['gestao_mudanca'],
-                dados_projeto_b['gestao_mudanca'],
-            ],
-            "Ramo": [
-                dados_projeto_a['ramo_atuacao'],
-                dados_projeto_b['ramo_atuacao'],
-            ],
-            "ROI (%)": [kpis_projeto_a["ROI"], kpis_projeto_b["ROI"]],
-            "VPL R$": [kpis_projeto_a["VPL"], kpis_projeto_b["VPL"]],
-            "Investimento Total R$": [
-                kpis_projeto_a["Investimento Total"],
-                kpis_projeto_b["Investimento Total"],
-            ],
-            "Retorno Total R$": [
-                kpis_projeto_a["Retorno Total"],
-                kpis_projeto_b["Retorno Total"],
-            ],
+        # O CrewAI só é carregado quando a análise é pedida
+        from src.agents import configuracao_llm
+
+        configuracao = configuracao_llm()
+        agentes = obter_agentes(configuracao, DIRETORIO_CACHE)
+        # As análises rodam em segundo plano: cliques repetidos ou de outras sessões
+        # com os mesmos dados acompanham o mesmo trabalho, e reexecuções da página
+        # não o interrompem
+        trabalho = obter_gerenciador_trabalhos().submeter(
+            GerenciadorTrabalhos.chave(
+                "calculadora", configuracao, dados, not ignorar_cache
+            ),
+            partial(
+                analisar_e_comparar,
+                agentes=agentes,
+                dados=dados,
+                kpis=kpis,
+                simulacoes=simulacoes,
+                setores=setores,
+                usar_cache=not ignorar_cache,
+                historico=obter_historico(DIRETORIO_CACHE),
+                indice=indice_setorial,
+                modelo=configuracao[0],
+            ),
+            reaproveitar_concluido=not ignorar_cache,
+        )
+        st.session_state["analise_calculadora"] = {
+            "dados": dados,
+            "trabalho": trabalho,
         }
-        df = pd.DataFrame(data)
 
-        # Exibir DataFrame
-        st.subheader("Dados dos Projetos e KPIs 📊")
-        st.dataframe(df)
+    # Resultados tipados (dados e KPIs numéricos); os formatos ficam na exibição
+    resultados = pd.DataFrame(
+        [{**dados_projeto_a, **kpis_projeto_a}, {**dados_projeto_b, **kpis_projeto_b}]
+    )
+    resultados.insert(0, "projeto", ["A", "B"])
+    st.subheader("Dados dos Projetos e KPIs 📊")
+    with medir("tabela_projetos"):
+        exibir_tabela(resultados, "resultados_calculadora")
+    botoes_exportacao(resultados, "resultados_projetos", "exportar_calculadora")
+
+    # Exibir resultados
+    st.header("Resultados da Análise 🔍")
+
+    # Exibir KPIs em tabelas
+    st.subheader("KPIs dos Projetos 📈")
+    col_kpi_a, col_kpi_b = st.columns(2)
+
+    with col_kpi_a:
+        st.write("Projeto A")
+        kpi_df_a = pd.DataFrame([kpis_projeto_a])
+        st.table(kpi_df_a.style.format("{:.2f}"))
+        st.latex(
+            r"""
+            ROI=\frac{Retorno - Investimento}{Investimento} \times 100
+        """
+        )
 
-        # Exibir resultados
-        st.header("Resultados da Análise 🔍")
+    with col_kpi_b:
+        st.write("Projeto B")
+        kpi_df_b = pd.DataFrame([kpis_projeto_b])
+        st.table(kpi_df_b.style.format("{:.2f}"))
+        st.latex(
+            r"""
+            VPL=\sum_{t=0}^{n} \frac{Fluxo\ de\ Caixa_t}{(1 + Taxa\ de\ Desconto)^t}
+        """
+        )
 
-        # Exibir KPIs em tabelas
-        st.subheader("KPIs dos Projetos 📈")
-        col_kpi_a, col_kpi_b = st.columns(2)
+    st.subheader("Simulação de Risco (Monte Carlo) 🎲")
+    st.table(
+        pd.DataFrame(
+            [simulacao_projeto_a, simulacao_projeto_b], index=["A", "B"]
+        ).round(2)
+    )
 
-        with col_kpi_a:
-            st.write("Projeto A")
-            kpi_df_a = pd.DataFrame([kpis_projeto_a])
-            st.table(kpi_df_a)
-            st.latex(
-                r"""
-                ROI=\frac{Retorno - Investimento}{Investimento} \times 100
-            """
+    st.subheader("Posição no Ramo de Atuação 🏭")
+    for coluna, nome, dados_projeto, setor in zip(st.columns(2), "AB", dados, setores):
+        with coluna:
+            st.write(f"Projeto {nome}")
+            if setor is None:
+                st.caption(
+                    f"Menos de {MINIMO_PROJETOS} projetos do ramo "
+                    f"{dados_projeto['ramo_atuacao']} com cada KPI no histórico."
+                )
+                continue
+            st.caption(
+                f"Entre os projetos analisados do ramo {setor['ramo']} com cada KPI "
+                "(percentil = % dos projetos com valor menor; no payback, menor é "
+                "melhor)."
+            )
+            st.table(
+                pd.DataFrame(
+                    {
+                        kpi: posicao
+                        for kpi, posicao in setor.items()
+                        if isinstance(posicao, dict)
+                    }
+                )
+                .T.rename(columns={"projetos": "Projetos", "percentil": "Percentil"})
+                .astype({"Projetos": int})
+                .round(2)
             )
 
-        with col_kpi_b:
-            st.write("Projeto B")
-            kpi_df_b = pd.DataFrame([kpis_projeto_b])
-            st.table(kpi_df_b)
-            st.latex(
-                r"""
-                VPL=\sum_{t=0}^{n} \frac{Fluxo\ de\ Caixa_t}{(1 + Taxa\ de\ Desconto)^t}
-            """
+    st.subheader("Análise de Sensibilidade 🌪️")
+    if st.toggle(
+        "E se os dados variarem?",
+        key="sensibilidade",
+        help="Mostra o efeito nos KPIs de variar os dados do projeto, sem chamar a IA.",
+    ):
+        col_projeto, col_kpi, col_variacao = st.columns(3)
+        projeto_sensibilidade = col_projeto.radio(
+            "Projeto", ["A", "B"], horizontal=True, key="sensibilidade_projeto"
+        )
+        kpi_sensibilidade = col_kpi.selectbox(
+            "KPI", ["VPL", "ROI"], key="sensibilidade_kpi"
+        )
+        variacao = col_variacao.slider(
+            "Variação dos dados (±%)", 5, 50, 20, step=5, key="sensibilidade_variacao"
+        )
+        dados_sensibilidade = (
+            dados_projeto_a if projeto_sensibilidade == "A" else dados_projeto_b
+        )
+        kpis_sensibilidade = (
+            kpis_projeto_a if projeto_sensibilidade == "A" else kpis_projeto_b
+        )
+
+        from src.sensitivity import ROTULOS_CAMPOS, tornado
+
+        with medir("sensibilidade"):
+            tabela_tornado = tornado(
+                dados_sensibilidade, variacao / 100, kpi=kpi_sensibilidade
+            )
+            st.image(
+                imagem_tornado(
+                    tabela_tornado,
+                    kpis_sensibilidade[kpi_sensibilidade],
+                    kpi_sensibilidade,
+                )
             )
 
+            # Mapa de calor: as duas variáveis de maior efeito, por padrão
+            campos = list(ROTULOS_CAMPOS)
+            col_x, col_y = st.columns(2)
+            campo_x = col_x.selectbox(
+                "Eixo horizontal",
+                campos,
+                index=campos.index(tabela_tornado.index[0]),
+                format_func=ROTULOS_CAMPOS.get,
+                key="sensibilidade_x",
+            )
+            opcoes_y = [campo for campo in campos if campo != campo_x]
+            campo_y = col_y.selectbox(
+                "Eixo vertical",
+                opcoes_y,
+                index=opcoes_y.index(
+                    next(campo for campo in tabela_tornado.index if campo != campo_x)
+                ),
+                format_func=ROTULOS_CAMPOS.get,
+                key="sensibilidade_y",
+            )
+            st.image(
+                imagem_mapa_calor(
+                    tuple(dados_sensibilidade[campo] for campo in CAMPOS_KPI),
+                    variacao / 100,
+                    campo_x,
+                    campo_y,
+                    kpi_sensibilidade,
+                )
+            )
+
+    st.subheader("Análises Anteriores Semelhantes 🕘")
+    if st.toggle(
+        "Buscar no histórico análises de projetos parecidos",
+        key="semelhantes",
+        help="Projetos do mesmo ramo de atuação com cada campo dos KPIs até 25% diferente.",
+    ):
+        from src.agents import configuracao_llm
+
+        historico = obter_historico(DIRETORIO_CACHE)
+        modelo = configuracao_llm()[0]
+        for coluna, nome, dados_projeto in zip(st.columns(2), "AB", dados):
+            with coluna:
+                st.write(f"Projeto {nome}")
+                semelhantes = historico.semelhantes(dados_projeto, modelo)
+                if semelhantes.empty:
+                    st.caption("Nenhuma análise parecida no histórico.")
+                    continue
+                st.dataframe(
+                    semelhantes[
+                        ["criado_em", "projeto", "distancia", "VPL", "ROI"]
+                    ].rename(
+                        columns={
+                            "criado_em": "Data",
+                            "projeto": "Projeto",
+                            "distancia": "Diferença média",
+                        }
+                    ),
+                    hide_index=True,
+                    use_container_width=True,
+                )
+                with st.expander("Análise mais parecida"):
+                    st.markdown(semelhantes["analise"].iloc[0])
+
+    # A última análise desta sessão continua visível; cada parte é marcada como
+    # desatualizada quando os dados de que depende mudam
+    analise = st.session_state.get("analise_calculadora")
+    if analise is not None:
+        dados_analisados_a, dados_analisados_b = analise["dados"]
+        desatualizadas = {
+            "A": dados_analisados_a != dados_projeto_a,
+            "B": dados_analisados_b != dados_projeto_b,
+        }
+        desatualizadas["comparacao"] = desatualizadas["A"] or desatualizadas["B"]
+        aviso = (
+            "⚠️ Desatualizada: os dados mudaram desde esta análise. Clique em "
+            '"Analisar Projetos" para atualizá-la.'
+        )
+
         st.subheader("Análises dos Projetos 🧐")
         col_analise_a, col_analise_b = st.columns(2)
 
         with col_analise_a:
             st.write("Projeto A")
-            st.markdown(analise_resultado_a)
+            if desatualizadas["A"]:
+                st.caption(aviso)
+            espaco_analise_a = st.empty()
 
         with col_analise_b:
             st.write("Projeto B")
-            st.markdown(analise_resultado_b)
+            if desatualizadas["B"]:
+                st.caption(aviso)
+            espaco_analise_b = st.empty()
 
-        # Exibir comparação com Markdown
         st.subheader("Comparação dos Projetos ⚖️")
-        st.markdown(comparacao_projetos)
+        if desatualizadas["comparacao"]:
+            st.caption(aviso)
+        espaco_comparacao = st.empty()
+
+        # Acompanhar as análises e a comparação, exibindo os tokens conforme chegam
+        resultado = acompanhar_trabalho(
+            analise["trabalho"],
+            {
+                "A": espaco_analise_a,
+                "B": espaco_analise_b,
+                "comparacao": espaco_comparacao,
+            },
+        )
+        relatorio = resultado and resultado["relatorio_tokens"]
+        if relatorio:
+            st.caption(
+                f"Prompt de comparação compactado: {relatorio['tokens_compacto']} "
+                f"tokens em vez de {relatorio['tokens_completo']} "
+                f"({relatorio['tokens_economizados']} tokens economizados)."
+            )
+
+elif menu == "Ranking de Projetos":
+    import pandas as pd  # noqa: F811
+
+    from src.kpis import CAMPOS_KPI, ranquear_projetos, taxa_mensal
+    from src.portfolio import otimizar_carteira
+
+    st.title("Ranking de Projetos com IA 🏆")
+    st.write(
+        "Informe quantos projetos quiser: todos são ranqueados pelos KPIs e apenas os melhores colocados são enviados para a análise comparativa da IA."
+    )
+
+    arquivo = st.file_uploader(
+        "Carregar projetos (CSV ou Parquet) 📂",
+        type=["csv", "parquet"],
+        help="Mesmas colunas do formulário da Calculadora de ROI, mais a coluna `projeto` com o nome.",
+    )
+    if arquivo is None:
+        projetos = pd.DataFrame(PROJETOS_EXEMPLO)
+    else:
+        projetos = ler_arquivo_projetos(arquivo.getvalue(), arquivo.name)
+    if len(projetos) > LIMITE_EDICAO:
+        # Carteiras grandes não são enviadas inteiras ao navegador para edição
+        st.caption(
+            f"{len(projetos)} projetos carregados. Para editá-los, altere o arquivo."
+        )
+        exibir_tabela(projetos, "projetos_carregados")
+    else:
+        projetos = st.data_editor(
+            projetos,
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config=COLUNAS,
+            key="projetos_ranking",
+        )
+    unidade_taxa = st.radio(
+        "Unidade das taxas de desconto da tabela",
+        ["ao ano", "ao mês"],
+        horizontal=True,
+        key="unidade_taxa_ranking",
+        help="Os fluxos são mensais: as taxas ao ano são convertidas nas taxas mensais equivalentes.",
+    )
+    if unidade_taxa == "ao ano":
+        projetos = projetos.assign(
+            taxa_desconto=taxa_mensal(
+                pd.to_numeric(projetos["taxa_desconto"], errors="coerce")
+            )
+        )
+
+    col_criterio, col_top_k = st.columns(2)
+    with col_criterio:
+        criterio = st.radio("Ordenar por", ["VPL", "ROI"], horizontal=True)
+    with col_top_k:
+        top_k = st.number_input(
+            "Projetos enviados para a análise da IA",
+            min_value=1,
+            max_value=20,
+            value=5,
+            help="Apenas os melhores colocados do ranking são analisados pela IA, em uma única chamada.",
+        )
+    ignorar_cache_ranking = st.checkbox(
+        "Gerar nova análise (ignorar cache) 🔄", key="ignorar_cache_ranking"
+    )
+
+    if st.button("Ranquear Projetos 🏆"):
+        ranking = ranquear_projetos(
+            projetos.dropna(subset=list(CAMPOS_KPI)).reset_index(drop=True), criterio
+        )
+        # O CrewAI só é carregado quando a análise é pedida
+        from src.agents import configuracao_llm
+
+        configuracao = configuracao_llm()
+        agentes = obter_agentes(configuracao, DIRETORIO_CACHE)
+        trabalho = obter_gerenciador_trabalhos().submeter(
+            GerenciadorTrabalhos.chave(
+                "ranking",
+                configuracao,
+                ranking.head(top_k).to_dict("records"),
+                len(ranking),
+                top_k,
+                not ignorar_cache_ranking,
+            ),
+            partial(
+                analisar_ranking,
+                agentes=agentes,
+                ranking=ranking,
+                top_k=top_k,
+                usar_cache=not ignorar_cache_ranking,
+            ),
+            reaproveitar_concluido=not ignorar_cache_ranking,
+        )
+        st.session_state["analise_ranking"] = {
+            "ranking": ranking,
+            "top_k": top_k,
+            "trabalho": trabalho,
+        }
+
+    analise = st.session_state.get("analise_ranking")
+    if analise is not None:
+        ranking = analise["ranking"]
+        st.subheader("Ranking dos Projetos 📋")
+        exibir_tabela(ranking, "ranking")
+        botoes_exportacao(ranking, "ranking_projetos", "exportar_ranking")
+
+        st.subheader(
+            f"Análise dos {min(analise['top_k'], len(ranking))} Melhores Projetos 🧐"
+        )
+        acompanhar_trabalho(analise["trabalho"], {"ranking": st.empty()})
+
+    # --- Carteira ótima ---
+    # Recalculada a cada alteração dos dados ou dos limites, sem chamar a IA
+    st.subheader("Carteira Ótima sob Orçamento 💼")
+    st.write(
+        "Seleciona os projetos que maximizam o VPL total sem ultrapassar o orçamento e, opcionalmente, o total de funcionários impactados."
+    )
+    validos = projetos.dropna(subset=list(CAMPOS_KPI)).reset_index(drop=True)
+    col_orcamento, col_funcionarios = st.columns(2)
+    with col_orcamento:
+        orcamento_maximo = st.number_input(
+            "Orçamento máximo da carteira (R$)",
+            min_value=0.0,
+            value=float(validos["orcamento"].sum() / 2),
+            step=10000.0,
+            key="orcamento_carteira",
+        )
+    with col_funcionarios:
+        funcionarios_maximo = st.number_input(
+            "Máximo de funcionários impactados (0 = sem limite)",
+            min_value=0,
+            value=0,
+            key="funcionarios_carteira",
+            disabled="funcionarios" not in validos,
+        )
+    ajustar_risco = st.toggle(
+        "Ajustar o VPL pelo risco de falha ⚠️",
+        key="carteira_ajustar_risco",
+        help="Considera que, com a probabilidade do risco de falha, o investimento é perdido.",
+        disabled="risco_falha" not in validos,
+    )
+    # Os projetos sem os campos dos limites escolhidos ficam de fora
+    usados = [
+        campo
+        for campo, usado in [
+            ("funcionarios", funcionarios_maximo > 0),
+            ("risco_falha", ajustar_risco),
+        ]
+        if usado and campo in validos
+    ]
+    validos = validos.dropna(subset=usados).reset_index(drop=True)
+    if len(validos):
+        with medir("carteira"):
+            carteira = otimizar_carteira(
+                validos,
+                orcamento_maximo,
+                funcionarios_maximo if "funcionarios" in usados else None,
+                "risco_falha" in usados,
+            )
+        selecionados = carteira[carteira["Selecionado"]]
+        col_quantidade, col_investimento, col_valor = st.columns(3)
+        col_quantidade.metric(
+            "Projetos selecionados", f"{len(selecionados)} de {len(carteira)}"
+        )
+        col_investimento.metric(
+            "Investimento total", f"R$ {selecionados['Investimento Total'].sum():,.2f}"
+        )
+        col_valor.metric(
+            "VPL ajustado total" if "risco_falha" in usados else "VPL total",
+            f"R$ {selecionados['Valor'].sum():,.2f}",
+        )
+        limite_superior = carteira.attrs["limite_superior"]
+        if limite_superior > selecionados["Valor"].sum() * (1 + 1e-9):
+            st.caption(
+                "A busca pela carteira ótima foi interrompida: o valor total ótimo é "
+                f"no máximo R$ {limite_superior:,.2f}."
+            )
+        exibir_tabela(selecionados.drop(columns="Selecionado"), "carteira")
+
+elif menu == "Histórico":
+    st.title("Histórico de Análises 🕘")
+    st.write(
+        "Todas as análises geradas pela IA ficam guardadas com os dados, os KPIs e a simulação de risco. Análises de projetos com os mesmos dados são reaproveitadas sem novas chamadas à IA."
+    )
+    historico = obter_historico(DIRETORIO_CACHE)
+
+    col_ramo, col_projeto, col_periodo = st.columns(3)
+    with col_ramo:
+        ramo = st.selectbox(
+            "Ramo de atuação",
+            ["Todos"] + historico.ramos_atuacao(),
+            key="ramo_historico",
+        )
+    with col_projeto:
+        nome_projeto = st.text_input("Projeto", key="projeto_historico")
+    with col_periodo:
+        periodo = st.date_input("Período", value=(), key="periodo_historico")
+
+    with medir("consultar_historico"):
+        tabela_historico = historico.consultar(
+            projeto=nome_projeto or None,
+            ramo_atuacao=None if ramo == "Todos" else ramo,
+            desde=(
+                datetime.combine(periodo[0], datetime.min.time()) if periodo else None
+            ),
+            ate=(
+                datetime.combine(periodo[-1], datetime.max.time()) if periodo else None
+            ),
+        )
+    if tabela_historico.empty:
+        st.info("Nenhuma análise encontrada.")
+    else:
+        st.caption(f"{len(tabela_historico)} análises encontradas.")
+        exibir_tabela(
+            tabela_historico.drop(columns=["analise", "hash_entrada"]), "historico"
+        )
+        botoes_exportacao(tabela_historico, "historico_analises", "exportar_historico")
+        rotulos = {
+            linha.id: f"#{linha.id} - {linha.projeto} ({linha.criado_em:%d/%m/%Y %H:%M})"
+            for linha in tabela_historico.itertuples()
+        }
+        escolhida = st.selectbox(
+            "Ler a análise",
+            list(rotulos),
+            format_func=rotulos.get,
+            key="analise_historico",
+        )
+        st.markdown(tabela_historico.set_index("id").loc[escolhida, "analise"])
 
 elif menu == "Sobre":
     st.title("Sobre o ROI Vision 💡")
     st.subheader("Limitações:")
     st.write("- Toda análise apresentada por este sistema é feita por IA sendo recomendado que uma equipe humana faça revisão, afim de garantir a precisão das análises.")
     st.write('- Ao usar o "ROI Vision" o usuário está ciente que ferramenta pode apresentar inconsistências, seja por suas limitações, ou também devido a complexidade dos dados informados pelo usuário.')
-    st.write("- Informamos que nenhum dado do usuário é armazenado e que apenas o nosso parceiro de IA tem acesso aos dados informados, seguindo as leis e recomendações para tratamento de dados.")
+    st.write("- Informamos que apenas o nosso parceiro de IA tem acesso aos dados informados, seguindo as leis e recomendações para tratamento de dados. As análises geradas ficam somente no servidor da aplicação: em cache, por tempo limitado, e no histórico de análises, que pode ser consultado e exportado na página 'Histórico'.")
     st.write("- Incentivamos os usuários a reportar a nossa equipe as falhas, dificuldades, críticas e sugestões, assim como nos comprometemos a avaliar cada caso e tomar as tratativas necessárias o mais rápido possível.")
     st.subheader('Equipe "BlueSky Team":')
     st.write("Idealização e Desenvolvimento: JULIO OKUDA - [LinkedIn](https://www.linkedin.com/in/juliookuda/) - [GitHub](https://github.com/Jcnok)")
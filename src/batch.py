@@ -0,0 +1,239 @@
+# Reavaliação em lote da carteira de projetos, sem navegador
+#
+# Uso:
+#   python -m src.batch projetos.csv resultados.parquet --processos 4
+#   python -m src.batch projetos.parquet resultados.csv --analisar --concorrencia 4
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.agents import (
+    KPICalculatorAgent,
+    PoolAgentes,
+    ResultAnalyzerAgent,
+    configuracao_llm,
+    criar_llm,
+)
+from src.cache import CacheAnalises
+from src.history import HistoricoAnalises
+from src.kpis import CAMPOS_KPI, calcular_kpis_lote, simular_risco, taxa_mensal
+from src.metrics import REGISTRO, medir
+from src.scheduler import PRIORIDADE_LOTE, prioridade
+from src.setores import IndiceSetorial
+
+# Extensões do formato de arquivo do Arrow (IPC, também chamado Feather)
+FORMATOS_ARROW = (".arrow", ".feather")
+
+# Campos adicionais exigidos pela análise com IA
+CAMPOS_ANALISE = ("funcionarios", "risco_falha", "gestao_mudanca", "ramo_atuacao")
+
+
+def ler_projetos(caminho: Path) -> pd.DataFrame:
+    """Lê a tabela de projetos de um arquivo CSV, Parquet ou Arrow (Feather).
+
+    Args:
+        caminho (Path): O arquivo de entrada.
+
+    Returns:
+        pd.DataFrame: Um projeto por linha, com os campos de `dados_projeto_a`.
+    """
+    if caminho.suffix.lower() == ".parquet":
+        projetos = pd.read_parquet(caminho)
+    elif caminho.suffix.lower() in FORMATOS_ARROW:
+        projetos = pd.read_feather(caminho)
+    else:
+        projetos = pd.read_csv(caminho)
+    faltando = [campo for campo in CAMPOS_KPI if campo not in projetos.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes em {caminho}: {', '.join(faltando)}")
+    return projetos
+
+
+def salvar_resultados(resultados: pd.DataFrame, caminho: Path) -> None:
+    """Grava os resultados em CSV, Parquet ou Arrow, conforme a extensão do arquivo.
+
+    Em Parquet e Arrow, os KPIs são gravados como números, sem conversão para texto.
+
+    Args:
+        resultados (pd.DataFrame): Os projetos com os KPIs (e análises) calculados.
+        caminho (Path): O arquivo de saída.
+    """
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    if caminho.suffix.lower() == ".parquet":
+        resultados.to_parquet(caminho, index=False)
+    elif caminho.suffix.lower() in FORMATOS_ARROW:
+        resultados.reset_index(drop=True).to_feather(caminho)
+    else:
+        resultados.to_csv(caminho, index=False)
+
+
+def calcular_kpis_paralelo(
+    projetos: pd.DataFrame, processos: int | None = None, tamanho_lote: int = 50_000
+) -> pd.DataFrame:
+    """Calcula os KPIs da carteira dividindo-a em lotes entre vários processos.
+
+    Args:
+        projetos (pd.DataFrame): Os dados dos projetos.
+        processos (int | None): O número de processos (padrão: número de CPUs).
+        tamanho_lote (int): O número de projetos enviados a cada processo por vez.
+
+    Returns:
+        pd.DataFrame: Os KPIs numéricos de cada projeto, na ordem da entrada.
+    """
+    colunas = projetos[list(CAMPOS_KPI)]
+    if len(colunas) <= tamanho_lote or processos == 1:
+        return calcular_kpis_lote(colunas)
+    lotes = [
+        colunas.iloc[inicio : inicio + tamanho_lote]
+        for inicio in range(0, len(colunas), tamanho_lote)
+    ]
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        return pd.concat(executor.map(calcular_kpis_lote, lotes))
+
+
+def montar_indice_setorial(
+    projetos: pd.DataFrame, kpis: pd.DataFrame
+) -> IndiceSetorial:
+    """Monta o índice por ramo de atuação com os projetos do histórico e os do lote.
+
+    Args:
+        projetos (pd.DataFrame): Os dados dos projetos do lote.
+        kpis (pd.DataFrame): Os KPIs dos projetos, de `calcular_kpis_paralelo`.
+
+    Returns:
+        IndiceSetorial: O índice, sem contar duas vezes um projeto do lote que já
+            esteja no histórico (reconhecido pelo hash das entradas).
+    """
+    indice = IndiceSetorial.do_historico(HistoricoAnalises())
+    indice.adicionar_lote(
+        kpis.reset_index(drop=True).assign(
+            ramo_atuacao=projetos["ramo_atuacao"].to_numpy(),
+            hash_entrada=[
+                HistoricoAnalises.chave_entrada(projeto)
+                for projeto in projetos.to_dict("records")
+            ],
+        )
+    )
+    return indice
+
+
+def analisar_projetos(
+    projetos: pd.DataFrame,
+    concorrencia: int = 4,
+    kpis: pd.DataFrame | None = None,
+) -> list[str]:
+    """Gera a análise com IA de cada projeto, com no máximo `concorrencia` chamadas
+    simultâneas ao LLM.
+
+    Os prompts são os mesmos da página (KPIs formatados e simulação de risco com
+    semente 42), então análises já feitas pela interface são reaproveitadas do cache.
+    As chamadas ao LLM têm prioridade de lote no agendador.
+
+    Args:
+        projetos (pd.DataFrame): Os dados dos projetos.
+        concorrencia (int): O número máximo de análises em andamento.
+        kpis (pd.DataFrame | None): Os KPIs do lote, de `calcular_kpis_paralelo`;
+            se informados, cada análise recebe a posição do projeto no seu ramo,
+            entre os projetos do histórico e os do lote.
+
+    Returns:
+        list[str]: A análise de cada projeto, na ordem da entrada.
+    """
+    faltando = [campo for campo in CAMPOS_ANALISE if campo not in projetos.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes para a análise: {', '.join(faltando)}")
+
+    indice = None if kpis is None else montar_indice_setorial(projetos, kpis)
+    llm = criar_llm(configuracao_llm())
+    cache = CacheAnalises()
+    kpi_calculator = KPICalculatorAgent(llm)
+    analisadores = PoolAgentes(lambda: ResultAnalyzerAgent(llm, cache))
+
+    def analisar(projeto: dict) -> str:
+        projeto["duracao"] = int(projeto["duracao"])
+        kpis = kpi_calculator.calculate_kpis(projeto)
+        simulacao = simular_risco(projeto, semente=42)
+        setor = indice and indice.posicionar(projeto["ramo_atuacao"], kpis)
+        with prioridade(PRIORIDADE_LOTE), analisadores.emprestar() as result_analyzer:
+            return result_analyzer.analyze_project(kpis, projeto, simulacao, setor)
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        return list(executor.map(analisar, projetos.to_dict("records")))
+
+
+def main(argumentos: list[str] | None = None) -> None:
+    """Lê a carteira, calcula os KPIs (e, opcionalmente, as análises) e grava o
+    resultado."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.batch",
+        description="Recalcula os KPIs de uma carteira de projetos (CSV, Parquet ou Arrow).",
+    )
+    parser.add_argument(
+        "entrada", type=Path, help="Arquivo CSV, Parquet ou Arrow de projetos."
+    )
+    parser.add_argument(
+        "saida", type=Path, help="Arquivo CSV, Parquet ou Arrow de resultados."
+    )
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=os.cpu_count(),
+        help="Número de processos para o cálculo dos KPIs.",
+    )
+    parser.add_argument(
+        "--tamanho-lote",
+        type=int,
+        default=50_000,
+        help="Número de projetos por lote enviado a cada processo.",
+    )
+    parser.add_argument(
+        "--taxa-anual",
+        action="store_true",
+        help="As taxas de desconto da entrada são ao ano e são convertidas nas "
+        "taxas mensais equivalentes (os fluxos são mensais).",
+    )
+    parser.add_argument(
+        "--analisar",
+        action="store_true",
+        help="Gera também a análise com IA de cada projeto.",
+    )
+    parser.add_argument(
+        "--concorrencia",
+        type=int,
+        default=4,
+        help="Número máximo de chamadas simultâneas ao LLM.",
+    )
+    parser.add_argument(
+        "--metricas",
+        type=Path,
+        help="Grava ao final as métricas de latência e tokens (formato Prometheus).",
+    )
+    args = parser.parse_args(argumentos)
+
+    projetos = ler_projetos(args.entrada)
+    if args.taxa_anual:
+        projetos["taxa_desconto"] = taxa_mensal(projetos["taxa_desconto"])
+    with medir("calcular_kpis_lote"):
+        kpis = calcular_kpis_paralelo(projetos, args.processos, args.tamanho_lote)
+    resultados = pd.concat(
+        [projetos.reset_index(drop=True), kpis.reset_index(drop=True)], axis=1
+    )
+    if args.analisar:
+        resultados["Análise"] = analisar_projetos(projetos, args.concorrencia, kpis)
+
+    salvar_resultados(resultados, args.saida)
+    if args.metricas is not None:
+        REGISTRO.salvar_prometheus(args.metricas)
+    print(
+        f"{len(resultados)} projetos processados; "
+        f"VPL positivo em {np.count_nonzero(resultados['VPL'] > 0)}. "
+        f"Resultados gravados em {args.saida}."
+    )
+
+
+if __name__ == "__main__":
+    main()
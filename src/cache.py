@@ -0,0 +1,157 @@
+# Cache persistente das respostas do LLM
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+# Diretório padrão do cache; em contêiner, deve apontar para um volume persistente
+DIRETORIO_CACHE = os.getenv("ROI_CACHE_DIR", ".cache/roi_vision")
+
+
+def normalizar_prompt(prompt: str) -> str:
+    """Remove a indentação e as linhas em branco do prompt.
+
+    Os prompts são montados com f-strings indentadas; a normalização garante que
+    mudanças apenas de formatação no código não invalidem o cache.
+
+    Args:
+        prompt (str): O prompt completo enviado ao LLM.
+
+    Returns:
+        str: O prompt normalizado.
+    """
+    return "\n".join(linha.strip() for linha in prompt.splitlines() if linha.strip())
+
+
+class CacheAnalises:
+    """Um cache em disco (SQLite) das respostas do LLM, endereçado pelo conteúdo.
+
+    A chave é o hash do prompt normalizado, do modelo e da temperatura. As entradas
+    expiram após `ttl_segundos` e, ao exceder `max_entradas` ou `max_bytes`, as
+    menos usadas recentemente são descartadas (LRU).
+    """
+
+    def __init__(
+        self,
+        diretorio: str | Path = DIRETORIO_CACHE,
+        max_entradas: int = 5_000,
+        max_bytes: int = 50 * 1024 * 1024,
+        ttl_segundos: float = 7 * 24 * 3600,
+    ):
+        """Inicializa o CacheAnalises.
+
+        Args:
+            diretorio (str | Path): O diretório onde o banco do cache é guardado.
+            max_entradas (int): O número máximo de respostas armazenadas.
+            max_bytes (int): O tamanho máximo somado das respostas, em bytes.
+            ttl_segundos (float): O tempo de validade de cada resposta.
+        """
+        self.caminho = Path(diretorio) / "analises.sqlite3"
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute(
+                """CREATE TABLE IF NOT EXISTS respostas (
+                    chave TEXT PRIMARY KEY,
+                    resposta TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL
+                )"""
+            )
+            conexao.execute(
+                "CREATE INDEX IF NOT EXISTS idx_respostas_acesso "
+                "ON respostas (acessado_em)"
+            )
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma conexão nova (segura entre threads) dentro de uma transação."""
+        with closing(sqlite3.connect(self.caminho, timeout=30)) as conexao:
+            with conexao:
+                yield conexao
+
+    @staticmethod
+    def chave(prompt: str, modelo: str, temperatura: float | None) -> str:
+        """Calcula a chave de cache de uma chamada ao LLM.
+
+        Args:
+            prompt (str): O prompt completo enviado ao LLM.
+            modelo (str): O nome do modelo.
+            temperatura (float | None): A temperatura usada na chamada.
+
+        Returns:
+            str: O hash SHA-256 (hexadecimal) da chamada normalizada.
+        """
+        conteudo = json.dumps(
+            [normalizar_prompt(prompt), modelo, temperatura], ensure_ascii=False
+        )
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def obter(self, chave: str) -> str | None:
+        """Busca uma resposta válida no cache, atualizando o seu último acesso.
+
+        Args:
+            chave (str): A chave calculada por `chave`.
+
+        Returns:
+            str | None: A resposta armazenada, ou None se ausente ou expirada.
+        """
+        agora = time.time()
+        with self._conectar() as conexao:
+            linha = conexao.execute(
+                "SELECT resposta, criado_em FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None:
+                return None
+            resposta, criado_em = linha
+            if agora - criado_em > self.ttl_segundos:
+                conexao.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                return None
+            conexao.execute(
+                "UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave)
+            )
+        return resposta
+
+    def salvar(self, chave: str, resposta: str) -> None:
+        """Armazena uma resposta e aplica os limites de tamanho do cache.
+
+        Args:
+            chave (str): A chave calculada por `chave`.
+            resposta (str): A resposta do LLM.
+        """
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?)",
+                (chave, resposta, len(resposta.encode("utf-8")), agora, agora),
+            )
+            conexao.execute(
+                "DELETE FROM respostas WHERE criado_em < ?",
+                (agora - self.ttl_segundos,),
+            )
+            conexao.execute(
+                """DELETE FROM respostas WHERE chave IN (
+                    SELECT chave FROM (
+                        SELECT
+                            chave,
+                            ROW_NUMBER() OVER (ORDER BY acessado_em DESC) AS posicao,
+                            SUM(tamanho) OVER (ORDER BY acessado_em DESC) AS acumulado
+                        FROM respostas
+                    )
+                    WHERE posicao > ? OR acumulado > ?
+                )""",
+                (self.max_entradas, self.max_bytes),
+            )
+
+    def limpar(self) -> None:
+        """Remove todas as respostas do cache."""
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM respostas")
@@ -0,0 +1,504 @@
+# Histórico persistente das análises: entradas, KPIs, textos da IA e tempos
+import hashlib
+import json
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cache import DIRETORIO_CACHE
+from src.kpis import CAMPOS_KPI
+
+# Colunas lidas por `_tabela`
+_CONSULTA = (
+    "SELECT id, criado_em, hash_entrada, modelo, dados, kpis, simulacao, analise, "
+    "duracao_segundos FROM analises"
+)
+
+
+def _normalizar(valor):
+    """Converte números (inclusive do NumPy) para float e listas recursivamente,
+    para que 100000 e 100000.0 gerem o mesmo hash."""
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, float, np.number)):
+        return float(valor)
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return [_normalizar(item) for item in valor]
+    return valor
+
+
+def _numero(valor) -> float | None:
+    """Converte um KPI (número ou texto formatado) para float; None se não houver."""
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(numero) else numero
+
+
+def _instante(data: datetime | float | None) -> float | None:
+    """Converte uma data para o instante Unix usado nas consultas."""
+    return data.timestamp() if isinstance(data, datetime) else data
+
+
+def _normalizar_dict(dados: dict) -> dict:
+    """Aplica `_normalizar` aos valores de um dicionário (para o JSON)."""
+    return {campo: _normalizar(valor) for campo, valor in dados.items()}
+
+
+def _tabela(linhas: list[tuple]) -> pd.DataFrame:
+    """Monta a tabela de `consultar`, expandindo as colunas JSON."""
+    registros = [
+        {
+            "id": id_,
+            "criado_em": criado_em,
+            "hash_entrada": hash_entrada,
+            "modelo": modelo,
+            **json.loads(dados),
+            **json.loads(kpis),
+            **(json.loads(simulacao) if simulacao else {}),
+            "analise": analise,
+            "duracao_segundos": duracao_segundos,
+        }
+        for (
+            id_,
+            criado_em,
+            hash_entrada,
+            modelo,
+            dados,
+            kpis,
+            simulacao,
+            analise,
+            duracao_segundos,
+        ) in linhas
+    ]
+    colunas = ["id", "criado_em", "hash_entrada", "modelo"]
+    tabela = pd.DataFrame(registros, columns=None if registros else colunas)
+    tabela["criado_em"] = pd.to_datetime(tabela["criado_em"], unit="s")
+    return tabela
+
+
+class HistoricoAnalises:
+    """Um histórico em disco (SQLite) das análises e comparações geradas pela IA.
+
+    Ao contrário do `CacheAnalises`, que guarda respostas pelo prompt e as descarta
+    após o TTL, o histórico guarda cada análise com as entradas, os KPIs, a
+    simulação de risco e o tempo de geração, sem apagar nada. Só o reaproveitamento
+    dos textos é limitado: a busca exige a mesma versão dos prompts (a assinatura
+    calculada pelos agentes) e ignora as entradas com mais de `ttl_segundos`. As
+    consultas usam os índices por hash das entradas, ramo de atuação, projeto e
+    data.
+    """
+
+    def __init__(
+        self,
+        diretorio: str | Path = DIRETORIO_CACHE,
+        ttl_segundos: float = 7 * 24 * 3600,
+    ):
+        """Inicializa o HistoricoAnalises.
+
+        Args:
+            diretorio (str | Path): O diretório onde o banco do histórico é guardado.
+            ttl_segundos (float): A idade máxima de uma análise ou comparação para
+                ser reaproveitada.
+        """
+        self.ttl_segundos = ttl_segundos
+        self.caminho = Path(diretorio) / "historico.sqlite3"
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        campos = ",\n".join(f"{campo} REAL" for campo in CAMPOS_KPI)
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute(
+                f"""CREATE TABLE IF NOT EXISTS analises (
+                    id INTEGER PRIMARY KEY,
+                    hash_entrada TEXT NOT NULL,
+                    modelo TEXT NOT NULL,
+                    projeto TEXT,
+                    ramo_atuacao TEXT,
+                    criado_em REAL NOT NULL,
+                    {campos},
+                    dados TEXT NOT NULL,
+                    kpis TEXT NOT NULL,
+                    simulacao TEXT,
+                    analise TEXT NOT NULL,
+                    duracao_segundos REAL,
+                    versao TEXT
+                )"""
+            )
+            conexao.execute(
+                """CREATE TABLE IF NOT EXISTS comparacoes (
+                    id INTEGER PRIMARY KEY,
+                    hash_a TEXT NOT NULL,
+                    hash_b TEXT NOT NULL,
+                    modelo TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    comparacao TEXT NOT NULL,
+                    duracao_segundos REAL,
+                    versao TEXT
+                )"""
+            )
+            # Bancos criados antes da coluna da versão
+            for tabela in ("analises", "comparacoes"):
+                colunas = {
+                    linha[1]
+                    for linha in conexao.execute(f"PRAGMA table_info({tabela})")
+                }
+                if "versao" not in colunas:
+                    conexao.execute(f"ALTER TABLE {tabela} ADD COLUMN versao TEXT")
+            for indice in (
+                "idx_analises_hash ON analises (hash_entrada, modelo, criado_em)",
+                "idx_analises_ramo ON analises (ramo_atuacao, criado_em)",
+                "idx_analises_projeto ON analises (projeto, criado_em)",
+                "idx_analises_data ON analises (criado_em)",
+                "idx_comparacoes_hash ON comparacoes (hash_a, hash_b, modelo, "
+                "criado_em)",
+            ):
+                conexao.execute(f"CREATE INDEX IF NOT EXISTS {indice}")
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma conexão nova (segura entre threads) dentro de uma transação."""
+        with closing(sqlite3.connect(self.caminho, timeout=30)) as conexao:
+            with conexao:
+                yield conexao
+
+    @staticmethod
+    def chave_entrada(dados: dict) -> str:
+        """Calcula o hash das entradas de um projeto.
+
+        O nome do projeto não faz parte do hash: o mesmo projeto com outro nome é
+        reconhecido como repetido.
+
+        Args:
+            dados (dict): Os dados do projeto.
+
+        Returns:
+            str: O hash SHA-256 (hexadecimal) das entradas normalizadas.
+        """
+        entradas = {
+            campo: _normalizar(valor)
+            for campo, valor in dados.items()
+            if campo != "projeto"
+        }
+        conteudo = json.dumps(entradas, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def registrar_analise(
+        self,
+        dados: dict,
+        kpis: dict,
+        analise: str,
+        modelo: str,
+        simulacao: dict | None = None,
+        duracao_segundos: float | None = None,
+        versao: str | None = None,
+    ) -> int:
+        """Guarda a análise de um projeto.
+
+        Args:
+            dados (dict): Os dados do projeto (com "projeto", o nome, se houver).
+            kpis (dict): Os KPIs calculados.
+            analise (str): O texto da análise.
+            modelo (str): O modelo de linguagem que gerou a análise.
+            simulacao (dict | None): O resultado de `simular_risco`, se houver.
+            duracao_segundos (float | None): O tempo de geração da análise.
+            versao (str | None): A assinatura dos prompts que geraram a análise.
+
+        Returns:
+            int: O identificador da análise no histórico.
+        """
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                f"""INSERT INTO analises (
+                    hash_entrada, modelo, projeto, ramo_atuacao, criado_em,
+                    {", ".join(CAMPOS_KPI)},
+                    dados, kpis, simulacao, analise, duracao_segundos, versao
+                ) VALUES ({", ".join("?" * (len(CAMPOS_KPI) + 11))})""",
+                (
+                    self.chave_entrada(dados),
+                    modelo,
+                    dados.get("projeto"),
+                    dados.get("ramo_atuacao"),
+                    time.time(),
+                    *(_numero(dados.get(campo)) for campo in CAMPOS_KPI),
+                    json.dumps(_normalizar_dict(dados), ensure_ascii=False),
+                    json.dumps(
+                        {nome: _numero(valor) for nome, valor in kpis.items()},
+                        ensure_ascii=False,
+                    ),
+                    (
+                        None
+                        if simulacao is None
+                        else json.dumps(_normalizar_dict(simulacao))
+                    ),
+                    analise,
+                    duracao_segundos,
+                    versao,
+                ),
+            )
+            return cursor.lastrowid
+
+    def registrar_comparacao(
+        self,
+        dados_a: dict,
+        dados_b: dict,
+        comparacao: str,
+        modelo: str,
+        duracao_segundos: float | None = None,
+        versao: str | None = None,
+    ) -> int:
+        """Guarda a comparação de dois projetos.
+
+        Args:
+            dados_a (dict): Os dados do projeto A.
+            dados_b (dict): Os dados do projeto B.
+            comparacao (str): O texto da comparação.
+            modelo (str): O modelo de linguagem que gerou a comparação.
+            duracao_segundos (float | None): O tempo de geração da comparação.
+            versao (str | None): A assinatura do prompt que gerou a comparação.
+
+        Returns:
+            int: O identificador da comparação no histórico.
+        """
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "INSERT INTO comparacoes (hash_a, hash_b, modelo, criado_em, "
+                "comparacao, duracao_segundos, versao) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.chave_entrada(dados_a),
+                    self.chave_entrada(dados_b),
+                    modelo,
+                    time.time(),
+                    comparacao,
+                    duracao_segundos,
+                    versao,
+                ),
+            )
+            return cursor.lastrowid
+
+    def buscar_analise(
+        self, dados: dict, modelo: str, versao: str | None = None
+    ) -> str | None:
+        """Busca a análise mais recente de um projeto com as mesmas entradas.
+
+        Args:
+            dados (dict): Os dados do projeto.
+            modelo (str): O modelo de linguagem da análise.
+            versao (str | None): A assinatura dos prompts da análise.
+
+        Returns:
+            str | None: O texto da análise, ou None se o projeto não foi analisado
+                com a mesma versão dentro de `ttl_segundos`.
+        """
+        with self._conectar() as conexao:
+            linha = conexao.execute(
+                "SELECT analise FROM analises WHERE hash_entrada = ? AND modelo = ? "
+                "AND versao IS ? AND criado_em >= ? ORDER BY criado_em DESC LIMIT 1",
+                (
+                    self.chave_entrada(dados),
+                    modelo,
+                    versao,
+                    time.time() - self.ttl_segundos,
+                ),
+            ).fetchone()
+        return None if linha is None else linha[0]
+
+    def buscar_comparacao(
+        self, dados_a: dict, dados_b: dict, modelo: str, versao: str | None = None
+    ) -> str | None:
+        """Busca a comparação mais recente de dois projetos, na mesma ordem.
+
+        Args:
+            dados_a (dict): Os dados do projeto A.
+            dados_b (dict): Os dados do projeto B.
+            modelo (str): O modelo de linguagem da comparação.
+            versao (str | None): A assinatura do prompt da comparação.
+
+        Returns:
+            str | None: O texto da comparação, ou None se não houver uma com a mesma
+                versão dentro de `ttl_segundos`.
+        """
+        with self._conectar() as conexao:
+            linha = conexao.execute(
+                "SELECT comparacao FROM comparacoes "
+                "WHERE hash_a = ? AND hash_b = ? AND modelo = ? AND versao IS ? "
+                "AND criado_em >= ? ORDER BY criado_em DESC LIMIT 1",
+                (
+                    self.chave_entrada(dados_a),
+                    self.chave_entrada(dados_b),
+                    modelo,
+                    versao,
+                    time.time() - self.ttl_segundos,
+                ),
+            ).fetchone()
+        return None if linha is None else linha[0]
+
+    def ramos_atuacao(self) -> list[str]:
+        """Lista os ramos de atuação com análises guardadas, em ordem alfabética."""
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT DISTINCT ramo_atuacao FROM analises "
+                "WHERE ramo_atuacao IS NOT NULL ORDER BY ramo_atuacao"
+            ).fetchall()
+        return [ramo for (ramo,) in linhas]
+
+    def kpis_por_ramo(self) -> pd.DataFrame:
+        """Lista os KPIs de cada projeto analisado, para o índice por ramo.
+
+        Returns:
+            pd.DataFrame: Uma linha por entrada distinta (a análise mais recente),
+                com "hash_entrada", "ramo_atuacao", "ROI", "VPL" e "Payback".
+        """
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT hash_entrada, ramo_atuacao, kpis FROM analises "
+                "WHERE id IN (SELECT MAX(id) FROM analises GROUP BY hash_entrada)"
+            ).fetchall()
+        registros = []
+        for hash_entrada, ramo_atuacao, kpis in linhas:
+            kpis = json.loads(kpis)
+            registros.append(
+                {
+                    "hash_entrada": hash_entrada,
+                    "ramo_atuacao": ramo_atuacao,
+                    **{kpi: kpis.get(kpi) for kpi in ("ROI", "VPL", "Payback")},
+                }
+            )
+        colunas = ["hash_entrada", "ramo_atuacao", "ROI", "VPL", "Payback"]
+        return pd.DataFrame(registros, columns=colunas).astype(
+            {"ROI": float, "VPL": float, "Payback": float}
+        )
+
+    def consultar(
+        self,
+        projeto: str | None = None,
+        ramo_atuacao: str | None = None,
+        desde: datetime | float | None = None,
+        ate: datetime | float | None = None,
+        limite: int | None = None,
+    ) -> pd.DataFrame:
+        """Lista as análises guardadas, da mais recente para a mais antiga.
+
+        Args:
+            projeto (str | None): Apenas as análises do projeto com este nome.
+            ramo_atuacao (str | None): Apenas as análises deste ramo de atuação.
+            desde (datetime | float | None): Apenas as análises a partir desta data.
+            ate (datetime | float | None): Apenas as análises até esta data.
+            limite (int | None): O número máximo de análises.
+
+        Returns:
+            pd.DataFrame: Uma linha por análise, com "id", "criado_em",
+                "hash_entrada", "modelo", os dados do projeto, os KPIs, a
+                simulação de risco, "analise" e "duracao_segundos".
+        """
+        condicoes, parametros = [], []
+        for condicao, valor in (
+            ("projeto = ?", projeto),
+            ("ramo_atuacao = ?", ramo_atuacao),
+            ("criado_em >= ?", _instante(desde)),
+            ("criado_em <= ?", _instante(ate)),
+        ):
+            if valor is not None:
+                condicoes.append(condicao)
+                parametros.append(valor)
+        consulta = _CONSULTA
+        if condicoes:
+            consulta += " WHERE " + " AND ".join(condicoes)
+        consulta += " ORDER BY criado_em DESC"
+        if limite is not None:
+            consulta += " LIMIT ?"
+            parametros.append(limite)
+        with self._conectar() as conexao:
+            linhas = conexao.execute(consulta, parametros).fetchall()
+        return _tabela(linhas)
+
+    def semelhantes(
+        self,
+        dados: dict,
+        modelo: str | None = None,
+        limite: int = 5,
+        tolerancia: float = 0.25,
+    ) -> pd.DataFrame:
+        """Busca as análises de projetos do mesmo ramo com entradas parecidas.
+
+        São parecidos os projetos em que cada campo de `CAMPOS_KPI` difere no
+        máximo `tolerancia` (relativa ao maior dos dois valores) do projeto de
+        referência; o filtro é feito pelo SQLite, a partir do índice do ramo de
+        atuação. Os parecidos são ordenados pela diferença relativa média (0 para
+        entradas iguais) e, de cada entrada repetida, fica só a análise mais recente.
+
+        Args:
+            dados (dict): Os dados do projeto de referência.
+            modelo (str | None): Apenas as análises deste modelo de linguagem.
+            limite (int): O número máximo de análises.
+            tolerancia (float): A diferença relativa máxima de cada campo (0.25
+                para 25%).
+
+        Returns:
+            pd.DataFrame: As colunas de `consultar` e a "distancia", da mais
+                parecida para a menos parecida.
+        """
+        referencia = np.array([float(dados[campo]) for campo in CAMPOS_KPI])
+        condicoes, parametros = ["ramo_atuacao IS ?"], [dados.get("ramo_atuacao")]
+        for campo, valor in zip(CAMPOS_KPI, referencia):
+            extremos = sorted([valor * (1 - tolerancia), valor / (1 - tolerancia)])
+            condicoes.append(f"{campo} BETWEEN ? AND ?")
+            parametros.extend(extremos)
+        if modelo is not None:
+            condicoes.append("modelo = ?")
+            parametros.append(modelo)
+        with self._conectar() as conexao:
+            candidatos = conexao.execute(
+                f"SELECT id, hash_entrada, {', '.join(CAMPOS_KPI)} FROM analises "
+                f"WHERE {' AND '.join(condicoes)} ORDER BY criado_em DESC",
+                parametros,
+            ).fetchall()
+            # Só a análise mais recente de cada entrada
+            candidatos = list(
+                {linha[1]: linha for linha in reversed(candidatos)}.values()
+            )
+            if not candidatos:
+                return _tabela([]).assign(distancia=pd.Series(dtype=float))
+
+            valores = np.array([linha[2:] for linha in candidatos], dtype=float)
+            escala = np.maximum(np.abs(valores), np.abs(referencia))
+            with np.errstate(invalid="ignore"):
+                diferenca = np.where(
+                    escala > 0, np.abs(valores - referencia) / escala, 0.0
+                )
+            distancia = diferenca.mean(axis=1)
+            ordem = np.argsort(distancia, kind="stable")[:limite]
+            ids = [candidatos[i][0] for i in ordem]
+            linhas = conexao.execute(
+                f"{_CONSULTA} WHERE id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+        tabela = _tabela(linhas).set_index("id").loc[ids].reset_index()
+        tabela["distancia"] = distancia[ordem]
+        return tabela
+
+    def exportar_parquet(self, caminho: str | Path, **filtros) -> int:
+        """Grava as análises em Parquet, para análises em lote (pandas, DuckDB...).
+
+        Args:
+            caminho (str | Path): O arquivo Parquet de saída.
+            **filtros: Os filtros de `consultar`.
+
+        Returns:
+            int: O número de análises gravadas.
+        """
+        tabela = self.consultar(**filtros)
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        tabela.to_parquet(caminho, index=False)
+        return len(tabela)
+
+    def limpar(self) -> None:
+        """Remove todas as análises e comparações do histórico."""
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM analises")
+            conexao.execute("DELETE FROM comparacoes")
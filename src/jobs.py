@@ -0,0 +1,214 @@
+# Trabalhos em segundo plano para as análises, com deduplicação por entrada
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from src.metrics import REGISTRO, RegistroMetricas
+
+# Estados de um trabalho
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+
+class Trabalho:
+    """Uma análise em segundo plano, com os textos transmitidos por parte.
+
+    O trabalho continua mesmo que a página que o submeteu seja reexecutada ou
+    fechada; qualquer sessão com o trabalho pode acompanhar o andamento com
+    `aguardar`.
+    """
+
+    def __init__(self, chave: str):
+        """Inicializa o Trabalho.
+
+        Args:
+            chave (str): O hash das entradas do trabalho.
+        """
+        self.chave = chave
+        self.estado = PENDENTE
+        self.textos: dict[str, str] = {}
+        self.resultado: dict | None = None
+        self.erro: str | None = None
+        self.criado_em = time.time()
+        self.concluido_em: float | None = None
+        self._condicao = threading.Condition()
+        self._versao = 0
+
+    @property
+    def concluido(self) -> bool:
+        """Se o trabalho terminou, com sucesso ou erro."""
+        return self.estado in (CONCLUIDO, ERRO)
+
+    def _atualizar(self, **campos) -> None:
+        """Altera o trabalho, na ordem dos campos, e avisa quem o acompanha.
+
+        `GerenciadorTrabalhos.submeter` lê o estado sem a condição: ao concluir, o
+        "concluido_em" deve vir antes do "estado".
+        """
+        with self._condicao:
+            for nome, valor in campos.items():
+                setattr(self, nome, valor)
+            self._versao += 1
+            self._condicao.notify_all()
+
+    def receptor(self, parte: str) -> Callable[[str], None]:
+        """Retorna a função que acrescenta os tokens transmitidos a uma parte.
+
+        Args:
+            parte (str): O nome da parte (ex.: "A", "B", "comparacao").
+
+        Returns:
+            Callable[[str], None]: A função a passar como `ao_receber_token`.
+        """
+
+        def receber(token: str) -> None:
+            with self._condicao:
+                self.textos[parte] = self.textos.get(parte, "") + token
+                self._versao += 1
+                self._condicao.notify_all()
+
+        return receber
+
+    def aguardar(self, versao: int = -1, timeout: float | None = None) -> dict:
+        """Espera uma alteração posterior a `versao` (ou o fim) e retorna o estado.
+
+        Args:
+            versao (int): A última versão já vista; -1 retorna imediatamente.
+            timeout (float | None): A espera máxima, em segundos.
+
+        Returns:
+            dict: Uma cópia de "versao", "estado", "textos", "resultado" e "erro".
+        """
+        with self._condicao:
+            self._condicao.wait_for(
+                lambda: self._versao != versao or self.concluido, timeout
+            )
+            return {
+                "versao": self._versao,
+                "estado": self.estado,
+                "textos": dict(self.textos),
+                "resultado": self.resultado,
+                "erro": self.erro,
+            }
+
+
+class GerenciadorTrabalhos:
+    """Executa trabalhos em segundo plano, um por chave ("single-flight").
+
+    Pedidos com a mesma chave enquanto o trabalho está em andamento recebem o mesmo
+    `Trabalho`; trabalhos concluídos são reaproveitados por `retencao_segundos`
+    (se o pedido permitir), e trabalhos com erro são refeitos.
+    """
+
+    def __init__(
+        self,
+        max_simultaneos: int = 8,
+        retencao_segundos: float = 600,
+        registro: RegistroMetricas = REGISTRO,
+    ):
+        """Inicializa o GerenciadorTrabalhos.
+
+        Args:
+            max_simultaneos (int): O número máximo de trabalhos em execução; os
+                demais aguardam como pendentes.
+            retencao_segundos (float): Por quanto tempo um trabalho concluído é
+                mantido para novos pedidos.
+            registro (RegistroMetricas): Onde contar os trabalhos submetidos.
+        """
+        self.retencao_segundos = retencao_segundos
+        self.registro = registro
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_simultaneos, thread_name_prefix="trabalho"
+        )
+        self._trava = threading.Lock()
+        self._trabalhos: dict[str, Trabalho] = {}
+
+    @staticmethod
+    def chave(*entradas) -> str:
+        """Calcula a chave de um trabalho a partir das suas entradas.
+
+        Args:
+            *entradas: Valores serializáveis em JSON (dicionários, números, textos).
+
+        Returns:
+            str: O hash SHA-256 (hexadecimal) das entradas.
+        """
+        conteudo = json.dumps(entradas, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def submeter(
+        self,
+        chave: str,
+        funcao: Callable[[Trabalho], dict],
+        reaproveitar_concluido: bool = True,
+    ) -> Trabalho:
+        """Submete um trabalho, ou retorna o existente com a mesma chave.
+
+        Args:
+            chave (str): A chave calculada por `chave`.
+            funcao (Callable[[Trabalho], dict]): Executa o trabalho, transmitindo
+                os textos por `Trabalho.receptor`, e retorna o resultado.
+            reaproveitar_concluido (bool): Se False, um trabalho já concluído com a
+                mesma chave é refeito (um em andamento continua sendo reaproveitado).
+
+        Returns:
+            Trabalho: O trabalho novo ou o existente.
+        """
+        agora = time.time()
+        with self._trava:
+            for antiga, trabalho in list(self._trabalhos.items()):
+                if (
+                    trabalho.concluido
+                    and trabalho.concluido_em is not None
+                    and agora - trabalho.concluido_em > self.retencao_segundos
+                ):
+                    del self._trabalhos[antiga]
+
+            existente = self._trabalhos.get(chave)
+            if existente is not None and existente.estado != ERRO:
+                if not existente.concluido:
+                    self._contar("anexado")
+                    return existente
+                if reaproveitar_concluido:
+                    self._contar("reaproveitado")
+                    return existente
+
+            trabalho = Trabalho(chave)
+            self._trabalhos[chave] = trabalho
+        self._contar("novo")
+        self._executor.submit(self._executar, trabalho, funcao)
+        return trabalho
+
+    def obter(self, chave: str) -> Trabalho | None:
+        """Retorna o trabalho com a chave, se ainda estiver mantido."""
+        with self._trava:
+            return self._trabalhos.get(chave)
+
+    def _contar(self, resultado: str) -> None:
+        self.registro.incrementar(
+            "roi_vision_trabalhos_total",
+            descricao="Pedidos de análise: trabalhos novos, anexados a um em "
+            "andamento ou reaproveitados de um concluído.",
+            resultado=resultado,
+        )
+
+    @staticmethod
+    def _executar(trabalho: Trabalho, funcao: Callable[[Trabalho], dict]) -> None:
+        trabalho._atualizar(estado=EXECUTANDO)
+        try:
+            resultado = funcao(trabalho)
+        except Exception as erro:
+            trabalho._atualizar(
+                concluido_em=time.time(),
+                erro=f"{type(erro).__name__}: {erro}",
+                estado=ERRO,
+            )
+        else:
+            trabalho._atualizar(
+                concluido_em=time.time(), resultado=resultado, estado=CONCLUIDO
+            )
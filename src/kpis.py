@@ -0,0 +1,742 @@
+# Funções de cálculo dos KPIs financeiros, sem dependência do Streamlit
+from collections.abc import Callable
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+def calcular_roi(investimento: float, retorno: float) -> float:
+    """Calcula o Retorno sobre o Investimento (ROI).
+
+    Args:
+        investimento (float): O valor do investimento.
+        retorno (float): O valor do retorno.
+
+    Returns:
+        float: O valor do ROI em porcentagem.
+    """
+    if investimento == 0:
+        return np.inf
+    return ((retorno - investimento) / investimento) * 100
+
+
+def calcular_vpl(taxa_desconto: float | tuple | list, fluxos_caixa: list) -> float:
+    """Calcula o Valor Presente Líquido (VPL).
+
+    O VPL é o produto escalar dos fluxos com a tabela de `fatores_desconto`,
+    compartilhada entre as chamadas com a mesma taxa e o mesmo horizonte.
+
+    Args:
+        taxa_desconto (float | tuple | list): A taxa de desconto por período (a dos
+            fluxos, mensal nos KPIs) em porcentagem, ou uma curva com uma taxa por
+            período (ver `fatores_desconto`).
+        fluxos_caixa (list): Uma lista dos fluxos de caixa do projeto.
+
+    Returns:
+        float: O valor do VPL (zero sem fluxos).
+    """
+    fluxos = np.asarray(fluxos_caixa, dtype=float)
+    if not len(fluxos):
+        return 0.0
+    if np.ndim(taxa_desconto):
+        # A tabela é memorizada pela curva: a chave precisa ser imutável
+        taxa_desconto = tuple(np.asarray(taxa_desconto, dtype=float).tolist())
+    return float(fluxos @ fatores_desconto(taxa_desconto, len(fluxos) - 1))
+
+
+# --- Taxas e fatores de desconto ---
+# Os fluxos dos KPIs são mensais e a taxa de desconto é aplicada por mês. Taxas
+# anuais devem ser convertidas explicitamente com `taxa_mensal`.
+def taxa_mensal(taxa_anual) -> np.ndarray:
+    """Converte uma taxa anual na taxa mensal equivalente (juros compostos).
+
+    Args:
+        taxa_anual (float | np.ndarray): A taxa ao ano em porcentagem.
+
+    Returns:
+        np.ndarray: A taxa ao mês em porcentagem (ex.: 12% ao ano ≈ 0,949% ao mês).
+    """
+    return ((1 + np.asarray(taxa_anual, dtype=float) / 100) ** (1 / 12) - 1) * 100
+
+
+def taxa_anual(taxa_mensal) -> np.ndarray:
+    """Converte uma taxa mensal na taxa anual equivalente (juros compostos).
+
+    Args:
+        taxa_mensal (float | np.ndarray): A taxa ao mês em porcentagem.
+
+    Returns:
+        np.ndarray: A taxa ao ano em porcentagem (ex.: 1% ao mês ≈ 12,68% ao ano).
+    """
+    return ((1 + np.asarray(taxa_mensal, dtype=float) / 100) ** 12 - 1) * 100
+
+
+@lru_cache(maxsize=256)
+def fatores_desconto(taxa_desconto: float | tuple, periodos: int) -> np.ndarray:
+    """Calcula, com memorização, os fatores de desconto dos períodos 0 a `periodos`.
+
+    Com uma taxa constante, o fator do período i é (1 + taxa) ** -i. Com uma curva
+    (estrutura a termo), cada período tem a sua taxa: o fator do período i é o
+    produto de 1 / (1 + taxa_k) para k de 1 a i; as taxas além de `periodos` são
+    ignoradas. A tabela é somente leitura, pois é compartilhada entre os projetos,
+    os lotes e as varreduras que usam a mesma taxa.
+
+    Args:
+        taxa_desconto (float | tuple): A taxa por período em porcentagem, ou uma
+            tupla com a taxa de cada período a partir do período 1.
+        periodos (int): O último período da tabela.
+
+    Returns:
+        np.ndarray: Os `periodos + 1` fatores de desconto, a partir do período zero.
+
+    Raises:
+        ValueError: Se `periodos` for negativo ou a curva tiver menos taxas que
+            `periodos`.
+    """
+    if periodos < 0:
+        raise ValueError(f"O número de períodos não pode ser negativo: {periodos}.")
+    if isinstance(taxa_desconto, tuple) and len(taxa_desconto) < periodos:
+        raise ValueError(
+            f"A curva tem {len(taxa_desconto)} taxas, mas são necessárias "
+            f"{periodos} (uma por período)."
+        )
+    if isinstance(taxa_desconto, tuple):
+        taxas = np.asarray(taxa_desconto, dtype=float)[:periodos] / 100
+        fatores = np.concatenate([[1.0], np.cumprod(1 / (1 + taxas))])
+    else:
+        fatores = (1 + taxa_desconto / 100) ** -np.arange(periodos + 1.0)
+    fatores.flags.writeable = False
+    return fatores
+
+
+# Campos de `dados_projeto_a` que influenciam os KPIs financeiros
+CAMPOS_KPI = (
+    "orcamento",
+    "duracao",
+    "custo_treinamento",
+    "custo_implementacao",
+    "economia_custos",
+    "aumento_receita",
+    "taxa_desconto",
+)
+
+
+# Campos que influenciam a simulação de risco (os dos KPIs e o risco de falha)
+CAMPOS_RISCO = CAMPOS_KPI + ("risco_falha",)
+
+
+# --- KPIs de um projeto, memorizados pelas entradas de cada um ---
+# A página recalcula os KPIs a cada alteração de campo: cada KPI só é refeito quando
+# uma das entradas de que depende muda (ex.: alterar a taxa refaz apenas o VPL).
+@lru_cache(maxsize=1024)
+def investimento_total(
+    orcamento: float, custo_treinamento: float, custo_implementacao: float
+) -> float:
+    """Calcula o investimento total: orçamento e custos de treinamento e implementação."""
+    return orcamento + custo_treinamento + custo_implementacao
+
+
+@lru_cache(maxsize=1024)
+def retorno_total(
+    economia_custos: float, aumento_receita: float, duracao: int
+) -> float:
+    """Calcula o retorno total: economia e aumento de receita mensais na duração."""
+    return (economia_custos * duracao) + (aumento_receita * duracao)
+
+
+@lru_cache(maxsize=1024)
+def roi_projeto(investimento: float, retorno: float) -> float:
+    """Versão memorizada de `calcular_roi`."""
+    return calcular_roi(investimento, retorno)
+
+
+@lru_cache(maxsize=1024)
+def vpl_projeto(
+    taxa_desconto: float, investimento: float, fluxo_mensal: float, duracao: int
+) -> float:
+    """Calcula, com memorização, o VPL de um investimento seguido de um fluxo mensal
+    constante.
+
+    Args:
+        taxa_desconto (float): A taxa de desconto por período em porcentagem.
+        investimento (float): O investimento total, no período zero.
+        fluxo_mensal (float): A economia mais o aumento de receita mensais.
+        duracao (int): O número de meses com fluxo de caixa.
+
+    Returns:
+        float: O valor do VPL, igual ao de `calcular_vpl`.
+    """
+    return calcular_vpl(taxa_desconto, [-investimento] + [fluxo_mensal] * duracao)
+
+
+@lru_cache(maxsize=1024)
+def payback_projeto(investimento: float, fluxo_mensal: float, duracao: int) -> float:
+    """Versão memorizada de `calcular_payback` para um fluxo mensal constante."""
+    return float(
+        calcular_payback(fluxos_constantes(investimento, fluxo_mensal, duracao))
+    )
+
+
+@lru_cache(maxsize=1024)
+def tir_projeto(investimento: float, fluxo_mensal: float, duracao: int) -> float:
+    """Versão memorizada de `calcular_tir` para um fluxo mensal constante."""
+    return float(calcular_tir(fluxos_constantes(investimento, fluxo_mensal, duracao)))
+
+
+def calcular_kpis(data: dict) -> dict:
+    """Calcula os KPIs financeiros de um projeto, cada um com a sua memorização.
+
+    Se `data` tiver "fluxos_caixa" (os fluxos líquidos de cada mês, como uma
+    lista ou array), eles substituem a economia e o aumento de receita
+    constantes, e a duração passa a ser o número de meses informados.
+
+    Args:
+        data (dict): Um dicionário contendo os dados do projeto.
+
+    Returns:
+        dict: Os KPIs calculados, como float (a formatação fica para quem os
+            exibe): "ROI" e "TIR" em %, "Payback" em meses (NaN se não houver)
+            e os demais em R$.
+    """
+    orcamento = data["orcamento"]
+    duracao = data["duracao"]
+    custo_treinamento = data["custo_treinamento"]
+    custo_implementacao = data["custo_implementacao"]
+    economia_custos = data["economia_custos"]
+    aumento_receita = data["aumento_receita"]
+    taxa_desconto = data["taxa_desconto"]
+
+    investimento = investimento_total(orcamento, custo_treinamento, custo_implementacao)
+    retorno = retorno_total(economia_custos, aumento_receita, duracao)
+
+    fluxo_mensal = economia_custos + aumento_receita
+
+    if data.get("fluxos_caixa") is not None:
+        kpis = calcular_kpis_fluxos(investimento, data["fluxos_caixa"], taxa_desconto)
+        roi, vpl, retorno, payback, tir = kpis.iloc[0][
+            ["ROI", "VPL", "Retorno Total", "Payback", "TIR"]
+        ]
+    else:
+        roi = roi_projeto(investimento, retorno)
+        vpl = vpl_projeto(taxa_desconto, investimento, fluxo_mensal, duracao)
+        payback = payback_projeto(investimento, fluxo_mensal, duracao)
+        tir = tir_projeto(investimento, fluxo_mensal, duracao)
+
+    return {
+        "ROI": float(roi),
+        "VPL": float(vpl),
+        "Investimento Total": float(investimento),
+        "Retorno Total": float(retorno),
+        "Payback": float(payback),
+        "TIR": float(tir),
+    }
+
+
+def fator_anuidade(taxa_desconto, duracao) -> np.ndarray:
+    """Calcula o fator de valor presente de uma série uniforme de fluxos.
+
+    Equivale a `calcular_vpl(taxa_desconto, [0] + [1] * duracao)`, mas em
+    forma fechada: (1 - (1 + r) ** -n) / r, ou n quando a taxa é zero.
+
+    Args:
+        taxa_desconto (float | np.ndarray): A taxa de desconto por período em porcentagem.
+        duracao (int | np.ndarray): O número de períodos com fluxo de caixa.
+
+    Returns:
+        np.ndarray: O fator de anuidade para cada par (taxa, duração).
+    """
+    taxa = np.asarray(taxa_desconto, dtype=float) / 100
+    duracao = np.asarray(duracao, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fator = (1 - (1 + taxa) ** -duracao) / taxa
+    return np.where(taxa == 0, duracao, fator)
+
+
+def calcular_kpis_lote(dados) -> pd.DataFrame:
+    """Calcula os KPIs financeiros de vários projetos em uma única passada vetorizada.
+
+    Versão em lote de `calcular_kpis`: o VPL usa o fator de
+    anuidade em forma fechada em vez de montar a lista de fluxos de cada projeto.
+
+    Args:
+        dados (pd.DataFrame | dict): Uma tabela colunar (DataFrame ou dicionário de
+            arrays NumPy) com os mesmos campos de `dados_projeto_a`.
+
+    Returns:
+        pd.DataFrame: Uma linha por projeto com as colunas numéricas "ROI", "VPL",
+            "Investimento Total", "Retorno Total", "Payback" (meses) e "TIR" (% ao
+            período); payback e TIR são NaN quando não existem.
+    """
+    colunas = {campo: np.asarray(dados[campo], dtype=float) for campo in CAMPOS_KPI}
+    duracao = colunas["duracao"]
+    economia_custos = colunas["economia_custos"]
+    aumento_receita = colunas["aumento_receita"]
+
+    investimento_total = (
+        colunas["orcamento"]
+        + colunas["custo_treinamento"]
+        + colunas["custo_implementacao"]
+    )
+    retorno_total = (economia_custos * duracao) + (aumento_receita * duracao)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(
+            investimento_total == 0,
+            np.inf,
+            ((retorno_total - investimento_total) / investimento_total) * 100,
+        )
+    fluxo_mensal = economia_custos + aumento_receita
+    vpl = -investimento_total + fluxo_mensal * fator_anuidade(
+        colunas["taxa_desconto"], duracao
+    )
+
+    # Com o fluxo constante, o payback é a razão investimento / fluxo, e a TIR zera
+    # o VPL da anuidade (a derivada do fator também tem forma fechada)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(
+            investimento_total == 0, 0.0, investimento_total / fluxo_mensal
+        )
+    payback = np.where((payback >= 0) & (payback <= duracao), payback, np.nan)
+    # Estimativa inicial: log(fator) ≈ log(n) - taxa * (n + 1) / 2, refinada por um
+    # passo de taxa = (1 - (1 + taxa) ** -n) / payback; daí bastam poucos passos
+    # de Newton
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        razao = investimento_total / fluxo_mensal
+        inicial = 2 * np.log(duracao / razao) / (duracao + 1)
+        inicial = (1 - (1 + inicial) ** -duracao) / razao
+
+    def vpl_e_derivada(
+        taxa: np.ndarray, projetos: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        fator, derivada = _anuidade_e_derivada(taxa, duracao[projetos])
+        return (
+            -investimento_total[projetos] + fluxo_mensal[projetos] * fator,
+            fluxo_mensal[projetos] * derivada,
+        )
+
+    tir = _resolver_tir(vpl_e_derivada, len(investimento_total), inicial)
+
+    return pd.DataFrame(
+        {
+            "ROI": roi,
+            "VPL": vpl,
+            "Investimento Total": investimento_total,
+            "Retorno Total": retorno_total,
+            "Payback": payback,
+            "TIR": tir,
+        },
+        index=dados.index if isinstance(dados, pd.DataFrame) else None,
+    )
+
+
+# --- Fluxos de caixa por período ---
+# Projetos com rampa de adoção, sazonalidade ou investimento em fases informam os
+# fluxos mês a mês (até 30 anos mensais), em vez do fluxo constante. Os fluxos de
+# vários projetos formam uma matriz (projetos × períodos), com o período zero na
+# primeira coluna; os projetos mais curtos são completados com zeros.
+def fluxos_constantes(
+    investimento: float, fluxo_mensal: float, duracao: int
+) -> np.ndarray:
+    """Monta os fluxos de um projeto com fluxo mensal constante.
+
+    Args:
+        investimento (float): O investimento total, no período zero.
+        fluxo_mensal (float): A economia mais o aumento de receita mensais.
+        duracao (int): O número de meses com fluxo de caixa (uma duração não
+            positiva não tem meses com fluxo).
+
+    Returns:
+        np.ndarray: Os fluxos dos períodos 0 a `duracao` (só o período zero se a
+            duração não for positiva).
+    """
+    fluxos = np.full(max(int(duracao), 0) + 1, float(fluxo_mensal))
+    fluxos[0] = -investimento
+    return fluxos
+
+
+def valor_presente(taxa_desconto, fluxos_caixa) -> np.ndarray:
+    """Calcula o VPL de um ou vários projetos, sem laço em Python.
+
+    Equivale a `calcular_vpl` aplicado a cada linha de `fluxos_caixa`. Com uma só
+    taxa (ou curva), o VPL de todos os projetos é um único produto de matriz por
+    vetor com a tabela memorizada de `fatores_desconto`; com uma taxa por projeto,
+    a tabela memorizada de cada taxa distinta é reaproveitada (com taxas quase
+    todas distintas, os fatores são calculados diretamente).
+
+    Args:
+        taxa_desconto (float | tuple | np.ndarray): A taxa de desconto por período
+            em porcentagem (uma por projeto, ou a mesma para todos), ou uma curva
+            (tupla) com a taxa de cada período, a mesma para todos.
+        fluxos_caixa (np.ndarray): Os fluxos a partir do período zero, com forma
+            (períodos,) ou (projetos, períodos).
+
+    Returns:
+        np.ndarray: O VPL de cada projeto (um escalar para um único projeto; zero
+            sem fluxos).
+    """
+    fluxos = np.asarray(fluxos_caixa, dtype=float)
+    periodos = fluxos.shape[-1] - 1
+    if periodos < 0:
+        return np.zeros(fluxos.shape[:-1])[()]
+    if isinstance(taxa_desconto, tuple):
+        return fluxos @ fatores_desconto(taxa_desconto, periodos)
+    if np.ndim(taxa_desconto) == 0:
+        return fluxos @ fatores_desconto(float(taxa_desconto), periodos)
+
+    taxas = np.asarray(taxa_desconto, dtype=float)
+    unicas, grupos = np.unique(taxas, return_inverse=True)
+    if len(unicas) > fatores_desconto.cache_info().maxsize // 4:
+        # Taxas quase todas distintas: não há tabela a reaproveitar
+        return (
+            fluxos * (1 + taxas[..., np.newaxis] / 100) ** -np.arange(periodos + 1.0)
+        ).sum(axis=-1)
+    tabelas = np.stack([fatores_desconto(taxa, periodos) for taxa in unicas.tolist()])
+    return (fluxos * tabelas[grupos]).sum(axis=-1)
+
+
+def calcular_payback(fluxos_caixa) -> np.ndarray:
+    """Calcula o payback (simples) de um ou vários projetos com uma soma acumulada.
+
+    O payback é o primeiro período em que o fluxo acumulado deixa de ser
+    negativo, interpolado linearmente dentro do período (ex.: investimento de 100 e
+    fluxos de 30 por mês: 3,33 meses).
+
+    Args:
+        fluxos_caixa (np.ndarray): Os fluxos a partir do período zero, com forma
+            (períodos,) ou (projetos, períodos).
+
+    Returns:
+        np.ndarray: O payback de cada projeto, em períodos; NaN se o investimento
+            não é recuperado.
+    """
+    fluxos = np.asarray(fluxos_caixa, dtype=float)
+    acumulado = np.cumsum(fluxos, axis=-1)
+    recuperado = acumulado >= 0
+    periodo = np.argmax(recuperado, axis=-1)[..., np.newaxis]
+    anterior = np.take_along_axis(acumulado, np.maximum(periodo - 1, 0), axis=-1)
+    fluxo = np.take_along_axis(fluxos, periodo, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(periodo > 0, periodo - 1 - anterior / fluxo, 0.0)
+    return np.where(recuperado.any(axis=-1), payback[..., 0], np.nan)
+
+
+def _anuidade_e_derivada(
+    taxa: np.ndarray, duracao: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Calcula `fator_anuidade` e a sua derivada em relação à taxa (decimal, não
+    porcentagem), com uma única potência."""
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        desconto = (1 + taxa) ** -duracao
+        fator = (1 - desconto) / taxa
+        derivada = (duracao * desconto / (1 + taxa) - fator) / taxa
+    return (
+        np.where(taxa == 0, duracao, fator),
+        np.where(taxa == 0, -duracao * (duracao + 1) / 2, derivada),
+    )
+
+
+def _resolver_tir(
+    funcao: Callable[[np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray]],
+    n_projetos: int,
+    inicial=0.01,
+    taxa_minima: float = -0.5,
+    taxa_maxima: float = 10.0,
+    tolerancia: float = 1e-10,
+    max_iteracoes: int = 100,
+) -> np.ndarray:
+    """Encontra a taxa que zera o VPL de vários projetos ao mesmo tempo.
+
+    Usa o método de Newton com salvaguarda de bisseção: cada projeto mantém um
+    intervalo com troca de sinal do VPL, e o passo de Newton que sai do intervalo
+    (ou tem derivada nula) é trocado pelo ponto médio. Os projetos avançam juntos,
+    em operações vetorizadas, e os que convergem deixam de ser recalculados.
+
+    Args:
+        funcao (Callable): Recebe as taxas (decimais) e os índices dos projetos a
+            que se referem, e retorna o VPL e a sua derivada em cada uma.
+        n_projetos (int): O número de projetos.
+        inicial (float | np.ndarray): A estimativa inicial (decimal por período).
+        taxa_minima (float): O limite inferior da busca (decimal por período).
+        taxa_maxima (float): O limite superior da busca (decimal por período).
+        tolerancia (float): A variação relativa da taxa que encerra a busca.
+        max_iteracoes (int): O número máximo de iterações.
+
+    Returns:
+        np.ndarray: A TIR de cada projeto em porcentagem por período; NaN quando o
+            VPL não muda de sinal no intervalo.
+    """
+    todos = np.arange(n_projetos)
+    baixo = np.full(n_projetos, taxa_minima)
+    alto = np.full(n_projetos, taxa_maxima)
+    sinal_baixo = np.sign(funcao(baixo, todos)[0])
+    valido = sinal_baixo * np.sign(funcao(alto, todos)[0]) < 0
+    margem = 1e-6 * (taxa_maxima - taxa_minima)
+    taxa = np.clip(
+        np.broadcast_to(np.asarray(inicial, dtype=float), (n_projetos,)),
+        taxa_minima + margem,
+        taxa_maxima - margem,
+    )
+    taxa = np.where(np.isfinite(taxa), taxa, 0.01)
+
+    ativos = np.flatnonzero(valido)
+    for _ in range(max_iteracoes):
+        if not len(ativos):
+            break
+        atual, b, a = taxa[ativos], baixo[ativos], alto[ativos]
+        vpl, derivada = funcao(atual, ativos)
+        raiz = vpl == 0
+        # O ponto atual substitui o extremo do intervalo com o mesmo sinal
+        lado_baixo = np.sign(vpl) == sinal_baixo[ativos]
+        b = np.where(lado_baixo, atual, b)
+        a = np.where(lado_baixo | raiz, a, atual)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = atual - vpl / derivada
+        fora = ~np.isfinite(newton) | (newton <= b) | (newton >= a)
+        nova = np.where(raiz, atual, np.where(fora, (b + a) / 2, newton))
+        taxa[ativos], baixo[ativos], alto[ativos] = nova, b, a
+        ativos = ativos[np.abs(nova - atual) > tolerancia * (1 + np.abs(atual))]
+    return np.where(valido, taxa * 100, np.nan)
+
+
+def calcular_tir(fluxos_caixa) -> np.ndarray:
+    """Calcula a Taxa Interna de Retorno (TIR) de um ou vários projetos.
+
+    Args:
+        fluxos_caixa (np.ndarray): Os fluxos a partir do período zero, com forma
+            (períodos,) ou (projetos, períodos).
+
+    Returns:
+        np.ndarray: A TIR de cada projeto em porcentagem por período (a mesma
+            unidade de `taxa_desconto`); NaN se não houver uma taxa entre -50% e
+            1000% que zere o VPL.
+    """
+    fluxos = np.asarray(fluxos_caixa, dtype=float)
+    matriz = np.atleast_2d(fluxos)
+    periodos = np.arange(matriz.shape[-1])
+
+    def vpl_e_derivada(
+        taxa: np.ndarray, projetos: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        descontados = matriz[projetos] * (1 + taxa[:, np.newaxis]) ** -periodos
+        return (
+            descontados.sum(axis=-1),
+            -(descontados * periodos).sum(axis=-1) / (1 + taxa),
+        )
+
+    tir = _resolver_tir(vpl_e_derivada, len(matriz))
+    return tir[0] if fluxos.ndim == 1 else tir
+
+
+def calcular_kpis_fluxos(investimento, fluxos_caixa, taxa_desconto) -> pd.DataFrame:
+    """Calcula os KPIs de projetos com fluxos mensais explícitos.
+
+    Versão de `calcular_kpis_lote` para fluxos que variam mês a mês (rampa de
+    adoção, sazonalidade, investimentos em fases como fluxos negativos).
+
+    Args:
+        investimento (float | np.ndarray): O investimento total no período zero
+            (orçamento e custos de treinamento e implementação), por projeto.
+        fluxos_caixa (np.ndarray): Os fluxos líquidos dos meses 1 a n, com forma
+            (meses,) ou (projetos, meses).
+        taxa_desconto (float | np.ndarray): A taxa de desconto por período em
+            porcentagem.
+
+    Returns:
+        pd.DataFrame: Uma linha por projeto com as colunas de `calcular_kpis_lote`;
+            o "Retorno Total" é a soma dos fluxos mensais.
+    """
+    fluxos = np.atleast_2d(np.asarray(fluxos_caixa, dtype=float))
+    investimento = np.broadcast_to(
+        np.asarray(investimento, dtype=float), (len(fluxos),)
+    )
+    completos = np.column_stack([-investimento, fluxos])
+    retorno_total = fluxos.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(
+            investimento == 0,
+            np.inf,
+            ((retorno_total - investimento) / investimento) * 100,
+        )
+    return pd.DataFrame(
+        {
+            "ROI": roi,
+            "VPL": valor_presente(taxa_desconto, completos),
+            "Investimento Total": investimento,
+            "Retorno Total": retorno_total,
+            "Payback": calcular_payback(completos),
+            "TIR": calcular_tir(completos),
+        }
+    )
+
+
+def _quantis_histograma(
+    contagens: np.ndarray,
+    minimos: np.ndarray,
+    maximos: np.ndarray,
+    posicoes: np.ndarray,
+) -> np.ndarray:
+    """Interpola, dentro de cada faixa do histograma, os valores nas posições pedidas.
+
+    Args:
+        contagens (np.ndarray): O número de amostras em cada faixa.
+        minimos (np.ndarray): O menor valor observado em cada faixa.
+        maximos (np.ndarray): O maior valor observado em cada faixa.
+        posicoes (np.ndarray): As posições (em número de amostras, a partir de 1)
+            a localizar.
+
+    Returns:
+        np.ndarray: O valor aproximado da amostra em cada posição.
+    """
+    acumulado = np.cumsum(contagens)
+    faixa = np.minimum(np.searchsorted(acumulado, posicoes), len(contagens) - 1)
+    anterior = np.where(faixa > 0, acumulado[faixa - 1], 0)
+    fracao = np.clip(
+        (posicoes - anterior - 1) / np.maximum(contagens[faixa] - 1, 1), 0, 1
+    )
+    with np.errstate(invalid="ignore"):
+        return minimos[faixa] + fracao * (maximos[faixa] - minimos[faixa])
+
+
+def simular_risco(
+    data: dict,
+    n_simulacoes: int = 1_000_000,
+    semente: int | None = None,
+    volatilidade_economia: float = 0.2,
+    volatilidade_receita: float = 0.3,
+    tamanho_lote: int = 250_000,
+    n_faixas: int = 20_000,
+) -> dict:
+    """Simula (Monte Carlo) a distribuição de VPL e ROI considerando o risco de falha.
+
+    Em cada sorteio o projeto falha com probabilidade `risco_falha` e, nesse caso,
+    não gera economia nem receita (o investimento é perdido). Caso contrário, a
+    economia e o aumento de receita mensais são multiplicados por fatores lognormais
+    de média 1. Como o VPL e o ROI são lineares no fluxo mensal, `calcular_vpl` e
+    `calcular_roi` são usados como núcleo determinístico sobre os fluxos sorteados.
+
+    Os sorteios são processados em lotes e os quantis são obtidos de um histograma
+    de `n_faixas` faixas (com o menor e o maior valor observados em cada uma), de
+    modo que a memória não cresce com `n_simulacoes`.
+    A falha, a economia e a receita usam geradores independentes, então o resultado
+    depende apenas da semente, e não de `tamanho_lote`.
+
+    Args:
+        data (dict): Um dicionário contendo os dados do projeto.
+        n_simulacoes (int): O número de cenários sorteados.
+        semente (int | None): A semente dos geradores aleatórios.
+        volatilidade_economia (float): O desvio-padrão do log do fator de economia.
+        volatilidade_receita (float): O desvio-padrão do log do fator de receita.
+        tamanho_lote (int): O número de cenários processados por vez.
+        n_faixas (int): O número de faixas do histograma usado nos quantis.
+
+    Returns:
+        dict: Os percentis P5, P50 e P95 de VPL e ROI, o VPL médio e a
+            probabilidade de VPL negativo (em porcentagem).
+    """
+    duracao = data["duracao"]
+    economia_custos = data["economia_custos"]
+    aumento_receita = data["aumento_receita"]
+    investimento_total = (
+        data["orcamento"] + data["custo_treinamento"] + data["custo_implementacao"]
+    )
+    probabilidade_falha = data["risco_falha"] / 100
+
+    # VPL de um fluxo unitário por mês: VPL = -investimento + fluxo * fator
+    fator = calcular_vpl(data["taxa_desconto"], [0.0] + [1.0] * duracao)
+
+    gerador_falha, gerador_economia, gerador_receita = (
+        np.random.default_rng(s) for s in np.random.SeedSequence(semente).spawn(3)
+    )
+
+    bordas = None
+    falhas = 0
+    vpl_negativo = 0
+    soma_fluxo = 0.0
+    for inicio in range(0, n_simulacoes, tamanho_lote):
+        tamanho = min(tamanho_lote, n_simulacoes - inicio)
+        falhou = gerador_falha.random(tamanho) < probabilidade_falha
+        fluxo = economia_custos * gerador_economia.lognormal(
+            -(volatilidade_economia**2) / 2, volatilidade_economia, tamanho
+        ) + aumento_receita * gerador_receita.lognormal(
+            -(volatilidade_receita**2) / 2, volatilidade_receita, tamanho
+        )
+        fluxo = fluxo[~falhou]
+
+        falhas += tamanho - fluxo.size
+        vpl_negativo += np.count_nonzero(-investimento_total + fluxo * fator < 0)
+        soma_fluxo += fluxo.sum()
+
+        if bordas is None:
+            # As faixas são definidas pelo primeiro lote, com o zero como borda;
+            # valores fora delas são acumulados nas faixas das pontas.
+            minimo = min(fluxo.min(initial=0.0), 0.0)
+            maximo = max(fluxo.max(initial=0.0), 0.0)
+            bordas = np.unique(np.append(np.linspace(minimo, maximo, n_faixas), 0))
+            bordas = bordas[1:-1]
+            contagens = np.zeros(bordas.size + 1, dtype=np.int64)
+            minimos = np.full(bordas.size + 1, np.inf)
+            maximos = np.full(bordas.size + 1, -np.inf)
+        faixa = np.searchsorted(bordas, fluxo, side="right")
+        contagens += np.bincount(faixa, minlength=contagens.size)
+        np.minimum.at(minimos, faixa, fluxo)
+        np.maximum.at(maximos, faixa, fluxo)
+
+    if -investimento_total < 0:
+        vpl_negativo += falhas
+
+    # Os cenários de falha (fluxo zero) entram como uma massa pontual ordenada
+    # entre as faixas negativas e positivas do histograma.
+    posicoes = np.array([0.05, 0.50, 0.95]) * (n_simulacoes - 1) + 1
+    abaixo_de_zero = contagens[: np.searchsorted(bordas, 0.0, side="right")].sum()
+    quantis_fluxo = np.where(
+        posicoes <= abaixo_de_zero,
+        _quantis_histograma(contagens, minimos, maximos, posicoes),
+        np.where(
+            posicoes <= abaixo_de_zero + falhas,
+            0.0,
+            _quantis_histograma(contagens, minimos, maximos, posicoes - falhas),
+        ),
+    )
+
+    quantis_vpl = -investimento_total + quantis_fluxo * fator
+    quantis_roi = np.asarray(
+        calcular_roi(investimento_total, quantis_fluxo * duracao), dtype=float
+    ) * np.ones(3)
+    if investimento_total < 0:
+        quantis_roi = quantis_roi[::-1]
+
+    return {
+        "VPL P5": float(quantis_vpl[0]),
+        "VPL P50": float(quantis_vpl[1]),
+        "VPL P95": float(quantis_vpl[2]),
+        "VPL Médio": float(-investimento_total + soma_fluxo / n_simulacoes * fator),
+        "ROI P5": float(quantis_roi[0]),
+        "ROI P50": float(quantis_roi[1]),
+        "ROI P95": float(quantis_roi[2]),
+        "Prob. VPL Negativo (%)": 100 * vpl_negativo / n_simulacoes,
+    }
+
+
+def ranquear_projetos(projetos: pd.DataFrame, criterio: str = "VPL") -> pd.DataFrame:
+    """Calcula os KPIs de todos os projetos e os ordena do melhor para o pior.
+
+    A ordenação é feita em código, em O(N log N), para que apenas os melhores
+    colocados precisem ser enviados ao LLM.
+
+    Args:
+        projetos (pd.DataFrame): Os dados dos projetos, um por linha.
+        criterio (str): O KPI principal da ordenação ("VPL" ou "ROI"); o outro é
+            usado como desempate.
+
+    Returns:
+        pd.DataFrame: Os dados e KPIs dos projetos, ordenados, com a coluna
+            "Posição" (1 = melhor).
+    """
+    desempate = "ROI" if criterio == "VPL" else "VPL"
+    ranking = pd.concat([projetos, calcular_kpis_lote(projetos)], axis=1)
+    ranking = ranking.sort_values(
+        [criterio, desempate], ascending=False, kind="stable"
+    ).reset_index(drop=True)
+    ranking.insert(0, "Posição", np.arange(1, len(ranking) + 1))
+    return ranking
@@ -0,0 +1,306 @@
+# Métricas de latência, tokens e cache das etapas da análise
+import bisect
+import functools
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+# Arquivo no formato texto do Prometheus, regravado ao final de cada etapa medida
+# (opcional; pode ser lido pelo textfile collector do node_exporter)
+ARQUIVO_METRICAS = os.getenv("ROI_METRICS_FILE")
+# Destino dos logs estruturados (JSON por linha): um arquivo, ou "-" para stderr
+LOG_METRICAS = os.getenv("ROI_METRICS_LOG")
+
+# Limites (em segundos) das faixas dos histogramas de latência: de cálculos em
+# memória (milissegundos) a chamadas longas ao LLM (minutos)
+FAIXAS_LATENCIA = (
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+logger = logging.getLogger("roi_vision.metricas")
+
+
+def _escapar_rotulo(valor) -> str:
+    """Escapa o valor de um rótulo conforme o formato texto do Prometheus."""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RegistroMetricas:
+    """Contadores, medidores e histogramas, com rótulos, seguros entre threads.
+
+    Os nomes e rótulos seguem as convenções do Prometheus, e `exportar_prometheus`
+    gera o formato texto de exposição.
+    """
+
+    def __init__(self, faixas: tuple[float, ...] = FAIXAS_LATENCIA):
+        """Inicializa o RegistroMetricas.
+
+        Args:
+            faixas (tuple[float, ...]): Os limites superiores das faixas dos
+                histogramas, em ordem crescente.
+        """
+        self.faixas = faixas
+        self._trava = threading.Lock()
+        self._contadores: dict[str, dict[tuple, float]] = {}
+        self._medidores: dict[str, dict[tuple, float]] = {}
+        self._histogramas: dict[str, dict[tuple, tuple]] = {}
+        self._descricoes: dict[str, str] = {}
+
+    def incrementar(
+        self, nome: str, valor: float = 1, descricao: str = "", **rotulos
+    ) -> None:
+        """Soma `valor` ao contador `nome` com os rótulos informados."""
+        chave = tuple(sorted(rotulos.items()))
+        with self._trava:
+            self._descricoes.setdefault(nome, descricao)
+            serie = self._contadores.setdefault(nome, {})
+            serie[chave] = serie.get(chave, 0) + valor
+
+    def definir(self, nome: str, valor: float, descricao: str = "", **rotulos) -> None:
+        """Define o valor atual do medidor `nome` (ex.: tamanho de uma fila)."""
+        chave = tuple(sorted(rotulos.items()))
+        with self._trava:
+            self._descricoes.setdefault(nome, descricao)
+            self._medidores.setdefault(nome, {})[chave] = valor
+
+    def observar(self, nome: str, valor: float, descricao: str = "", **rotulos) -> None:
+        """Registra uma observação no histograma `nome` com os rótulos informados."""
+        chave = tuple(sorted(rotulos.items()))
+        faixa = bisect.bisect_left(self.faixas, valor)
+        with self._trava:
+            self._descricoes.setdefault(nome, descricao)
+            serie = self._histogramas.setdefault(nome, {})
+            # Contagem por faixa (a última é +Inf), soma e total de observações
+            contagens, soma, total = serie.get(
+                chave, ([0] * (len(self.faixas) + 1), 0.0, 0)
+            )
+            contagens[faixa] += 1
+            serie[chave] = (contagens, soma + valor, total + 1)
+
+    def valor(self, nome: str, **rotulos) -> float:
+        """Retorna o valor atual de um contador ou medidor (0 se ainda não existe)."""
+        chave = tuple(sorted(rotulos.items()))
+        with self._trava:
+            serie = self._contadores.get(nome) or self._medidores.get(nome, {})
+            return serie.get(chave, 0)
+
+    def observacoes(self, nome: str, **rotulos) -> int:
+        """Retorna o número de observações de um histograma (0 se ainda não existe)."""
+        with self._trava:
+            serie = self._histogramas.get(nome, {})
+            return serie.get(tuple(sorted(rotulos.items())), (None, 0.0, 0))[2]
+
+    def limpar(self) -> None:
+        """Remove todas as métricas registradas."""
+        with self._trava:
+            self._contadores.clear()
+            self._medidores.clear()
+            self._histogramas.clear()
+
+    def exportar_prometheus(self) -> str:
+        """Gera as métricas no formato texto de exposição do Prometheus.
+
+        Returns:
+            str: O texto com as linhas HELP/TYPE e as amostras de cada métrica.
+        """
+
+        def formatar(rotulos: tuple, extra: tuple = ()) -> str:
+            pares = [
+                f'{nome}="{_escapar_rotulo(valor)}"' for nome, valor in rotulos + extra
+            ]
+            return "{" + ",".join(pares) + "}" if pares else ""
+
+        linhas = []
+        with self._trava:
+            for tipo, series in [
+                ("counter", self._contadores),
+                ("gauge", self._medidores),
+            ]:
+                for nome, serie in sorted(series.items()):
+                    linhas.append(f"# HELP {nome} {self._descricoes[nome]}")
+                    linhas.append(f"# TYPE {nome} {tipo}")
+                    for rotulos, valor in sorted(serie.items()):
+                        linhas.append(f"{nome}{formatar(rotulos)} {valor:g}")
+            for nome, serie in sorted(self._histogramas.items()):
+                linhas.append(f"# HELP {nome} {self._descricoes[nome]}")
+                linhas.append(f"# TYPE {nome} histogram")
+                for rotulos, (contagens, soma, total) in sorted(serie.items()):
+                    acumulado = 0
+                    for limite, contagem in zip(self.faixas + (math.inf,), contagens):
+                        acumulado += contagem
+                        le = "+Inf" if math.isinf(limite) else f"{limite:g}"
+                        linhas.append(
+                            f"{nome}_bucket{formatar(rotulos, (('le', le),))} {acumulado}"
+                        )
+                    linhas.append(f"{nome}_sum{formatar(rotulos)} {soma:.6f}")
+                    linhas.append(f"{nome}_count{formatar(rotulos)} {total}")
+        return "\n".join(linhas) + "\n"
+
+    def salvar_prometheus(self, caminho: str | Path) -> None:
+        """Grava as métricas no formato do Prometheus, substituindo o arquivo de forma
+        atômica (leitores nunca veem um arquivo pela metade).
+
+        Args:
+            caminho (str | Path): O arquivo de destino (ex.: "metricas.prom").
+        """
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(f"{caminho.name}.{threading.get_ident()}.tmp")
+        temporario.write_text(self.exportar_prometheus(), encoding="utf-8")
+        os.replace(temporario, caminho)
+
+
+# Registro compartilhado pelo processo (página, lote e benchmarks)
+REGISTRO = RegistroMetricas()
+
+# Medição da etapa em andamento na thread atual, completada por `registrar_medicao`
+_medicao_atual: ContextVar[dict | None] = ContextVar("medicao_atual", default=None)
+
+
+def configurar_log_json(destino: str | None = LOG_METRICAS) -> None:
+    """Envia os logs estruturados das etapas para um arquivo ou para o stderr.
+
+    Args:
+        destino (str | None): O caminho do arquivo (uma linha JSON por etapa), "-"
+            para o stderr, ou None para manter a configuração de logging atual.
+    """
+    if not destino:
+        return
+    manipulador = (
+        logging.StreamHandler(sys.stderr)
+        if destino == "-"
+        else logging.FileHandler(destino, encoding="utf-8")
+    )
+    manipulador.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(manipulador)
+    logger.setLevel(logging.INFO)
+
+
+def registrar_medicao(**campos) -> None:
+    """Acrescenta campos (tokens, resultado do cache...) à etapa em andamento.
+
+    Fora de uma etapa medida por `medir`, a chamada não tem efeito.
+
+    Args:
+        **campos: Os campos a registrar, ex.: `tokens_prompt=120, cache="acerto"`.
+    """
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        medicao.update(campos)
+
+
+@contextmanager
+def medir(etapa: str, registro: RegistroMetricas | None = None) -> Iterator[dict]:
+    """Mede o tempo de parede, os tokens, o cache e os erros de uma etapa.
+
+    Ao final do bloco, a duração vai para o histograma
+    `roi_vision_etapa_duracao_segundos`, os contadores de execuções, tokens e cache
+    são atualizados, uma linha JSON é registrada no logger `roi_vision.metricas` e,
+    se `ROI_METRICS_FILE` estiver definido, o arquivo do Prometheus é regravado.
+
+    Args:
+        etapa (str): O nome da etapa (ex.: "analyze_project").
+        registro (RegistroMetricas | None): O registro de destino; por padrão, o
+            `REGISTRO` do processo.
+
+    Yields:
+        dict: Os campos da medição, que podem ser completados dentro do bloco.
+    """
+    registro = REGISTRO if registro is None else registro
+    medicao = {"etapa": etapa}
+    token = _medicao_atual.set(medicao)
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    except BaseException as erro:
+        medicao["erro"] = type(erro).__name__
+        raise
+    finally:
+        _medicao_atual.reset(token)
+        medicao["duracao_s"] = round(time.perf_counter() - inicio, 6)
+        _consolidar(registro, medicao)
+
+
+def _consolidar(registro: RegistroMetricas, medicao: dict) -> None:
+    """Leva uma medição concluída ao registro, ao log e ao arquivo de métricas."""
+    etapa = medicao["etapa"]
+    registro.observar(
+        "roi_vision_etapa_duracao_segundos",
+        medicao["duracao_s"],
+        "Tempo de parede de cada etapa, em segundos.",
+        etapa=etapa,
+    )
+    registro.incrementar(
+        "roi_vision_etapa_execucoes_total",
+        descricao="Execuções de cada etapa, por resultado.",
+        etapa=etapa,
+        resultado="erro" if "erro" in medicao else "ok",
+    )
+    for tipo in ("prompt", "resposta"):
+        if f"tokens_{tipo}" in medicao:
+            registro.incrementar(
+                "roi_vision_tokens_total",
+                medicao[f"tokens_{tipo}"],
+                "Tokens enviados ao LLM (prompt) e recebidos dele (resposta).",
+                etapa=etapa,
+                tipo=tipo,
+            )
+    if "cache" in medicao:
+        registro.incrementar(
+            "roi_vision_cache_consultas_total",
+            descricao="Consultas ao cache de respostas, por resultado.",
+            etapa=etapa,
+            resultado=medicao["cache"],
+        )
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"ts": time.time(), **medicao}, ensure_ascii=False))
+    if ARQUIVO_METRICAS and registro is REGISTRO:
+        try:
+            registro.salvar_prometheus(ARQUIVO_METRICAS)
+        except OSError:
+            logger.exception("Falha ao gravar as métricas em %s", ARQUIVO_METRICAS)
+
+
+def instrumentar(etapa: str) -> Callable:
+    """Decorador que mede cada chamada da função com `medir(etapa)`.
+
+    Args:
+        etapa (str): O nome da etapa nas métricas e nos logs.
+
+    Returns:
+        Callable: O decorador.
+    """
+
+    def decorador(funcao: Callable) -> Callable:
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with medir(etapa):
+                return funcao(*args, **kwargs)
+
+        return medida
+
+    return decorador
+
+
+configurar_log_json()
@@ -0,0 +1,314 @@
+# Seleção da carteira de projetos que maximiza o VPL sob limite de orçamento e de
+# funcionários, sem dependência do Streamlit
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from src.kpis import calcular_kpis_lote
+
+
+def vpl_ajustado(vpl, investimento, risco_falha) -> np.ndarray:
+    """Calcula o VPL esperado considerando o risco de falha.
+
+    Com probabilidade `risco_falha` o projeto falha e o investimento é perdido (o
+    mesmo modelo de `simular_risco`); caso contrário, rende o VPL calculado.
+
+    Args:
+        vpl (float | np.ndarray): O VPL de cada projeto.
+        investimento (float | np.ndarray): O investimento total de cada projeto.
+        risco_falha (float | np.ndarray): A probabilidade de falha em porcentagem.
+
+    Returns:
+        np.ndarray: (1 - p) * VPL - p * investimento.
+    """
+    probabilidade = np.asarray(risco_falha, dtype=float) / 100
+    return np.asarray(vpl, dtype=float) - probabilidade * (
+        np.asarray(vpl, dtype=float) + np.asarray(investimento, dtype=float)
+    )
+
+
+def _multiplicadores(
+    valor: np.ndarray, custos: np.ndarray, limites: np.ndarray
+) -> np.ndarray:
+    """Calcula o preço de cada limite (multiplicadores de Lagrange) da relaxação.
+
+    Com os preços λ ≥ 0, o valor de qualquer seleção viável é no máximo
+    λ · limites + Σ max(0, valor - custos · λ), e o menor desses limites
+    superiores é o da relaxação linear. Ele é procurado por seção áurea no preço
+    por funcionário, com o melhor preço do orçamento calculado exatamente para
+    cada um (o mínimo de uma função convexa linear por partes). Qualquer λ ≥ 0
+    dá um limite válido; quanto mais perto do mínimo, mais apertado ele é.
+
+    Args:
+        valor (np.ndarray): O valor (positivo) de cada projeto.
+        custos (np.ndarray): O orçamento e os funcionários de cada projeto (n × 2).
+        limites (np.ndarray): O orçamento e os funcionários máximos.
+
+    Returns:
+        np.ndarray: O preço de uma unidade de cada limite.
+    """
+    # Custos em frações dos limites: os dois preços ficam na mesma escala (um
+    # limite zero só tem candidatos de custo zero nele)
+    escala = np.where(limites > 0, limites, 1.0)
+    custos = custos / escala
+
+    def preco_orcamento(lucro: np.ndarray) -> tuple[float, float]:
+        # min t + Σ max(0, lucro - custo * t) para t ≥ 0: a inclinação é
+        # 1 - Σ custo dos ativos, que muda de sinal na quebra em que os custos dos
+        # projetos de maior razão lucro / custo somam o limite
+        usam = custos[:, 0] > 0
+        quebras = lucro[usam] / custos[usam, 0]
+        ordem = np.argsort(-quebras)
+        k = int(np.searchsorted(np.cumsum(custos[usam, 0][ordem]), 1.0))
+        preco = max(quebras[ordem[k]], 0.0) if k < len(ordem) else 0.0
+        return preco, preco + np.maximum(lucro - custos[:, 0] * preco, 0).sum()
+
+    def superior(preco_funcionarios: float) -> float:
+        lucro = valor - custos[:, 1] * preco_funcionarios
+        return preco_funcionarios + preco_orcamento(lucro)[1]
+
+    usam = custos[:, 1] > 0
+    baixo, alto = 0.0, float(np.max(valor[usam] / custos[usam, 1], initial=0.0))
+    razao = (np.sqrt(5) - 1) / 2
+    meio_baixo, meio_alto = alto - razao * alto, razao * alto
+    valor_baixo, valor_alto = superior(meio_baixo), superior(meio_alto)
+    for _ in range(60):
+        if valor_baixo <= valor_alto:
+            alto, meio_alto, valor_alto = meio_alto, meio_baixo, valor_baixo
+            meio_baixo = alto - razao * (alto - baixo)
+            valor_baixo = superior(meio_baixo)
+        else:
+            baixo, meio_baixo, valor_baixo = meio_baixo, meio_alto, valor_alto
+            meio_alto = baixo + razao * (alto - baixo)
+            valor_alto = superior(meio_alto)
+    preco_funcionarios = (baixo + alto) / 2
+    preco = preco_orcamento(valor - custos[:, 1] * preco_funcionarios)[0]
+    return np.array([preco, preco_funcionarios]) / escala
+
+
+def _selecionar_limites(
+    valor: np.ndarray,
+    custos: np.ndarray,
+    limites: np.ndarray,
+    maximo_nos: int = 1_000_000,
+) -> tuple[np.ndarray, float]:
+    """Escolhe, de forma exata, os projetos de maior valor total dentro de dois
+    limites (orçamento e funcionários), por ramificação e poda.
+
+    Com os preços λ de `_multiplicadores`, cada projeto tem um lucro reduzido
+    (valor - custos · λ). Antes da busca, os projetos cujo lucro reduzido, em
+    módulo, supera a distância entre o limite superior lagrangiano e a solução
+    gulosa ficam fixados na escolha da relaxação: a decisão contrária não pode
+    superar a solução gulosa. A busca, em profundidade, só percorre os demais, e
+    poda cada nó pela relaxação linear do problema substituto (os dois custos
+    somados com os preços λ), calculada por busca binária nas somas acumuladas,
+    em O(log n) por nó. Em instâncias difíceis (valores quase proporcionais aos
+    custos, por exemplo), a busca para após `maximo_nos` nós com a melhor seleção
+    encontrada e o maior limite dos nós ainda não percorridos.
+
+    Os limites têm uma folga relativa de 1e-9, para que uma seleção que os esgota
+    exatamente não seja descartada pelo arredondamento das somas.
+
+    Args:
+        valor (np.ndarray): O valor de cada projeto (os não positivos são ignorados).
+        custos (np.ndarray): O orçamento e os funcionários de cada projeto (n × 2),
+            não negativos.
+        limites (np.ndarray): O orçamento e os funcionários máximos.
+        maximo_nos (int): Quantos nós a busca percorre, no máximo.
+
+    Returns:
+        tuple[np.ndarray, float]: Uma máscara booleana dos projetos selecionados e
+            um limite superior do valor total ótimo (igual ao valor da seleção
+            quando a busca termina).
+    """
+    selecionado = np.zeros(len(valor), dtype=bool)
+    limites = limites + 1e-9 * np.maximum(limites, 1.0)
+    candidatos = np.flatnonzero((valor > 0) & np.all(custos <= limites, axis=1))
+    if not len(candidatos):
+        return selecionado, 0.0
+    valor, custos = valor[candidatos], custos[candidatos]
+    precos = _multiplicadores(valor, custos, limites)
+    reduzido = valor - custos @ precos
+    superior = limites @ precos + np.maximum(reduzido, 0).sum()
+
+    # Solução inicial: gulosa pelo lucro reduzido
+    ordem = np.argsort(-reduzido, kind="stable")
+    escolha = np.zeros(len(valor), dtype=bool)
+    sobra = limites.astype(float)
+    for i in ordem:
+        if np.all(custos[i] <= sobra):
+            escolha[i] = True
+            sobra -= custos[i]
+    melhor = valor[escolha].sum()
+
+    # Fixação pelos lucros reduzidos (com tolerância para o arredondamento)
+    tolerancia = 1e-9 * max(superior, 1.0)
+    fixos = np.abs(reduzido) > superior - melhor + tolerancia
+    dentro = fixos & (reduzido > 0)
+    sobra = limites - custos[dentro].sum(axis=0)
+    if np.any(sobra < 0):
+        # Nenhuma seleção melhor que a gulosa cabe nos limites
+        selecionado[candidatos[escolha]] = True
+        return selecionado, float(melhor)
+
+    # Os projetos livres, pela razão valor / custo substituto (os custos somados
+    # com os preços λ): o limite de cada nó é o da relaxação linear do problema
+    # substituto (uma única restrição, λ · custos ≤ λ · sobra), preenchida pelos
+    # de maior razão, e nunca é maior que o limite lagrangiano da raiz
+    livres = np.flatnonzero(~fixos)
+    substituto = custos[livres] @ precos
+    with np.errstate(divide="ignore"):
+        # Custo substituto zero: razão infinita, sempre cabe
+        razoes = valor[livres] / substituto
+    ordenados = np.argsort(-razoes, kind="stable")
+    livres, substituto, razoes = (
+        livres[ordenados],
+        substituto[ordenados],
+        razoes[ordenados].tolist(),
+    )
+    valores = valor[livres].tolist()
+    orcamentos, funcionarios = custos[livres, 0].tolist(), custos[livres, 1].tolist()
+    valores_acumulados = np.append(0.0, np.cumsum(valor[livres])).tolist()
+    substitutos_acumulados = np.append(0.0, np.cumsum(substituto)).tolist()
+    preco_orcamento, preco_funcionarios = precos.tolist()
+    n = len(livres)
+
+    def limite_superior(k: int, capacidade: float) -> float:
+        # O que os projetos livres, do k-ésimo em diante, podem acrescentar
+        ate = bisect.bisect_right(
+            substitutos_acumulados, substitutos_acumulados[k] + capacidade, k, n + 1
+        )
+        j = ate - 1
+        extra = valores_acumulados[j] - valores_acumulados[k]
+        if j < n:
+            sobra_capacidade = capacidade - (
+                substitutos_acumulados[j] - substitutos_acumulados[k]
+            )
+            extra += sobra_capacidade * razoes[j]
+        return extra
+
+    # Busca em profundidade: cada nó é (próximo projeto, valor, sobras, nó com a
+    # última inclusão); as inclusões são guardadas como uma lista encadeada
+    base = valor[dentro].sum()
+    inclusoes: list[tuple[int, int]] = []
+    melhor_no, melhor_busca = None, melhor - base
+    pilha = [(0, 0.0, float(sobra[0]), float(sobra[1]), -1)]
+    nos = 0
+    while pilha and nos < maximo_nos:
+        nos += 1
+        k, atual, sobra_orcamento, sobra_funcionarios, no = pilha.pop()
+        if k == n:
+            if atual > melhor_busca + tolerancia:
+                melhor_busca, melhor_no = atual, no
+            continue
+        capacidade = (
+            sobra_orcamento * preco_orcamento + sobra_funcionarios * preco_funcionarios
+        )
+        if atual + limite_superior(k, capacidade) <= melhor_busca + tolerancia:
+            continue
+        pilha.append((k + 1, atual, sobra_orcamento, sobra_funcionarios, no))
+        if orcamentos[k] <= sobra_orcamento and funcionarios[k] <= sobra_funcionarios:
+            inclusoes.append((k, no))
+            pilha.append(
+                (
+                    k + 1,
+                    atual + valores[k],
+                    sobra_orcamento - orcamentos[k],
+                    sobra_funcionarios - funcionarios[k],
+                    len(inclusoes) - 1,
+                )
+            )
+
+    # Busca interrompida: a solução ótima, se for melhor, está em um nó pendente
+    superior_busca = max(
+        (
+            atual
+            + (
+                limite_superior(
+                    k,
+                    sobra_orcamento * preco_orcamento
+                    + sobra_funcionarios * preco_funcionarios,
+                )
+                if k < n
+                else 0.0
+            )
+            for k, atual, sobra_orcamento, sobra_funcionarios, _ in pilha
+        ),
+        default=-np.inf,
+    )
+    if melhor_no is None:
+        selecionado[candidatos[escolha]] = True
+        return selecionado, float(max(melhor, base + superior_busca))
+    escolha = dentro.copy()
+    no = melhor_no
+    while no >= 0:
+        k, no = inclusoes[no]
+        escolha[livres[k]] = True
+    selecionado[candidatos[escolha]] = True
+    return selecionado, float(max(base + melhor_busca, base + superior_busca))
+
+
+def otimizar_carteira(
+    projetos: pd.DataFrame,
+    orcamento_maximo: float,
+    funcionarios_maximo: float | None = None,
+    ajustar_risco: bool = False,
+) -> pd.DataFrame:
+    """Escolhe os projetos que maximizam o VPL total dentro dos limites.
+
+    O orçamento e os funcionários são resolvidos juntos por ramificação e poda com
+    o limite superior da relaxação lagrangiana (ver `_selecionar_limites`); sem
+    limite de funcionários, o orçamento é a única restrição. Com milhares de
+    candidatos, a seleção ótima sai em frações de segundo; nas instâncias em que a
+    busca é interrompida, a distância ao ótimo fica limitada pelo limite superior.
+
+    Args:
+        projetos (pd.DataFrame): Os dados dos projetos, um por linha, com os
+            campos de `CAMPOS_KPI` (e "funcionarios" e "risco_falha", quando
+            usados).
+        orcamento_maximo (float): O investimento total máximo da carteira.
+        funcionarios_maximo (float | None): O total máximo de funcionários
+            impactados; None para não limitar.
+        ajustar_risco (bool): Se True, maximiza o VPL ajustado pelo risco de falha
+            (ver `vpl_ajustado`).
+
+    Returns:
+        pd.DataFrame: Os projetos com os KPIs, o "Valor" otimizado (VPL ou VPL
+            ajustado) e a coluna booleana "Selecionado", com os selecionados
+            primeiro e do maior para o menor valor. Em `attrs["limite_superior"]`
+            fica um limite superior do valor total ótimo: igual ao valor dos
+            selecionados quando a busca termina, e maior se ela for interrompida.
+    """
+    carteira = pd.concat(
+        [
+            projetos.reset_index(drop=True),
+            calcular_kpis_lote(projetos).reset_index(drop=True),
+        ],
+        axis=1,
+    )
+    investimento = carteira["Investimento Total"].to_numpy(dtype=float)
+    valor = carteira["VPL"].to_numpy(dtype=float)
+    if ajustar_risco:
+        valor = vpl_ajustado(valor, investimento, carteira["risco_falha"])
+    carteira["Valor"] = valor
+    # Projetos sem custo e de valor positivo sempre cabem
+    investimento = np.maximum(investimento, 0)
+
+    if funcionarios_maximo is None:
+        # Sem limite de funcionários: todos usam zero de um limite zero
+        funcionarios, funcionarios_maximo = np.zeros(len(carteira)), 0.0
+    else:
+        funcionarios = carteira["funcionarios"].to_numpy(dtype=float)
+    selecionado, limite_superior = _selecionar_limites(
+        valor,
+        np.column_stack([investimento, np.maximum(funcionarios, 0)]),
+        np.array([orcamento_maximo, funcionarios_maximo], dtype=float),
+    )
+
+    carteira["Selecionado"] = selecionado
+    carteira = carteira.sort_values(
+        ["Selecionado", "Valor"], ascending=False, kind="stable"
+    ).reset_index(drop=True)
+    carteira.attrs["limite_superior"] = limite_superior
+    return carteira
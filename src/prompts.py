@@ -0,0 +1,143 @@
+# Contagem local de tokens e compactação dos prompts enviados ao LLM
+import math
+import re
+from functools import lru_cache
+
+# Orçamento padrão de tokens do bloco de projetos no prompt de comparação
+ORCAMENTO_TOKENS_COMPARACAO = 600
+
+# Termos que indicam as frases mais relevantes de uma análise para a comparação,
+# do mais para o menos importante
+TERMOS_RELEVANTES = (
+    "recomend",
+    "risco",
+    "forte",
+    "fraco",
+    "melhoria",
+    "problema",
+    "mudança",
+    "conclus",
+    "viável",
+    "retorno",
+)
+
+_PALAVRA_OU_SIMBOLO = re.compile(r"\w+|[^\w\s]")
+_FRASE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+@lru_cache(maxsize=None)
+def _codificador(modelo: str):
+    """Carrega o codificador do tiktoken para o modelo, se disponível.
+
+    O tiktoken é opcional: sem ele (ou sem acesso aos arquivos de codificação),
+    a contagem usa uma estimativa local.
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.encoding_for_model(modelo.split("/")[-1])
+    except Exception:
+        return None
+
+
+def contar_tokens(texto: str, modelo: str = "gpt-4o-mini") -> int:
+    """Conta os tokens de um texto localmente, sem chamar o LLM.
+
+    Args:
+        texto (str): O texto a contar.
+        modelo (str): O nome do modelo (com ou sem prefixo, ex.: "azure/gpt-4o-mini").
+
+    Returns:
+        int: O número de tokens (exato com tiktoken, estimado sem ele).
+    """
+    codificador = _codificador(modelo)
+    if codificador is not None:
+        return len(codificador.encode(texto))
+    return sum(
+        math.ceil(len(trecho) / 4) for trecho in _PALAVRA_OU_SIMBOLO.findall(texto)
+    )
+
+
+def resumir_analise(texto: str, limite_tokens: int, modelo: str = "gpt-4o-mini") -> str:
+    """Resume uma análise, por extração de frases, dentro de um limite de tokens.
+
+    A formatação Markdown e as frases repetidas são removidas, e as frases com
+    termos relevantes têm prioridade na ordem de `TERMOS_RELEVANTES`
+    (recomendações, riscos, pontos fortes e fracos...); as frases escolhidas são
+    mantidas na ordem original.
+
+    Args:
+        texto (str): A análise completa gerada pelo LLM.
+        limite_tokens (int): O número máximo de tokens do resumo.
+        modelo (str): O modelo usado na contagem de tokens.
+
+    Returns:
+        str: O resumo da análise.
+    """
+    limpo = re.sub(r"[#*_`>|]+", "", texto)
+    frases = [frase.strip(" -•\t") for frase in _FRASE.split(limpo)]
+    frases = list(dict.fromkeys(frase for frase in frases if len(frase) > 3))
+
+    def relevancia(i: int) -> tuple[int, int]:
+        frase = frases[i].lower()
+        termos = (j for j, termo in enumerate(TERMOS_RELEVANTES) if termo in frase)
+        return min(termos, default=len(TERMOS_RELEVANTES)), i
+
+    prioridade = sorted(range(len(frases)), key=relevancia)
+    escolhidas = set()
+    usados = 0
+    for i in prioridade:
+        tokens = contar_tokens(frases[i], modelo) + 1
+        if usados + tokens <= limite_tokens:
+            escolhidas.add(i)
+            usados += tokens
+    return " ".join(frases[i] for i in sorted(escolhidas))
+
+
+def montar_bloco_comparacao(
+    projetos: dict[str, tuple[str, dict]],
+    orcamento_tokens: int = ORCAMENTO_TOKENS_COMPARACAO,
+    modelo: str = "gpt-4o-mini",
+) -> tuple[str, dict]:
+    """Monta o bloco de projetos do prompt de comparação dentro de um orçamento.
+
+    Cada projeto entra com os KPIs estruturados e um resumo da sua análise; o
+    orçamento que sobra após os KPIs é dividido igualmente entre os resumos.
+
+    Args:
+        projetos (dict[str, tuple[str, dict]]): A análise e os KPIs de cada
+            projeto, indexados pelo nome (ex.: "Projeto A").
+        orcamento_tokens (int): O número máximo de tokens do bloco.
+        modelo (str): O modelo usado na contagem de tokens.
+
+    Returns:
+        tuple[str, dict]: O bloco compacto e um relatório com os tokens do bloco
+            completo, do bloco compacto e os tokens economizados.
+    """
+    estruturados = {
+        nome: f"ROI: {kpis['ROI']:.2f} | VPL: {kpis['VPL']:.2f} | Investimento Total: "
+        f"{kpis['Investimento Total']:.2f} | Retorno Total: {kpis['Retorno Total']:.2f}"
+        for nome, (_, kpis) in projetos.items()
+    }
+    tokens_fixos = sum(
+        contar_tokens(f"**{nome}:**\n{linha}\nResumo da análise:", modelo)
+        for nome, linha in estruturados.items()
+    )
+    limite_resumo = max(orcamento_tokens - tokens_fixos, 0) // max(len(projetos), 1)
+
+    bloco = "\n\n".join(
+        f"**{nome}:**\n{estruturados[nome]}\nResumo da análise: "
+        f"{resumir_analise(analise, limite_resumo, modelo)}"
+        for nome, (analise, _) in projetos.items()
+    )
+    completo = "\n\n".join(
+        f"**{nome}:**\nAnálise: {analise}\nROI: {kpis['ROI']:.2f}\nVPL: {kpis['VPL']:.2f}"
+        for nome, (analise, kpis) in projetos.items()
+    )
+    tokens_completo = contar_tokens(completo, modelo)
+    tokens_compacto = contar_tokens(bloco, modelo)
+    return bloco, {
+        "tokens_completo": tokens_completo,
+        "tokens_compacto": tokens_compacto,
+        "tokens_economizados": max(tokens_completo - tokens_compacto, 0),
+    }
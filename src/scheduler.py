@@ -0,0 +1,292 @@
+# Agendamento das chamadas ao LLM: cota de tokens e requisições, prioridades e
+# recuo exponencial após respostas 429
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from crewai import LLM
+
+from src.metrics import REGISTRO, RegistroMetricas
+from src.prompts import contar_tokens
+
+# Prioridades (menor é atendida antes): cliques na página passam à frente do lote
+PRIORIDADE_INTERATIVA = 0
+PRIORIDADE_LOTE = 10
+NOMES_PRIORIDADE = {PRIORIDADE_INTERATIVA: "interativa", PRIORIDADE_LOTE: "lote"}
+
+# Cota da implantação na Azure, por minuto (opcional; sem ela, apenas as respostas
+# 429 limitam o ritmo das chamadas)
+LIMITE_TPM = os.getenv("AZURE_OPENAI_TPM")
+LIMITE_RPM = os.getenv("AZURE_OPENAI_RPM")
+
+_prioridade_atual: ContextVar[int] = ContextVar(
+    "prioridade_atual", default=PRIORIDADE_INTERATIVA
+)
+
+
+@contextmanager
+def prioridade(nivel: int) -> Iterator[None]:
+    """Define a prioridade das chamadas ao LLM feitas dentro do bloco (nesta thread).
+
+    Args:
+        nivel (int): `PRIORIDADE_INTERATIVA`, `PRIORIDADE_LOTE` ou outro inteiro
+            (menor é atendido antes).
+    """
+    token = _prioridade_atual.set(nivel)
+    try:
+        yield
+    finally:
+        _prioridade_atual.reset(token)
+
+
+def _erro_original(erro: BaseException) -> BaseException:
+    """Retorna a primeira exceção da cadeia com status 429, ou o próprio erro.
+
+    No streaming, o CrewAI relança a falha do LiteLLM como uma `Exception` genérica;
+    a exceção original fica em `__context__`.
+    """
+    atual = erro
+    while atual is not None:
+        if getattr(atual, "status_code", None) == 429:
+            return atual
+        atual = atual.__cause__ or atual.__context__
+    return erro
+
+
+def cota_excedida(erro: BaseException) -> bool:
+    """Indica se o erro é uma resposta 429 (cota ou limite de taxa excedido)."""
+    return getattr(
+        _erro_original(erro), "status_code", None
+    ) == 429 or "RateLimitError" in str(erro)
+
+
+def _retry_after(erro: BaseException) -> float:
+    """Lê o cabeçalho Retry-After da resposta 429, se houver (em segundos)."""
+    resposta = getattr(_erro_original(erro), "response", None)
+    cabecalhos = getattr(resposta, "headers", None) or {}
+    try:
+        return float(cabecalhos.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _Balde:
+    """Um balde de fichas que se enche continuamente até a cota por minuto."""
+
+    def __init__(self, por_minuto: float):
+        self.capacidade = por_minuto
+        self.taxa = por_minuto / 60
+        self.nivel = por_minuto
+        self.atualizado = time.monotonic()
+
+    def _repor(self, agora: float) -> None:
+        self.nivel = min(
+            self.capacidade, self.nivel + (agora - self.atualizado) * self.taxa
+        )
+        self.atualizado = agora
+
+    def espera(self, quantidade: float, agora: float) -> float:
+        """Segundos até haver `quantidade` fichas (limitada à capacidade)."""
+        self._repor(agora)
+        return max(min(quantidade, self.capacidade) - self.nivel, 0) / self.taxa
+
+    def consumir(self, quantidade: float) -> None:
+        self.nivel -= min(quantidade, self.capacidade)
+
+    def esvaziar(self) -> None:
+        self.nivel = min(self.nivel, 0)
+
+
+class AgendadorLLM:
+    """Admite as chamadas ao LLM do processo dentro da cota, por ordem de prioridade.
+
+    Cada chamada espera na fila até ser a primeira (por prioridade e chegada) e
+    até haver fichas nos baldes de tokens por minuto (pelos tokens estimados do
+    prompt) e de requisições por minuto. Uma resposta 429 pausa todas as chamadas
+    por um recuo exponencial com variação aleatória (ou pelo Retry-After, se maior)
+    e a chamada volta à fila, até `max_tentativas` novas tentativas.
+    """
+
+    def __init__(
+        self,
+        limite_tpm: float | None = None,
+        limite_rpm: float | None = None,
+        max_tentativas: int = 6,
+        espera_base: float = 1.0,
+        espera_maxima: float = 60.0,
+        registro: RegistroMetricas = REGISTRO,
+    ):
+        """Inicializa o AgendadorLLM.
+
+        Args:
+            limite_tpm (float | None): Tokens por minuto da cota; None sem limite.
+            limite_rpm (float | None): Requisições por minuto; None sem limite.
+            max_tentativas (int): Quantas vezes repetir uma chamada após 429.
+            espera_base (float): O recuo da primeira repetição, em segundos.
+            espera_maxima (float): O recuo máximo, em segundos.
+            registro (RegistroMetricas): Onde publicar a fila e as esperas.
+        """
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.registro = registro
+        self._baldes = {
+            "tokens": _Balde(limite_tpm) if limite_tpm else None,
+            "requisicoes": _Balde(limite_rpm) if limite_rpm else None,
+        }
+        self._condicao = threading.Condition()
+        self._fila: list[tuple[int, int]] = []
+        self._sequencia = itertools.count()
+        self._pausado_ate = 0.0
+
+    @classmethod
+    def do_ambiente(cls) -> "AgendadorLLM":
+        """Cria o agendador com a cota de AZURE_OPENAI_TPM e AZURE_OPENAI_RPM."""
+        return cls(
+            float(LIMITE_TPM) if LIMITE_TPM else None,
+            float(LIMITE_RPM) if LIMITE_RPM else None,
+        )
+
+    @property
+    def profundidade_fila(self) -> int:
+        """O número de chamadas aguardando admissão."""
+        with self._condicao:
+            return len(self._fila)
+
+    def _publicar_fila(self) -> None:
+        """Atualiza o medidor da fila, por prioridade (com a condição adquirida)."""
+        contagem = dict.fromkeys(NOMES_PRIORIDADE.values(), 0)
+        for nivel, _ in self._fila:
+            nome = NOMES_PRIORIDADE.get(nivel, str(nivel))
+            contagem[nome] = contagem.get(nome, 0) + 1
+        for nome, quantidade in contagem.items():
+            self.registro.definir(
+                "roi_vision_agendador_fila",
+                quantidade,
+                "Chamadas ao LLM aguardando admissão, por prioridade.",
+                prioridade=nome,
+            )
+
+    def _admitir(self, tokens: int, nivel: int) -> float:
+        """Bloqueia até a chamada ser admitida e retorna o tempo de espera."""
+        inicio = time.monotonic()
+        entrada = (nivel, next(self._sequencia))
+        demandas = [
+            (balde, n)
+            for balde, n in [
+                (self._baldes["tokens"], tokens),
+                (self._baldes["requisicoes"], 1),
+            ]
+            if balde is not None
+        ]
+        with self._condicao:
+            heapq.heappush(self._fila, entrada)
+            self._publicar_fila()
+            self._condicao.notify_all()
+            try:
+                while True:
+                    espera = None
+                    if self._fila[0] == entrada:
+                        agora = time.monotonic()
+                        espera = max(
+                            [self._pausado_ate - agora]
+                            + [balde.espera(n, agora) for balde, n in demandas]
+                        )
+                        if espera <= 0:
+                            for balde, n in demandas:
+                                balde.consumir(n)
+                            break
+                    self._condicao.wait(espera)
+            finally:
+                self._fila.remove(entrada)
+                heapq.heapify(self._fila)
+                self._publicar_fila()
+                self._condicao.notify_all()
+        return time.monotonic() - inicio
+
+    def _recuar(self, tentativa: int, erro: BaseException) -> float:
+        """Pausa as admissões após uma resposta 429 e retorna a pausa aplicada."""
+        teto = min(self.espera_maxima, self.espera_base * 2**tentativa)
+        pausa = max(random.uniform(teto / 2, teto), _retry_after(erro))
+        with self._condicao:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + pausa)
+            if self._baldes["tokens"] is not None:
+                self._baldes["tokens"].esvaziar()
+            self._condicao.notify_all()
+        self.registro.incrementar(
+            "roi_vision_agendador_429_total",
+            descricao="Respostas 429 (cota excedida) recebidas do LLM.",
+        )
+        return pausa
+
+    def executar(
+        self, funcao: Callable[[], object], tokens: int, nivel: int | None = None
+    ):
+        """Executa uma chamada ao LLM quando admitida, repetindo-a após 429.
+
+        Args:
+            funcao (Callable[[], object]): A chamada ao LLM.
+            tokens (int): Os tokens estimados do prompt.
+            nivel (int | None): A prioridade; por padrão, a definida por
+                `prioridade` (interativa, se nenhuma).
+
+        Returns:
+            O resultado da chamada.
+        """
+        nivel = _prioridade_atual.get() if nivel is None else nivel
+        nome = NOMES_PRIORIDADE.get(nivel, str(nivel))
+        for tentativa in itertools.count():
+            espera = self._admitir(tokens, nivel)
+            self.registro.observar(
+                "roi_vision_agendador_espera_segundos",
+                espera,
+                "Tempo de espera das chamadas ao LLM na fila, em segundos.",
+                prioridade=nome,
+            )
+            try:
+                return funcao()
+            except Exception as erro:
+                if not cota_excedida(erro) or tentativa >= self.max_tentativas:
+                    raise
+                self._recuar(tentativa, erro)
+
+
+# Agendador compartilhado por todas as sessões e agentes do processo
+AGENDADOR = AgendadorLLM.do_ambiente()
+
+
+class LLMAgendado(LLM):
+    """Um LLM do CrewAI cujas chamadas passam pelo `AgendadorLLM`.
+
+    As respostas 429 que restam após as repetições curtas do cliente da OpenAI
+    chegam ao agendador, e o recuo passa a valer para todo o processo.
+    """
+
+    def __init__(self, *args, agendador: AgendadorLLM | None = None, **kwargs):
+        """Inicializa o LLMAgendado.
+
+        Args:
+            *args: Os argumentos do `LLM`.
+            agendador (AgendadorLLM | None): O agendador; por padrão, o `AGENDADOR`
+                do processo.
+            **kwargs: Os argumentos nomeados do `LLM`.
+        """
+        super().__init__(*args, **kwargs)
+        self.agendador = AGENDADOR if agendador is None else agendador
+
+    def call(self, messages, *args, **kwargs):
+        """Faz a chamada ao LLM quando o agendador a admitir."""
+        if isinstance(messages, str):
+            texto = messages
+        else:
+            texto = "\n".join(str(mensagem.get("content", "")) for mensagem in messages)
+        return self.agendador.executar(
+            lambda: super(LLMAgendado, self).call(messages, *args, **kwargs),
+            contar_tokens(texto, self.model),
+        )
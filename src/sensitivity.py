@@ -0,0 +1,214 @@
+# Análise de sensibilidade: varredura dos campos de um projeto e gráficos de tornado
+# e mapa de calor, sem dependência do Streamlit
+import io
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+from matplotlib.colors import TwoSlopeNorm
+from matplotlib.figure import Figure
+
+from src.kpis import CAMPOS_KPI, calcular_kpis_lote
+
+# Nomes exibidos dos campos que podem ser variados (os que influenciam os KPIs)
+ROTULOS_CAMPOS = {
+    "orcamento": "Orçamento",
+    "duracao": "Duração (meses)",
+    "custo_treinamento": "Custo de Treinamento",
+    "custo_implementacao": "Custo de Implementação",
+    "economia_custos": "Economia de Custos",
+    "aumento_receita": "Aumento de Receita",
+    "taxa_desconto": "Taxa de Desconto (%)",
+}
+
+
+def _validar_campos(campos) -> None:
+    """Garante que os campos variados influenciam os KPIs."""
+    invalidos = [campo for campo in campos if campo not in CAMPOS_KPI]
+    if invalidos:
+        raise ValueError(
+            f"Campos sem efeito nos KPIs: {', '.join(invalidos)}. "
+            f"Use um de: {', '.join(CAMPOS_KPI)}."
+        )
+
+
+def grade_relativa(
+    data: dict, campo: str, variacao: float = 0.2, pontos: int = 11
+) -> np.ndarray:
+    """Cria uma grade de valores em torno do valor atual de um campo (± variação).
+
+    Args:
+        data (dict): Um dicionário contendo os dados do projeto.
+        campo (str): O campo a variar (um de `CAMPOS_KPI`).
+        variacao (float): A variação relativa em cada sentido (0.2 para ±20%).
+        pontos (int): O número de valores da grade.
+
+    Returns:
+        np.ndarray: Os valores crescentes e sem repetição da grade (um só se o
+            valor atual for zero); para a duração, meses inteiros de no mínimo 1.
+    """
+    _validar_campos([campo])
+    valor = float(data[campo])
+    grade = np.linspace(valor * (1 - variacao), valor * (1 + variacao), pontos)
+    if campo == "duracao":
+        grade = np.maximum(np.round(grade), 1)
+    return np.unique(grade)
+
+
+def varrer(data: dict, grades: dict[str, Sequence[float]]) -> pd.DataFrame:
+    """Calcula os KPIs em todas as combinações das grades, em uma única passada.
+
+    Os campos fora de `grades` mantêm o valor de `data`. As combinações são
+    avaliadas por `calcular_kpis_lote`, sem laço em Python: uma grade 100×100
+    (10 mil cenários) leva poucos milissegundos.
+
+    Args:
+        data (dict): Um dicionário contendo os dados do projeto.
+        grades (dict[str, Sequence[float]]): Os valores de cada campo variado (ex.:
+            {"economia_custos": [...], "taxa_desconto": [...]}).
+
+    Returns:
+        pd.DataFrame: Uma linha por combinação, com os campos variados (o primeiro
+            varia mais devagar) seguidos de "ROI", "VPL", "Investimento Total",
+            "Retorno Total", "Payback" e "TIR".
+    """
+    _validar_campos(grades)
+    malhas = np.meshgrid(
+        *(np.asarray(valores, dtype=float) for valores in grades.values()),
+        indexing="ij",
+    )
+    variados = {campo: malha.ravel() for campo, malha in zip(grades, malhas)}
+    cenarios = malhas[0].size if malhas else 1
+    colunas = {
+        campo: variados.get(campo, np.full(cenarios, float(data[campo])))
+        for campo in CAMPOS_KPI
+    }
+    return pd.concat([pd.DataFrame(variados), calcular_kpis_lote(colunas)], axis=1)
+
+
+def tornado(
+    data: dict,
+    variacao: float = 0.2,
+    campos: Sequence[str] = CAMPOS_KPI,
+    kpi: str = "VPL",
+) -> pd.DataFrame:
+    """Calcula o efeito em um KPI de variar cada campo isoladamente (± variação).
+
+    Todos os cenários (o valor mínimo e o máximo de cada campo) são avaliados em
+    uma única chamada a `calcular_kpis_lote`.
+
+    Args:
+        data (dict): Um dicionário contendo os dados do projeto.
+        variacao (float): A variação relativa de cada campo (0.2 para ±20%).
+        campos (Sequence[str]): Os campos a variar.
+        kpi (str): O KPI observado ("ROI", "VPL", "Investimento Total" ou
+            "Retorno Total").
+
+    Returns:
+        pd.DataFrame: Uma linha por campo (o índice), da maior para a menor
+            amplitude, com "Valor Baixo" e "Valor Alto" (os valores do campo),
+            "Baixo" e "Alto" (o KPI em cada um) e "Amplitude".
+    """
+    _validar_campos(campos)
+    extremos = np.array(
+        [grade_relativa(data, campo, variacao, pontos=2)[[0, -1]] for campo in campos]
+    )
+    colunas = {
+        campo: np.full(2 * len(campos), float(data[campo])) for campo in CAMPOS_KPI
+    }
+    for i, campo in enumerate(campos):
+        colunas[campo][2 * i : 2 * i + 2] = extremos[i]
+    resultado = calcular_kpis_lote(colunas)[kpi].to_numpy().reshape(-1, 2)
+
+    tabela = pd.DataFrame(
+        {
+            "Valor Baixo": extremos[:, 0],
+            "Valor Alto": extremos[:, 1],
+            "Baixo": resultado[:, 0],
+            "Alto": resultado[:, 1],
+            "Amplitude": np.abs(resultado[:, 1] - resultado[:, 0]),
+        },
+        index=pd.Index(list(campos), name="campo"),
+    )
+    return tabela.sort_values("Amplitude", ascending=False, kind="stable")
+
+
+# --- Gráficos ---
+# Figuras criadas sem o `pyplot`, que guarda estado global e não é seguro entre as
+# sessões simultâneas do Streamlit
+def grafico_tornado(tabela: pd.DataFrame, base: float, kpi: str = "VPL") -> Figure:
+    """Desenha o gráfico de tornado de `tornado`.
+
+    Args:
+        tabela (pd.DataFrame): O resultado de `tornado`.
+        base (float): O KPI com os dados atuais (o eixo central das barras).
+        kpi (str): O nome do KPI, para o eixo horizontal.
+
+    Returns:
+        Figure: A figura do Matplotlib (convertida em PNG por `figura_png`).
+    """
+    figura = Figure(figsize=(7, 0.5 * len(tabela) + 1.2))
+    eixo = figura.subplots()
+    # Do maior efeito (em cima) para o menor
+    tabela = tabela.iloc[::-1]
+    posicoes = np.arange(len(tabela))
+    rotulos = [ROTULOS_CAMPOS.get(campo, campo) for campo in tabela.index]
+    eixo.barh(
+        posicoes, tabela["Baixo"] - base, left=base, color="tab:red", label="Baixo"
+    )
+    eixo.barh(
+        posicoes, tabela["Alto"] - base, left=base, color="tab:green", label="Alto"
+    )
+    eixo.axvline(base, color="black", linewidth=1)
+    eixo.set_yticks(posicoes, rotulos)
+    eixo.set_xlabel(kpi)
+    eixo.legend(title="Valor do campo", loc="lower right")
+    figura.tight_layout()
+    return figura
+
+
+def grafico_mapa_calor(
+    varredura: pd.DataFrame, campo_x: str, campo_y: str, kpi: str = "VPL"
+) -> Figure:
+    """Desenha um KPI sobre a grade de dois campos de `varrer`.
+
+    Quando o KPI muda de sinal na grade, a linha de equilíbrio (KPI igual a zero)
+    é destacada.
+
+    Args:
+        varredura (pd.DataFrame): O resultado de `varrer` com os dois campos.
+        campo_x (str): O campo do eixo horizontal.
+        campo_y (str): O campo do eixo vertical.
+        kpi (str): O KPI exibido nas cores.
+
+    Returns:
+        Figure: A figura do Matplotlib (convertida em PNG por `figura_png`).
+    """
+    tabela = varredura.pivot(index=campo_y, columns=campo_x, values=kpi)
+    valores = tabela.to_numpy()
+    muda_de_sinal = np.nanmin(valores) < 0 < np.nanmax(valores)
+    figura = Figure(figsize=(7, 5))
+    eixo = figura.subplots()
+    # Com sinais mistos, o zero fica no centro da escala (vermelho é negativo)
+    malha = eixo.pcolormesh(
+        tabela.columns,
+        tabela.index,
+        valores,
+        shading="nearest",
+        cmap="RdYlGn",
+        norm=TwoSlopeNorm(vcenter=0) if muda_de_sinal else None,
+    )
+    figura.colorbar(malha, ax=eixo, label=kpi)
+    if muda_de_sinal and min(valores.shape) > 1:
+        eixo.contour(tabela.columns, tabela.index, valores, levels=[0], colors="black")
+    eixo.set_xlabel(ROTULOS_CAMPOS.get(campo_x, campo_x))
+    eixo.set_ylabel(ROTULOS_CAMPOS.get(campo_y, campo_y))
+    figura.tight_layout()
+    return figura
+
+
+def figura_png(figura: Figure, dpi: int = 150) -> bytes:
+    """Renderiza a figura em PNG (o desenho custa mais que a varredura)."""
+    buffer = io.BytesIO()
+    figura.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
@@ -0,0 +1,177 @@
+# Índice de referência por ramo de atuação: a posição dos KPIs de um projeto entre
+# os projetos já calculados do mesmo ramo, local e determinística (sem o LLM)
+import threading
+
+import numpy as np
+import pandas as pd
+
+# KPIs indexados (no payback, um valor menor é melhor)
+KPIS_SETOR = ("ROI", "VPL", "Payback")
+
+# Quantos projetos do ramo, com o KPI finito, são necessários para informar a
+# posição nesse KPI
+MINIMO_PROJETOS = 5
+
+
+def _quantil(ordenados: np.ndarray, q: float) -> float:
+    """Calcula o quantil de um array já ordenado, com interpolação linear, sem
+    percorrê-lo."""
+    posicao = q * (len(ordenados) - 1)
+    abaixo = int(posicao)
+    acima = min(abaixo + 1, len(ordenados) - 1)
+    fracao = posicao - abaixo
+    return float(ordenados[abaixo] + fracao * (ordenados[acima] - ordenados[abaixo]))
+
+
+class IndiceSetorial:
+    """Os KPIs dos projetos de cada ramo de atuação, em arrays ordenados.
+
+    O percentil de um projeto é obtido por busca binária, em O(log n), e os
+    quartis por acesso direto às posições. Cada projeto (identificado pelo hash
+    das entradas, quando informado) entra uma única vez; um KPI não finito (como o
+    payback de um projeto que não se paga) fica fora do array, que então tem menos
+    projetos que o ramo. As inserções trocam o
+    array do KPI por um novo, sob uma trava; as leituras, feitas por várias
+    sessões ao mesmo tempo, não precisam dela.
+    """
+
+    def __init__(self):
+        """Inicializa o IndiceSetorial, vazio."""
+        self._valores: dict[str, dict[str, np.ndarray]] = {}
+        self._projetos: dict[str, int] = {}
+        self._chaves: set[str] = set()
+        self._trava = threading.Lock()
+
+    @classmethod
+    def de_tabela(cls, tabela: pd.DataFrame) -> "IndiceSetorial":
+        """Cria o índice a partir de uma tabela de projetos com os KPIs.
+
+        Args:
+            tabela (pd.DataFrame): Um projeto por linha, com "ramo_atuacao", os
+                KPIs de `KPIS_SETOR` e, opcionalmente, "hash_entrada".
+
+        Returns:
+            IndiceSetorial: O índice com os projetos da tabela.
+        """
+        indice = cls()
+        indice.adicionar_lote(tabela)
+        return indice
+
+    @classmethod
+    def do_historico(cls, historico) -> "IndiceSetorial":
+        """Cria o índice com os projetos analisados guardados no histórico.
+
+        Args:
+            historico (HistoricoAnalises): O histórico das análises.
+
+        Returns:
+            IndiceSetorial: O índice com um projeto por entrada distinta.
+        """
+        return cls.de_tabela(historico.kpis_por_ramo())
+
+    def adicionar(self, ramo: str, kpis: dict, chave: str | None = None) -> bool:
+        """Acrescenta um projeto, mantendo os arrays ordenados.
+
+        Args:
+            ramo (str): O ramo de atuação do projeto.
+            kpis (dict): Os KPIs do projeto (os não finitos são ignorados).
+            chave (str | None): O hash das entradas do projeto, para não contá-lo
+                duas vezes.
+
+        Returns:
+            bool: Se o projeto foi acrescentado (False se a chave já existia).
+        """
+        with self._trava:
+            if chave is not None:
+                if chave in self._chaves:
+                    return False
+                self._chaves.add(chave)
+            valores = self._valores.setdefault(
+                ramo, {kpi: np.empty(0) for kpi in KPIS_SETOR}
+            )
+            for kpi in KPIS_SETOR:
+                valor = float(kpis.get(kpi, np.nan))
+                if np.isfinite(valor):
+                    ordenados = valores[kpi]
+                    posicao = np.searchsorted(ordenados, valor)
+                    valores[kpi] = np.insert(ordenados, posicao, valor)
+            self._projetos[ramo] = self._projetos.get(ramo, 0) + 1
+        return True
+
+    def adicionar_lote(self, tabela: pd.DataFrame) -> None:
+        """Acrescenta vários projetos, reordenando cada ramo uma única vez.
+
+        Args:
+            tabela (pd.DataFrame): Um projeto por linha, com "ramo_atuacao", os
+                KPIs de `KPIS_SETOR` e, opcionalmente, "hash_entrada".
+        """
+        tabela = tabela.dropna(subset=["ramo_atuacao"])
+        with self._trava:
+            if "hash_entrada" in tabela.columns:
+                novos = ~tabela["hash_entrada"].isin(self._chaves)
+                tabela = tabela[novos & ~tabela["hash_entrada"].duplicated()]
+                self._chaves.update(tabela["hash_entrada"])
+            for ramo, grupo in tabela.groupby("ramo_atuacao"):
+                valores = self._valores.setdefault(
+                    ramo, {kpi: np.empty(0) for kpi in KPIS_SETOR}
+                )
+                for kpi in KPIS_SETOR:
+                    novos = grupo[kpi].to_numpy(dtype=float)
+                    valores[kpi] = np.sort(
+                        np.concatenate([valores[kpi], novos[np.isfinite(novos)]])
+                    )
+                self._projetos[ramo] = self._projetos.get(ramo, 0) + len(grupo)
+
+    def ramos(self) -> dict[str, int]:
+        """Retorna o número de projetos de cada ramo, em ordem alfabética."""
+        return dict(sorted(self._projetos.items()))
+
+    def percentil(self, ramo: str, kpi: str, valor: float) -> float:
+        """Calcula a porcentagem dos projetos do ramo com o KPI menor que o valor.
+
+        Os empates contam pela metade, então um valor igual à mediana fica no
+        percentil 50.
+
+        Args:
+            ramo (str): O ramo de atuação.
+            kpi (str): O KPI (um de `KPIS_SETOR`).
+            valor (float): O valor do KPI do projeto.
+
+        Returns:
+            float: O percentil, de 0 a 100; NaN sem valores no ramo ou se o valor
+                não for um número.
+        """
+        ordenados = self._valores.get(ramo, {}).get(kpi, np.empty(0))
+        if not len(ordenados) or np.isnan(valor):
+            return np.nan
+        abaixo = np.searchsorted(ordenados, valor, side="left")
+        ate = np.searchsorted(ordenados, valor, side="right")
+        return float((abaixo + ate) / 2 / len(ordenados) * 100)
+
+    def posicionar(self, ramo: str, kpis: dict) -> dict | None:
+        """Posiciona um projeto entre os do seu ramo, como contexto numérico.
+
+        Args:
+            ramo (str): O ramo de atuação do projeto.
+            kpis (dict): Os KPIs do projeto.
+
+        Returns:
+            dict | None: O "ramo" e, para cada KPI de `KPIS_SETOR` com ao menos
+                `MINIMO_PROJETOS` valores finitos no ramo, o número de "projetos"
+                com o KPI, o "percentil" do projeto e os quartis "P25", "P50" e
+                "P75" do ramo; None se nenhum KPI tiver projetos suficientes.
+        """
+        posicao = {"ramo": ramo}
+        for kpi in KPIS_SETOR:
+            ordenados = self._valores.get(ramo, {}).get(kpi, np.empty(0))
+            if len(ordenados) < MINIMO_PROJETOS:
+                continue
+            posicao[kpi] = {
+                "projetos": len(ordenados),
+                "percentil": self.percentil(ramo, kpi, float(kpis.get(kpi, np.nan))),
+                **{
+                    f"P{int(q * 100)}": _quantil(ordenados, q)
+                    for q in (0.25, 0.5, 0.75)
+                },
+            }
+        return posicao if len(posicao) > 1 else None
@@ -0,0 +1,122 @@
+from unittest import mock
+
+from crewai import LLM, Agent
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+
+from src.agents import (
+    ResultAnalyzerAgent,
+    dividir_analise,
+    montar_analise,
+    resposta_parcial,
+)
+from src.cache import CacheAnalises
+
+PROJETO = {
+    "orcamento": 100000.0,
+    "funcionarios": 100,
+    "duracao": 12,
+    "custo_treinamento": 5000.0,
+    "custo_implementacao": 10000.0,
+    "economia_custos": 8000.0,
+    "aumento_receita": 15000.0,
+    "taxa_desconto": 10.0,
+    "risco_falha": 5.0,
+    "gestao_mudanca": "Fácil",
+    "ramo_atuacao": "TI - IA",
+}
+KPIS = {
+    "ROI": 130.43,
+    "VPL": 41714.91,
+    "Investimento Total": 115000.0,
+    "Retorno Total": 276000.0,
+    "Payback": 5.0,
+    "TIR": 18.2,
+}
+
+
+def test_secoes_regeneradas_apenas_quando_as_suas_entradas_mudam(tmp_path):
+    chamadas = []
+
+    def executar(agente, task, context=None, tools=None):
+        # Uma chamada pede todas as seções que faltam, cada uma sob "### <título>"
+        titulos = [
+            linha.strip()[4:]
+            for linha in task.description.splitlines()
+            if linha.strip().startswith("### ")
+        ]
+        chamadas.append(titulos)
+        resposta = "".join(f"### {titulo}\nTexto de {titulo}.\n" for titulo in titulos)
+        transmitido = f"Thought: pronto\nFinal Answer: {resposta}"
+        for inicio in range(0, len(transmitido), 7):
+            crewai_event_bus.emit(
+                agente, LLMStreamChunkEvent(chunk=transmitido[inicio : inicio + 7])
+            )
+        return resposta
+
+    analisador = ResultAnalyzerAgent(
+        LLM(model="azure/gpt-4o-mini", temperature=0.1), CacheAnalises(tmp_path)
+    )
+    recebidos = {}
+
+    def receptor(secao):
+        return lambda token: recebidos.update({secao: recebidos.get(secao, "") + token})
+
+    with mock.patch.object(Agent, "execute_task", executar):
+        analise = analisador.analyze_project(KPIS, PROJETO)
+        assert len(chamadas) == 1 and len(chamadas[0]) == 5
+        chamadas.clear()
+        analisador.analyze_project(
+            KPIS, {**PROJETO, "gestao_mudanca": "Difícil"}, receptor_secao=receptor
+        )
+
+    assert chamadas == [["Gestão de Mudança", "Recomendações"]]
+    # As seções do cache são repassadas de uma vez; as geradas, pelos títulos
+    assert resposta_parcial(recebidos["riscos"]) == "Texto de Riscos."
+    assert (
+        resposta_parcial(recebidos["gestao_mudanca"]) == "Texto de Gestão de Mudança."
+    )
+    assert analise.index("### Pontos Fortes") < analise.index("### Recomendações")
+    assert "Texto de Pontos Fracos." in analise
+    assert analise.endswith("revise._")
+
+
+def test_dividir_analise_pelos_titulos():
+    texto = "Intro.\n### **Riscos:**\nAlto.\n#### Detalhe\nX.\n## Recomendações\nFaça."
+    assert dividir_analise(texto, ["riscos", "recomendacoes"]) == {
+        "riscos": "Alto.\n#### Detalhe\nX.",
+        "recomendacoes": "Faça.",
+    }
+    assert dividir_analise("Sem títulos.", ["riscos"]) == {}
+
+
+def test_montar_analise_omite_secoes_vazias():
+    assert montar_analise({}) == ""
+    parcial = montar_analise({"riscos": "Alto.", "pontos_fortes": " ", "outra": "X"})
+    assert parcial.startswith("### Riscos\n\nAlto.")
+    assert "Pontos Fortes" not in parcial and "X" not in parcial
+
+
+def test_posicao_no_ramo_so_nas_secoes_que_a_usam(tmp_path):
+    analisador = ResultAnalyzerAgent(
+        LLM(model="azure/gpt-4o-mini", temperature=0.1), CacheAnalises(tmp_path)
+    )
+    quartis = {"P25": 10.0, "P50": 20.0, "P75": 30.0}
+    setor = {
+        "ramo": "TI - IA",
+        "ROI": {"projetos": 12, "percentil": 83.3, **quartis},
+        "Payback": {"projetos": 7, "percentil": 25.0, **quartis},
+    }
+
+    fortes = analisador.create_section_task(
+        "pontos_fortes", KPIS, PROJETO, setor=setor
+    ).description
+    mudanca = analisador.create_section_task(
+        "gestao_mudanca", KPIS, PROJETO, setor=setor
+    ).description
+
+    assert "Posição entre os projetos do ramo TI - IA" in fortes
+    assert (
+        "ROI: percentil 83 entre 12 projetos; P25 / P50 / P75 do ramo: 10.00" in fortes
+    )
+    assert "Payback (menor é melhor): percentil 25 entre 7 projetos" in fortes
+    assert "percentil" not in mudanca
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+RAIZ_PROJETO = Path(__file__).resolve().parents[1]
+
+
+def test_calculadora_calcula_kpis_sem_carregar_o_crewai(tmp_path):
+    # Em um processo novo: os testes dos agentes já importam o CrewAI neste
+    codigo = textwrap.dedent(
+        """
+        import sys
+
+        from streamlit.testing.v1 import AppTest
+
+        app = AppTest.from_file("src/app.py", default_timeout=120)
+        app.run()
+        app.sidebar.radio[0].set_value("Calculadora de ROI").run()
+        assert not app.exception, [erro.value for erro in app.exception]
+        assert any("VPL" in tabela.value.columns for tabela in app.dataframe)
+        assert "crewai" not in sys.modules
+        assert not any(nome.startswith("litellm") for nome in sys.modules)
+        """
+    )
+    resultado = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=RAIZ_PROJETO,
+        env={
+            **os.environ,
+            "PYTHONPATH": str(RAIZ_PROJETO),
+            "ROI_CACHE_DIR": str(tmp_path),
+        },
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+    assert resultado.returncode == 0, resultado.stderr[-2000:]
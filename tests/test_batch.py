@@ -0,0 +1,59 @@
+import pandas as pd
+
+from src.batch import main
+from src.kpis import calcular_kpis_lote, taxa_mensal
+from tests.test_kpis import gerar_projetos
+
+
+def test_batch_calcula_kpis_em_varios_processos(tmp_path):
+    projetos = gerar_projetos(250)
+    projetos.to_csv(tmp_path / "projetos.csv", index=False)
+
+    main(
+        [
+            str(tmp_path / "projetos.csv"),
+            str(tmp_path / "resultados.parquet"),
+            "--processos",
+            "2",
+            "--tamanho-lote",
+            "100",
+        ]
+    )
+
+    resultados = pd.read_parquet(tmp_path / "resultados.parquet")
+    esperado = calcular_kpis_lote(projetos)
+    assert len(resultados) == 250
+    pd.testing.assert_frame_equal(resultados[esperado.columns], esperado)
+    pd.testing.assert_frame_equal(resultados[projetos.columns], projetos)
+
+
+def test_batch_grava_kpis_numericos_em_arrow(tmp_path):
+    projetos = gerar_projetos(20)
+    projetos.to_parquet(tmp_path / "projetos.parquet", index=False)
+
+    main([str(tmp_path / "projetos.parquet"), str(tmp_path / "resultados.arrow")])
+
+    resultados = pd.read_feather(tmp_path / "resultados.arrow")
+    pd.testing.assert_frame_equal(
+        resultados[["ROI", "VPL", "Payback", "TIR"]],
+        calcular_kpis_lote(projetos)[["ROI", "VPL", "Payback", "TIR"]],
+    )
+
+
+def test_batch_converte_taxas_anuais(tmp_path):
+    projetos = gerar_projetos(20)
+    projetos.to_parquet(tmp_path / "projetos.parquet", index=False)
+
+    main(
+        [
+            str(tmp_path / "projetos.parquet"),
+            str(tmp_path / "resultados.parquet"),
+            "--taxa-anual",
+        ]
+    )
+
+    resultados = pd.read_parquet(tmp_path / "resultados.parquet")
+    mensais = projetos.assign(taxa_desconto=taxa_mensal(projetos["taxa_desconto"]))
+    pd.testing.assert_series_equal(
+        resultados["VPL"], calcular_kpis_lote(mensais)["VPL"]
+    )
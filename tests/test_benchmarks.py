@@ -0,0 +1,15 @@
+from benchmarks.suite import comparar
+
+
+def test_comparar_aponta_apenas_pioras_acima_do_limite():
+    referencia = {"kpis/calcular_vpl/12m": 1.0, "memoria/ranking/10000": 1000}
+    atual = {
+        "kpis/calcular_vpl/12m": 1.2,
+        "memoria/ranking/10000": 1500,
+        "kpis/nova_medida": 5.0,
+    }
+
+    regressoes = comparar(referencia, atual, limite=0.25)
+
+    assert len(regressoes) == 1
+    assert regressoes[0].startswith("memoria/ranking/10000")
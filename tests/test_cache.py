@@ -0,0 +1,55 @@
+import time
+
+from src.cache import CacheAnalises
+
+
+def test_chave_ignora_indentacao_e_diferencia_modelo_e_temperatura():
+    prompt = """Analise os seguintes KPIs do projeto:
+            ROI: 10.00
+
+            VPL: 5.00
+            """
+
+    chave = CacheAnalises.chave(prompt, "azure/gpt-4o-mini", 0.1)
+
+    assert chave == CacheAnalises.chave(
+        "Analise os seguintes KPIs do projeto:\nROI: 10.00\nVPL: 5.00",
+        "azure/gpt-4o-mini",
+        0.1,
+    )
+    assert chave != CacheAnalises.chave(prompt, "azure/gpt-4o", 0.1)
+    assert chave != CacheAnalises.chave(prompt, "azure/gpt-4o-mini", 0.7)
+
+
+def test_cache_persiste_entre_instancias(tmp_path):
+    CacheAnalises(tmp_path).salvar("chave", "Análise do projeto")
+
+    assert CacheAnalises(tmp_path).obter("chave") == "Análise do projeto"
+    assert CacheAnalises(tmp_path).obter("outra") is None
+
+
+def test_cache_expira_pelo_ttl(tmp_path):
+    cache = CacheAnalises(tmp_path, ttl_segundos=0.05)
+    cache.salvar("chave", "Análise do projeto")
+    time.sleep(0.1)
+
+    assert cache.obter("chave") is None
+
+
+def test_cache_descarta_as_menos_usadas(tmp_path):
+    cache = CacheAnalises(tmp_path, max_entradas=2)
+    cache.salvar("a", "1")
+    cache.salvar("b", "2")
+    cache.obter("a")
+    cache.salvar("c", "3")
+
+    assert cache.obter("a") == "1"
+    assert cache.obter("b") is None
+    assert cache.obter("c") == "3"
+
+    limitado_por_tamanho = CacheAnalises(tmp_path / "bytes", max_bytes=10)
+    limitado_por_tamanho.salvar("a", "12345")
+    limitado_por_tamanho.salvar("b", "123456")
+
+    assert limitado_por_tamanho.obter("a") is None
+    assert limitado_por_tamanho.obter("b") == "123456"
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.history import HistoricoAnalises
+
+PROJETO = {
+    "projeto": "Projeto A",
+    "orcamento": 100000.0,
+    "funcionarios": 100,
+    "duracao": 12,
+    "custo_treinamento": 5000.0,
+    "custo_implementacao": 10000.0,
+    "economia_custos": 8000.0,
+    "aumento_receita": 15000.0,
+    "taxa_desconto": 10.0,
+    "risco_falha": 5.0,
+    "gestao_mudanca": "Fácil",
+    "ramo_atuacao": "TI - IA",
+}
+KPIS = {"ROI": "130.43", "VPL": "41714.91", "Payback": "nan"}
+
+
+def test_analise_e_comparacao_reaproveitadas_pelas_entradas(tmp_path):
+    historico = HistoricoAnalises(tmp_path)
+    projeto_b = {**PROJETO, "projeto": "Projeto B", "orcamento": 150000.0}
+    historico.registrar_analise(PROJETO, KPIS, "Análise A", "azure/gpt-4o-mini")
+    historico.registrar_comparacao(
+        PROJETO, projeto_b, "A é melhor", "azure/gpt-4o-mini"
+    )
+
+    # Outro nome e números inteiros: as mesmas entradas
+    mesmo = {**PROJETO, "projeto": "Cópia", "orcamento": 100000}
+    assert HistoricoAnalises(tmp_path).buscar_analise(mesmo, "azure/gpt-4o-mini") == (
+        "Análise A"
+    )
+    assert historico.buscar_analise(mesmo, "azure/gpt-4o") is None
+    assert historico.buscar_analise(projeto_b, "azure/gpt-4o-mini") is None
+    assert (
+        historico.buscar_comparacao(mesmo, projeto_b, "azure/gpt-4o-mini")
+        == "A é melhor"
+    )
+    assert historico.buscar_comparacao(projeto_b, mesmo, "azure/gpt-4o-mini") is None
+
+
+def test_reaproveitamento_exige_a_mesma_versao_dentro_do_ttl(tmp_path):
+    historico = HistoricoAnalises(tmp_path)
+    projeto_b = {**PROJETO, "projeto": "Projeto B", "orcamento": 150000.0}
+    historico.registrar_analise(PROJETO, KPIS, "Análise A", "m", versao="v1")
+    historico.registrar_comparacao(PROJETO, projeto_b, "A é melhor", "m", versao="v1")
+
+    assert historico.buscar_analise(PROJETO, "m", "v1") == "Análise A"
+    # Prompts, posição no ramo ou configuração diferentes: outra versão
+    assert historico.buscar_analise(PROJETO, "m", "v2") is None
+    assert historico.buscar_analise(PROJETO, "m") is None
+    assert historico.buscar_comparacao(PROJETO, projeto_b, "m", "v1") == "A é melhor"
+    assert historico.buscar_comparacao(PROJETO, projeto_b, "m", "v2") is None
+
+    # Expiradas: não são reaproveitadas, mas continuam no histórico
+    expirado = HistoricoAnalises(tmp_path, ttl_segundos=-1)
+    assert expirado.buscar_analise(PROJETO, "m", "v1") is None
+    assert expirado.buscar_comparacao(PROJETO, projeto_b, "m", "v1") is None
+    assert len(expirado.consultar()) == 1
+
+
+def test_semelhantes_do_mesmo_ramo_ordenados_pela_diferenca(tmp_path):
+    historico = HistoricoAnalises(tmp_path)
+    for nome, orcamento, ramo in [
+        ("Perto", 105000.0, "TI - IA"),
+        ("Longe", 120000.0, "TI - IA"),
+        ("Fora da tolerância", 200000.0, "TI - IA"),
+        ("Outro ramo", 100000.0, "Agronomia"),
+    ]:
+        dados = {
+            **PROJETO,
+            "projeto": nome,
+            "orcamento": orcamento,
+            "ramo_atuacao": ramo,
+        }
+        historico.registrar_analise(dados, KPIS, f"Análise {nome}", "m", None, 2.5)
+    historico.registrar_analise(
+        {**PROJETO, "projeto": "Perto", "orcamento": 105000.0}, KPIS, "Refeita", "m"
+    )
+
+    semelhantes = historico.semelhantes(PROJETO)
+
+    assert semelhantes["projeto"].tolist() == ["Perto", "Longe"]
+    assert semelhantes["analise"].tolist() == ["Refeita", "Análise Longe"]
+    assert semelhantes["distancia"].is_monotonic_increasing
+    assert historico.semelhantes(PROJETO, modelo="outro").empty
+
+
+def test_consulta_por_filtros_e_exportacao_parquet(tmp_path):
+    historico = HistoricoAnalises(tmp_path)
+    historico.registrar_analise(PROJETO, KPIS, "Análise A", "m", {"VPL P5": -10.0}, 3.0)
+    historico.registrar_analise(
+        {**PROJETO, "projeto": "Projeto B", "ramo_atuacao": "Agronomia"},
+        KPIS,
+        "Análise B",
+        "m",
+    )
+
+    assert historico.ramos_atuacao() == ["Agronomia", "TI - IA"]
+    tabela = historico.consultar(ramo_atuacao="TI - IA")
+    assert tabela["projeto"].tolist() == ["Projeto A"]
+    assert tabela.loc[0, "VPL"] == 41714.91 and pd.isna(tabela.loc[0, "Payback"])
+    assert tabela.loc[0, "VPL P5"] == -10.0
+    assert historico.consultar(desde=datetime.now() + timedelta(days=1)).empty
+
+    caminho = tmp_path / "exportacao" / "historico.parquet"
+    assert historico.exportar_parquet(caminho) == 2
+    exportado = pd.read_parquet(caminho)
+    assert exportado["analise"].tolist() == ["Análise B", "Análise A"]
+    assert exportado["duracao_segundos"].iloc[1] == 3.0
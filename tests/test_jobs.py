@@ -0,0 +1,80 @@
+import threading
+
+from src.jobs import CONCLUIDO, ERRO, GerenciadorTrabalhos, Trabalho
+from src.metrics import RegistroMetricas
+
+
+def test_pedidos_identicos_simultaneos_executam_uma_vez():
+    gerenciador = GerenciadorTrabalhos(registro=RegistroMetricas())
+    liberar = threading.Event()
+    execucoes = []
+
+    def analisar(trabalho):
+        execucoes.append(trabalho.chave)
+        receber = trabalho.receptor("A")
+        receber("Ótimo ")
+        liberar.wait(5)
+        receber("projeto.")
+        return {"A": "Ótimo projeto."}
+
+    chave = GerenciadorTrabalhos.chave({"orcamento": 100_000.0}, True)
+    primeiro = gerenciador.submeter(chave, analisar)
+    segundo = gerenciador.submeter(chave, analisar)
+    liberar.set()
+    estado = segundo.aguardar()
+    while estado["estado"] != CONCLUIDO:
+        estado = segundo.aguardar(estado["versao"], timeout=5)
+
+    assert primeiro is segundo
+    assert execucoes == [chave]
+    assert estado["textos"] == {"A": "Ótimo projeto."}
+    assert estado["resultado"] == {"A": "Ótimo projeto."}
+    assert (
+        gerenciador.registro.valor("roi_vision_trabalhos_total", resultado="anexado")
+        == 1
+    )
+
+
+def test_trabalho_com_erro_ou_sem_reaproveitamento_e_refeito():
+    gerenciador = GerenciadorTrabalhos(registro=RegistroMetricas())
+    tentativas = []
+
+    def analisar(trabalho):
+        tentativas.append(trabalho)
+        if len(tentativas) == 1:
+            raise TimeoutError("sem resposta")
+        return {"A": "ok"}
+
+    def concluir(trabalho):
+        estado = trabalho.aguardar()
+        while estado["estado"] not in (CONCLUIDO, ERRO):
+            estado = trabalho.aguardar(estado["versao"], timeout=5)
+        return estado
+
+    chave = GerenciadorTrabalhos.chave("projeto")
+    assert concluir(gerenciador.submeter(chave, analisar))["erro"] == (
+        "TimeoutError: sem resposta"
+    )
+    refeito = gerenciador.submeter(chave, analisar)
+    assert concluir(refeito)["resultado"] == {"A": "ok"}
+    assert gerenciador.submeter(chave, analisar) is refeito
+    novo = gerenciador.submeter(chave, analisar, reaproveitar_concluido=False)
+    assert novo is not refeito
+    assert concluir(novo)["estado"] == CONCLUIDO
+    assert len(tentativas) == 3
+
+
+def test_limpeza_tolera_trabalho_concluido_sem_horario():
+    # Outra sessão pode ler o trabalho no meio de `_atualizar`, sem a condição
+    gerenciador = GerenciadorTrabalhos(retencao_segundos=0, registro=RegistroMetricas())
+    pela_metade = Trabalho("pela metade")
+    pela_metade.estado = CONCLUIDO
+    gerenciador._trabalhos[pela_metade.chave] = pela_metade
+
+    trabalho = gerenciador.submeter("outro", lambda trabalho: {"A": "ok"})
+
+    estado = trabalho.aguardar()
+    while estado["estado"] != CONCLUIDO:
+        estado = trabalho.aguardar(estado["versao"], timeout=5)
+    assert trabalho.concluido_em is not None
+    assert gerenciador.obter("pela metade") is pela_metade
@@ -0,0 +1,269 @@
+import numpy as np
+import pandas as pd
+import pytest
+from crewai import LLM
+
+from src.agents import KPICalculatorAgent
+from src.kpis import (
+    calcular_kpis_fluxos,
+    calcular_kpis_lote,
+    calcular_payback,
+    calcular_tir,
+    calcular_vpl,
+    fatores_desconto,
+    ranquear_projetos,
+    simular_risco,
+    taxa_anual,
+    taxa_mensal,
+    valor_presente,
+    vpl_projeto,
+)
+
+llm = LLM(model="azure/gpt-4o-mini", temperature=0.1)
+
+PROJETO = {
+    "orcamento": 100000.0,
+    "funcionarios": 100,
+    "duracao": 12,
+    "custo_treinamento": 5000.0,
+    "custo_implementacao": 10000.0,
+    "economia_custos": 8000.0,
+    "aumento_receita": 15000.0,
+    "taxa_desconto": 10.0,
+    "risco_falha": 5.0,
+    "gestao_mudanca": "Fácil",
+    "ramo_atuacao": "TI - IA",
+}
+
+
+def gerar_projetos(n: int, semente: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame(
+        {
+            "orcamento": rng.uniform(10_000, 500_000, n).round(2),
+            "duracao": rng.integers(1, 121, n),
+            "custo_treinamento": rng.uniform(0, 20_000, n).round(2),
+            "custo_implementacao": rng.uniform(0, 50_000, n).round(2),
+            "economia_custos": rng.uniform(0, 30_000, n).round(2),
+            "aumento_receita": rng.uniform(0, 30_000, n).round(2),
+            "taxa_desconto": rng.choice([0.0, 0.5, 1.0, 10.0, 12.0], n),
+        }
+    )
+
+
+def test_kpis_lote_igual_ao_calculo_escalar():
+    projetos = gerar_projetos(200)
+    kpi_calculator = KPICalculatorAgent(llm)
+
+    lote = calcular_kpis_lote(projetos)
+
+    for i, projeto in enumerate(projetos.to_dict("records")):
+        projeto["duracao"] = int(projeto["duracao"])
+        escalar = kpi_calculator.calculate_kpis(projeto)
+        for kpi, valor in escalar.items():
+            np.testing.assert_allclose(lote[kpi].iloc[i], float(valor), atol=0.006)
+        fluxos = [-lote["Investimento Total"].iloc[i]] + [
+            projeto["economia_custos"] + projeto["aumento_receita"]
+        ] * projeto["duracao"]
+        np.testing.assert_allclose(
+            lote["VPL"].iloc[i],
+            calcular_vpl(projeto["taxa_desconto"], fluxos),
+            rtol=1e-9,
+        )
+
+
+def test_kpis_so_refazem_o_vpl_quando_suas_entradas_mudam():
+    kpi_calculator = KPICalculatorAgent(llm)
+    vpl_projeto.cache_clear()
+
+    kpis = kpi_calculator.calculate_kpis(PROJETO)
+    kpi_calculator.calculate_kpis({**PROJETO, "funcionarios": 500, "risco_falha": 50})
+    assert vpl_projeto.cache_info().misses == 1
+
+    kpi_calculator.calculate_kpis({**PROJETO, "taxa_desconto": 12.0})
+    assert vpl_projeto.cache_info().misses == 2
+    np.testing.assert_allclose(
+        kpis["VPL"], calcular_vpl(10.0, [-115_000.0] + [23_000.0] * 12), rtol=1e-12
+    )
+
+
+def test_kpis_lote_aceita_arrays_e_investimento_zero():
+    dados = {
+        "orcamento": np.array([0.0, 100.0]),
+        "duracao": np.array([12, 12]),
+        "custo_treinamento": np.array([0.0, 0.0]),
+        "custo_implementacao": np.array([0.0, 0.0]),
+        "economia_custos": np.array([10.0, 10.0]),
+        "aumento_receita": np.array([0.0, 0.0]),
+        "taxa_desconto": np.array([0.0, 0.0]),
+    }
+
+    lote = calcular_kpis_lote(dados)
+
+    assert np.isinf(lote["ROI"].iloc[0])
+    assert lote["ROI"].iloc[1] == 20.0
+    assert lote["VPL"].tolist() == [120.0, 20.0]
+
+
+def test_duracao_nao_positiva_sem_payback_nem_tir():
+    kpi_calculator = KPICalculatorAgent(llm)
+
+    for duracao in (0, -1):
+        kpis = kpi_calculator.calculate_kpis({**PROJETO, "duracao": duracao})
+
+        assert np.isnan(kpis["Payback"]) and np.isnan(kpis["TIR"])
+        assert kpis["VPL"] == -115_000.0
+
+
+def test_payback_e_tir_de_varios_fluxos_de_uma_vez():
+    fluxos = np.array(
+        [
+            [-100.0, 30.0, 30.0, 30.0, 30.0],
+            [-100.0, 0.0, 0.0, 0.0, 121.0],
+            [-100.0, 10.0, 10.0, 10.0, 10.0],
+            [0.0, 5.0, 5.0, 5.0, 5.0],
+        ]
+    )
+
+    np.testing.assert_allclose(
+        calcular_payback(fluxos), [100 / 30, 3 + 100 / 121, np.nan, 0.0]
+    )
+    tir = calcular_tir(fluxos)
+    np.testing.assert_allclose(tir[1], (1.21**0.25 - 1) * 100)
+    np.testing.assert_allclose(valor_presente(tir[:3], fluxos[:3]), 0, atol=1e-8)
+    assert np.isnan(tir[3])
+    for linha, esperado in zip(fluxos, tir):
+        np.testing.assert_allclose(calcular_tir(linha), esperado, equal_nan=True)
+
+
+def test_tir_em_lote_igual_a_dos_fluxos_explicitos():
+    projetos = gerar_projetos(300)
+    lote = calcular_kpis_lote(projetos)
+    maior_duracao = int(projetos["duracao"].max())
+    fluxos = np.zeros((len(projetos), maior_duracao))
+    for i, projeto in enumerate(projetos.itertuples()):
+        fluxos[i, : int(projeto.duracao)] = (
+            projeto.economia_custos + projeto.aumento_receita
+        )
+
+    explicitos = calcular_kpis_fluxos(
+        lote["Investimento Total"], fluxos, projetos["taxa_desconto"]
+    )
+
+    np.testing.assert_allclose(explicitos["VPL"], lote["VPL"], rtol=1e-9)
+    np.testing.assert_allclose(explicitos["TIR"], lote["TIR"], rtol=1e-7)
+    np.testing.assert_allclose(explicitos["Payback"], lote["Payback"], rtol=1e-9)
+
+
+def test_fatores_desconto_memorizados_com_curva_e_conversao():
+    fluxos = np.array([[-100.0, 50.0, 60.0, 70.0], [-10.0, 5.0, 5.0, 5.0]])
+    fatores_desconto.cache_clear()
+
+    vpl = valor_presente([1.0, 1.0], fluxos)
+    np.testing.assert_allclose(vpl, [valor_presente(1.0, linha) for linha in fluxos])
+    assert fatores_desconto.cache_info().misses == 1
+    with pytest.raises(ValueError):
+        fatores_desconto(1.0, 3)[1] = 0.0
+
+    # Curva a termo: 1% no primeiro mês e 2% depois
+    esperado = -100 + 50 / 1.01 + 60 / (1.01 * 1.02) + 70 / (1.01 * 1.02**2)
+    assert calcular_vpl((1.0, 2.0, 2.0), fluxos[0]) == pytest.approx(esperado)
+    np.testing.assert_allclose(valor_presente((1.0, 2.0, 2.0), fluxos)[0], esperado)
+
+    assert taxa_mensal(12.0) == pytest.approx(0.948879, rel=1e-5)
+    np.testing.assert_allclose(taxa_anual(taxa_mensal([0.0, 12.0, 30.0])), [0, 12, 30])
+
+
+def test_fatores_desconto_rejeitam_curva_curta_e_periodos_negativos():
+    assert fatores_desconto((), 0).tolist() == [1.0]
+    with pytest.raises(ValueError, match="curva tem 0 taxas"):
+        fatores_desconto((), 3)
+    with pytest.raises(ValueError, match="curva tem 2 taxas"):
+        calcular_vpl((1.0, 2.0), [-100.0, 50.0, 60.0, 70.0])
+    with pytest.raises(ValueError, match="negativo"):
+        fatores_desconto(1.0, -1)
+    with pytest.raises(ValueError, match="negativo"):
+        fatores_desconto((1.0,), -1)
+
+
+def test_vpl_com_curva_em_lista_e_sem_fluxos():
+    fluxos = [-100.0, 50.0, 60.0, 70.0]
+    assert calcular_vpl([1.0, 2.0, 2.0], fluxos) == calcular_vpl(
+        (1.0, 2.0, 2.0), fluxos
+    )
+    assert calcular_vpl(np.array([1.0, 2.0, 2.0]), fluxos) == pytest.approx(
+        calcular_vpl((1.0, 2.0, 2.0), fluxos)
+    )
+    assert calcular_vpl(1.0, []) == 0.0
+    assert calcular_vpl([1.0, 2.0], []) == 0.0
+    assert valor_presente(1.0, []) == 0.0
+    np.testing.assert_array_equal(valor_presente(1.0, np.zeros((3, 0))), [0.0] * 3)
+
+
+def test_kpis_com_rampa_de_adocao():
+    kpi_calculator = KPICalculatorAgent(llm)
+    rampa = np.minimum(np.arange(1, 13) / 4, 1) * 23_000.0
+
+    constante = kpi_calculator.calculate_kpis(
+        {**PROJETO, "fluxos_caixa": [23_000.0] * 12}
+    )
+    com_rampa = kpi_calculator.calculate_kpis({**PROJETO, "fluxos_caixa": rampa})
+
+    assert constante == pytest.approx(kpi_calculator.calculate_kpis(PROJETO))
+    assert com_rampa["VPL"] < constante["VPL"]
+    assert com_rampa["Payback"] > constante["Payback"]
+    assert com_rampa["TIR"] < constante["TIR"]
+
+
+def test_simulacao_sem_incerteza_reproduz_vpl_deterministico():
+    projeto = {**PROJETO, "risco_falha": 0.0}
+    kpis = KPICalculatorAgent(llm).calculate_kpis(projeto)
+
+    simulacao = simular_risco(
+        projeto, n_simulacoes=10_000, volatilidade_economia=0, volatilidade_receita=0
+    )
+
+    for percentil in ("VPL P5", "VPL P50", "VPL P95", "VPL Médio"):
+        assert abs(simulacao[percentil] - float(kpis["VPL"])) < 0.01
+    assert simulacao["Prob. VPL Negativo (%)"] == 0.0
+
+
+def test_simulacao_reprodutivel_e_proxima_dos_percentis_exatos():
+    n = 200_000
+    simulacao = simular_risco(PROJETO, n_simulacoes=n, semente=7)
+    em_lotes_menores = simular_risco(
+        PROJETO, n_simulacoes=n, semente=7, tamanho_lote=30_000
+    )
+
+    falha, economia, receita = (
+        np.random.default_rng(s) for s in np.random.SeedSequence(7).spawn(3)
+    )
+    falhou = falha.random(n) < 0.05
+    fluxo = 8000 * economia.lognormal(-0.02, 0.2, n) + 15000 * receita.lognormal(
+        -0.045, 0.3, n
+    )
+    fluxo[falhou] = 0
+    vpl = -115000 + fluxo * calcular_vpl(10.0, [0.0] + [1.0] * 12)
+
+    assert simulacao["Prob. VPL Negativo (%)"] == 100 * np.mean(vpl < 0)
+    assert (
+        simulacao["Prob. VPL Negativo (%)"]
+        == em_lotes_menores["Prob. VPL Negativo (%)"]
+    )
+    for percentil, esperado in zip(
+        ("VPL P5", "VPL P50", "VPL P95"), np.percentile(vpl, [5, 50, 95])
+    ):
+        assert abs(simulacao[percentil] - esperado) < 5
+        assert abs(em_lotes_menores[percentil] - esperado) < 5
+
+
+def test_ranking_ordena_pelo_criterio_escolhido():
+    projetos = gerar_projetos(50)
+
+    ranking = ranquear_projetos(projetos)
+
+    assert ranking["Posição"].tolist() == list(range(1, 51))
+    assert ranking["VPL"].is_monotonic_decreasing
+    por_roi = ranquear_projetos(projetos, criterio="ROI")
+    assert por_roi["ROI"].is_monotonic_decreasing
+    assert len(por_roi) == 50
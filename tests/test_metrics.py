@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents import executar_tarefa
+from src.cache import CacheAnalises
+from src.metrics import REGISTRO, RegistroMetricas, medir
+
+
+def test_medir_registra_latencia_erros_e_exporta_prometheus():
+    registro = RegistroMetricas(faixas=(0.1, 1.0))
+
+    with medir("calculate_kpis", registro) as medicao:
+        medicao["tokens_prompt"] = 10
+    with pytest.raises(ValueError):
+        with medir("calculate_kpis", registro):
+            raise ValueError("dados inválidos")
+
+    assert (
+        registro.observacoes(
+            "roi_vision_etapa_duracao_segundos", etapa="calculate_kpis"
+        )
+        == 2
+    )
+    assert (
+        registro.valor(
+            "roi_vision_etapa_execucoes_total", etapa="calculate_kpis", resultado="erro"
+        )
+        == 1
+    )
+    texto = registro.exportar_prometheus()
+    assert "# TYPE roi_vision_etapa_duracao_segundos histogram" in texto
+    assert (
+        'roi_vision_etapa_duracao_segundos_bucket{etapa="calculate_kpis",le="+Inf"} 2'
+        in texto
+    )
+    assert 'roi_vision_tokens_total{etapa="calculate_kpis",tipo="prompt"} 10' in texto
+
+
+def test_executar_tarefa_registra_tokens_e_cache(tmp_path):
+    agente = SimpleNamespace(
+        role="Analista",
+        goal="Analisar",
+        backstory="Experiente",
+        llm=SimpleNamespace(model="azure/gpt-4o-mini", temperature=0.1),
+        execute_task=lambda task: "Final Answer: projeto viável",
+    )
+    tarefa = SimpleNamespace(description="Analise o projeto", expected_output="Texto")
+    cache = CacheAnalises(tmp_path)
+    REGISTRO.limpar()
+
+    for _ in range(2):
+        with medir("analyze_project"):
+            executar_tarefa(agente, tarefa, cache=cache)
+
+    rotulos = {"etapa": "analyze_project"}
+    assert (
+        REGISTRO.valor("roi_vision_cache_consultas_total", resultado="falta", **rotulos)
+        == 1
+    )
+    assert (
+        REGISTRO.valor(
+            "roi_vision_cache_consultas_total", resultado="acerto", **rotulos
+        )
+        == 1
+    )
+    assert REGISTRO.valor("roi_vision_tokens_total", tipo="resposta", **rotulos) > 0
@@ -0,0 +1,118 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.portfolio import otimizar_carteira, vpl_ajustado
+
+
+def _projetos(quantidade: int, semente: int = 0) -> pd.DataFrame:
+    gerador = np.random.default_rng(semente)
+    return pd.DataFrame(
+        {
+            "projeto": [f"P{i}" for i in range(quantidade)],
+            "orcamento": gerador.uniform(20_000, 200_000, quantidade).round(),
+            "funcionarios": gerador.integers(10, 300, quantidade),
+            "duracao": gerador.integers(6, 36, quantidade),
+            "custo_treinamento": gerador.uniform(0, 20_000, quantidade).round(),
+            "custo_implementacao": gerador.uniform(0, 40_000, quantidade).round(),
+            "economia_custos": gerador.uniform(0, 15_000, quantidade).round(),
+            "aumento_receita": gerador.uniform(0, 15_000, quantidade).round(),
+            "taxa_desconto": gerador.uniform(5, 15, quantidade).round(1),
+            "risco_falha": gerador.uniform(0, 40, quantidade).round(1),
+        }
+    )
+
+
+def _melhor_por_forca_bruta(valor, custos, limites) -> float:
+    melhor = 0.0
+    for escolha in itertools.product([False, True], repeat=len(valor)):
+        escolha = np.array(escolha)
+        if np.all(custos[escolha].sum(axis=0) <= limites):
+            melhor = max(melhor, valor[escolha].sum())
+    return melhor
+
+
+def test_carteira_otima_sob_orcamento():
+    projetos = _projetos(12)
+    orcamento = 600_000.0
+
+    carteira = otimizar_carteira(projetos, orcamento)
+
+    selecionados = carteira[carteira["Selecionado"]]
+    assert selecionados["Investimento Total"].sum() <= orcamento
+    assert (selecionados["VPL"] > 0).all()
+    assert selecionados["projeto"].is_unique and len(carteira) == 12
+    melhor = _melhor_por_forca_bruta(
+        carteira["VPL"].to_numpy().clip(min=0),
+        carteira[["Investimento Total"]].to_numpy(),
+        [orcamento],
+    )
+    np.testing.assert_allclose(selecionados["VPL"].sum(), melhor, rtol=1e-9)
+    np.testing.assert_allclose(carteira.attrs["limite_superior"], melhor, rtol=1e-9)
+
+
+def test_carteira_que_esgota_o_orcamento_exatamente():
+    projetos = _projetos(3).assign(
+        orcamento=[33_333.3, 33_333.3, 33_333.4],
+        custo_treinamento=0.0,
+        custo_implementacao=0.0,
+    )
+
+    carteira = otimizar_carteira(projetos, 100_000.0)
+
+    assert carteira["Selecionado"].all()
+    np.testing.assert_allclose(carteira["Investimento Total"].sum(), 100_000.0)
+
+    # Um pouco menos de orçamento: só dois cabem
+    carteira = otimizar_carteira(projetos, 99_999.0)
+    assert carteira["Selecionado"].sum() == 2
+
+
+def test_carteira_respeita_funcionarios_e_ajusta_risco():
+    projetos = _projetos(12, semente=1)
+    orcamento, funcionarios = 700_000.0, 600
+
+    carteira = otimizar_carteira(
+        projetos, orcamento, funcionarios_maximo=funcionarios, ajustar_risco=True
+    )
+
+    np.testing.assert_allclose(
+        carteira["Valor"],
+        vpl_ajustado(
+            carteira["VPL"], carteira["Investimento Total"], carteira["risco_falha"]
+        ),
+    )
+    selecionados = carteira[carteira["Selecionado"]]
+    assert selecionados["Investimento Total"].sum() <= orcamento
+    assert selecionados["funcionarios"].sum() <= funcionarios
+
+
+def test_carteira_otima_com_limite_de_funcionarios():
+    # Instâncias em que um preço por funcionário seguido de preenchimento guloso
+    # fica abaixo do ótimo
+    for semente, fracao_orcamento, fracao_funcionarios in [
+        (2, 0.5, 0.3),
+        (11, 0.5, 0.3),
+        (15, 0.5, 0.3),
+        (36, 0.5, 0.3),
+        (16, 0.6, 0.2),
+        (33, 0.6, 0.2),
+    ]:
+        projetos = _projetos(12, semente)
+        orcamento = projetos["orcamento"].sum() * fracao_orcamento
+        funcionarios = projetos["funcionarios"].sum() * fracao_funcionarios
+
+        carteira = otimizar_carteira(
+            projetos, orcamento, funcionarios, ajustar_risco=semente % 2 == 0
+        )
+
+        selecionados = carteira[carteira["Selecionado"]]
+        assert selecionados["Investimento Total"].sum() <= orcamento
+        assert selecionados["funcionarios"].sum() <= funcionarios
+        melhor = _melhor_por_forca_bruta(
+            carteira["Valor"].to_numpy().clip(min=0),
+            carteira[["Investimento Total", "funcionarios"]].to_numpy(),
+            [orcamento, funcionarios],
+        )
+        np.testing.assert_allclose(selecionados["Valor"].sum(), melhor, rtol=1e-9)
@@ -0,0 +1,43 @@
+from src.prompts import contar_tokens, montar_bloco_comparacao, resumir_analise
+
+ANALISE = """### Análise do Projeto
+
+**Pontos fortes:** o ROI de 140% indica um retorno muito acima do investimento.
+O projeto tem prazo curto. A equipe é experiente.
+
+**Pontos fracos:** a economia de custos depende de premissas otimistas.
+
+- Risco de falha moderado para o ramo de TI.
+- A gestão de mudança exige treinamento contínuo.
+
+**Recomendação:** aprovar o projeto com revisão trimestral dos KPIs.
+Esta análise foi feita através de uma IA e deve ser revisada por uma equipe humana.
+"""
+
+KPIS = {
+    "ROI": 140.0,
+    "VPL": 41714.91,
+    "Investimento Total": 115000.0,
+    "Retorno Total": 276000.0,
+}
+
+
+def test_resumo_respeita_o_limite_e_prioriza_frases_relevantes():
+    resumo = resumir_analise(ANALISE, 40)
+
+    assert contar_tokens(resumo) <= 40
+    assert "Recomendação" in resumo
+    assert "**" not in resumo and "###" not in resumo
+
+
+def test_bloco_de_comparacao_economiza_tokens_dentro_do_orcamento():
+    projetos = {"Projeto A": (ANALISE * 5, KPIS), "Projeto B": (ANALISE * 5, KPIS)}
+
+    bloco, relatorio = montar_bloco_comparacao(projetos, orcamento_tokens=200)
+
+    assert relatorio["tokens_compacto"] == contar_tokens(bloco)
+    assert relatorio["tokens_compacto"] <= 200
+    assert relatorio["tokens_economizados"] == (
+        relatorio["tokens_completo"] - relatorio["tokens_compacto"]
+    )
+    assert "VPL: 41714.91" in bloco and "**Projeto B:**" in bloco
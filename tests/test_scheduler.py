@@ -0,0 +1,69 @@
+import threading
+import time
+
+from src.metrics import RegistroMetricas
+from src.scheduler import (
+    PRIORIDADE_INTERATIVA,
+    PRIORIDADE_LOTE,
+    AgendadorLLM,
+    prioridade,
+)
+
+
+class CotaExcedida(Exception):
+    status_code = 429
+
+
+def test_chamadas_interativas_passam_a_frente_do_lote():
+    agendador = AgendadorLLM(registro=RegistroMetricas())
+    agendador._pausado_ate = time.monotonic() + 0.3
+    ordem = []
+
+    def chamar(nivel, nome):
+        with prioridade(nivel):
+            agendador.executar(lambda: ordem.append(nome), tokens=10)
+
+    lote = threading.Thread(target=chamar, args=(PRIORIDADE_LOTE, "lote"))
+    lote.start()
+    time.sleep(0.1)
+    interativa = threading.Thread(
+        target=chamar, args=(PRIORIDADE_INTERATIVA, "interativa")
+    )
+    interativa.start()
+    lote.join()
+    interativa.join()
+
+    assert ordem == ["interativa", "lote"]
+    assert agendador.profundidade_fila == 0
+
+
+def test_recua_e_repete_apos_429():
+    registro = RegistroMetricas()
+    agendador = AgendadorLLM(espera_base=0.01, registro=registro)
+    tentativas = []
+
+    def chamada():
+        tentativas.append(time.monotonic())
+        if len(tentativas) < 3:
+            raise Exception("Failed to get streaming response") from CotaExcedida()
+        return "ok"
+
+    assert agendador.executar(chamada, tokens=10) == "ok"
+    assert len(tentativas) == 3
+    assert registro.valor("roi_vision_agendador_429_total") == 2
+    assert (
+        registro.observacoes(
+            "roi_vision_agendador_espera_segundos", prioridade="interativa"
+        )
+        == 3
+    )
+
+
+def test_balde_de_tokens_segura_chamadas_acima_da_cota():
+    agendador = AgendadorLLM(limite_tpm=600, registro=RegistroMetricas())
+    agendador.executar(lambda: None, tokens=600)
+
+    inicio = time.monotonic()
+    agendador.executar(lambda: None, tokens=5)
+
+    assert time.monotonic() - inicio >= 0.4
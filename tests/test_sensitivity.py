@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from crewai import LLM
+
+from src.agents import KPICalculatorAgent
+from src.sensitivity import grade_relativa, tornado, varrer
+
+PROJETO = {
+    "orcamento": 100000.0,
+    "funcionarios": 100,
+    "duracao": 12,
+    "custo_treinamento": 5000.0,
+    "custo_implementacao": 10000.0,
+    "economia_custos": 8000.0,
+    "aumento_receita": 15000.0,
+    "taxa_desconto": 10.0,
+    "risco_falha": 5.0,
+    "gestao_mudanca": "Fácil",
+    "ramo_atuacao": "TI - IA",
+}
+
+
+def test_varredura_igual_ao_calculo_de_cada_cenario():
+    kpi_calculator = KPICalculatorAgent(LLM(model="azure/gpt-4o-mini"))
+    grades = {
+        "economia_custos": grade_relativa(PROJETO, "economia_custos", 0.2, 5),
+        "duracao": grade_relativa(PROJETO, "duracao", 0.5, 7),
+    }
+
+    varredura = varrer(PROJETO, grades)
+
+    assert len(varredura) == 5 * 7
+    np.testing.assert_array_equal(
+        np.unique(varredura["duracao"]), [6, 8, 10, 12, 14, 16, 18]
+    )
+    for cenario in varredura.sample(10, random_state=0).to_dict("records"):
+        projeto = {**PROJETO, **{campo: cenario[campo] for campo in grades}}
+        projeto["duracao"] = int(projeto["duracao"])
+        for kpi, valor in kpi_calculator.calculate_kpis(projeto).items():
+            np.testing.assert_allclose(cenario[kpi], float(valor), atol=0.006)
+
+
+def test_tornado_ordena_pelo_efeito_no_kpi():
+    tabela = tornado(PROJETO, variacao=0.2)
+
+    assert tabela["Amplitude"].is_monotonic_decreasing
+    assert tabela.loc["orcamento", "Amplitude"] == pytest.approx(40_000.0)
+    assert tabela.loc["orcamento", "Baixo"] > tabela.loc["orcamento", "Alto"]
+    assert tabela.loc["custo_treinamento", "Amplitude"] == pytest.approx(2_000.0)
+
+
+def test_varredura_rejeita_campo_sem_efeito_nos_kpis():
+    with pytest.raises(ValueError, match="risco_falha"):
+        varrer(PROJETO, {"risco_falha": [1.0, 2.0]})
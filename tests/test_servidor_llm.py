@@ -0,0 +1,47 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.servidor_llm import ConfiguracaoServidor, ServidorLLM
+
+
+def chamar(url: str, corpo: dict):
+    return urllib.request.urlopen(
+        urllib.request.Request(
+            url,
+            data=json.dumps(corpo).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+    )
+
+
+def test_servidor_transmite_resposta_e_simula_cota_excedida():
+    configuracao = ConfiguracaoServidor(latencia=0, intervalo_tokens=0)
+    pedido = {"messages": [{"role": "user", "content": "Olá"}], "stream": True}
+
+    with ServidorLLM(configuracao) as servidor:
+        url = (
+            f"{servidor.url}/openai/deployments/gpt-4o-mini/chat/completions"
+            "?api-version=2024-06-01"
+        )
+        with chamar(url, pedido) as resposta:
+            eventos = [
+                linha.removeprefix(b"data: ").strip()
+                for linha in resposta
+                if linha.startswith(b"data: ")
+            ]
+        configuracao.taxa_429 = 1.0
+        with pytest.raises(urllib.error.HTTPError) as erro:
+            chamar(url, pedido)
+
+    assert eventos[-1] == b"[DONE]"
+    texto = "".join(
+        json.loads(evento)["choices"][0]["delta"].get("content", "")
+        for evento in eventos[:-1]
+    )
+    assert texto == configuracao.resposta
+    assert erro.value.code == 429
+    assert erro.value.headers["Retry-After"] == "1"
+    assert servidor.contadores == {"200": 1, "429": 1}
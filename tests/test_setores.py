@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from src.history import HistoricoAnalises
+from src.setores import IndiceSetorial
+
+PROJETO = {
+    "projeto": "Projeto A",
+    "orcamento": 100000.0,
+    "funcionarios": 100,
+    "duracao": 12,
+    "custo_treinamento": 5000.0,
+    "custo_implementacao": 10000.0,
+    "economia_custos": 8000.0,
+    "aumento_receita": 15000.0,
+    "taxa_desconto": 10.0,
+    "risco_falha": 5.0,
+    "gestao_mudanca": "Fácil",
+    "ramo_atuacao": "TI - IA",
+}
+
+
+def test_percentis_e_quartis_do_ramo():
+    tabela = pd.DataFrame(
+        {
+            "ramo_atuacao": ["TI - IA"] * 5 + ["Agronomia"] * 4,
+            "ROI": [10.0, 20.0, 30.0, 40.0, 50.0, 1.0, 2.0, 3.0, 4.0],
+            "VPL": [100.0, 200.0, 300.0, 400.0, 500.0, 1.0, 2.0, 3.0, 4.0],
+            "Payback": [6.0, 8.0, np.inf, 10.0, 12.0, 1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    indice = IndiceSetorial.de_tabela(tabela)
+
+    assert indice.ramos() == {"Agronomia": 4, "TI - IA": 5}
+    # Empates contam pela metade; o payback infinito fica fora dos valores
+    assert indice.percentil("TI - IA", "ROI", 30.0) == 50.0
+    assert indice.percentil("TI - IA", "ROI", 35.0) == 60.0
+    assert indice.percentil("TI - IA", "Payback", 100.0) == 100.0
+    assert np.isnan(indice.percentil("Varejo", "ROI", 35.0))
+
+    posicao = indice.posicionar("TI - IA", {"ROI": 45.0, "VPL": 0.0, "Payback": 9.0})
+    assert posicao["ROI"] == {
+        "projetos": 5,
+        "percentil": 80.0,
+        "P25": 20.0,
+        "P50": 30.0,
+        "P75": 40.0,
+    }
+    assert posicao["VPL"]["percentil"] == 0.0
+    # Só 4 projetos do ramo têm payback finito: o KPI fica sem posição
+    assert "Payback" not in posicao
+    indice.adicionar("TI - IA", {"Payback": 7.0})
+    posicao = indice.posicionar("TI - IA", {"Payback": 9.0})
+    assert posicao["Payback"]["projetos"] == 5
+    assert posicao["Payback"]["P50"] == 8.0
+    assert posicao["ROI"]["projetos"] == 5
+    # Poucos projetos no ramo: sem posição
+    assert indice.posicionar("Agronomia", {"ROI": 2.0}) is None
+
+
+def test_atualizacao_incremental_sem_repetir_projetos(tmp_path):
+    historico = HistoricoAnalises(tmp_path)
+    for orcamento in (100000.0, 110000.0, 120000.0, 130000.0):
+        dados = {**PROJETO, "orcamento": orcamento}
+        kpis = {"ROI": orcamento / 1000, "VPL": orcamento, "Payback": np.inf}
+        historico.registrar_analise(dados, kpis, "Análise", "m")
+    # A mesma entrada analisada de novo (outro nome) conta uma única vez
+    historico.registrar_analise(
+        {**PROJETO, "projeto": "Cópia"}, {"ROI": 100.0, "VPL": 1.0}, "Refeita", "m"
+    )
+
+    indice = IndiceSetorial.do_historico(historico)
+    assert indice.ramos() == {"TI - IA": 4}
+    assert indice.posicionar("TI - IA", {"ROI": 0.0}) is None
+
+    novo = {**PROJETO, "orcamento": 90000.0}
+    chave = HistoricoAnalises.chave_entrada(novo)
+    assert indice.adicionar("TI - IA", {"ROI": 95.0, "VPL": 9.0}, chave)
+    assert not indice.adicionar("TI - IA", {"ROI": 95.0, "VPL": 9.0}, chave)
+    assert not indice.adicionar(
+        "TI - IA", {"ROI": 1.0}, HistoricoAnalises.chave_entrada(PROJETO)
+    )
+
+    posicao = indice.posicionar("TI - IA", {"ROI": 100.0, "VPL": 1.0})
+    assert posicao["ROI"]["projetos"] == 5
+    # Refeita: a análise mais recente de cada entrada
+    assert posicao["ROI"]["percentil"] == 30.0
+    assert posicao["VPL"]["P25"] == 9.0
+    assert "Payback" not in posicao